@@ -0,0 +1,184 @@
+"""OCR和特征匹配微基准测试
+
+直接计时运行时实际调用的检测库，不经过回放用的headless检测实现:
+    全屏和各命名box内的OCR（config['ocr']对应的onnxocr和OpenVINO后端的ONNXPaddleOcr.ocr）
+    固定位置文字的检测+识别与跳过检测直接识别(ocr_fixed使用的recognize)
+    各特征在不同偏移(variance)设置下的模板匹配: 小偏移为框架find_feature的cv2.matchTemplate，
+    全屏查找为MyBaseTask使用的金字塔匹配，同一画面多个特征为find_best_of使用的批量匹配
+    截图处理器(screenshot_processor)
+对 tests/images/main.png 和 --frames 目录下的截图输出p50/p95/p99，可保存为基线。
+与基线比较时，变慢超过阈值、用例出错或基线中的用例本次没有运行，都返回非0退出码。
+
+用法:
+    python benchmark.py --save-baseline tests/benchmark_baseline.json
+    python benchmark.py --baseline tests/benchmark_baseline.json --json bench_output.json
+"""
+import argparse
+import glob
+import os
+import platform
+import sys
+
+import cv2
+
+from src.replay import headless
+
+# src.config只需要ok中的配置类，未安装ok时使用headless提供的
+try:
+    import ok  # noqa: F401
+except ImportError:
+    sys.modules['ok'] = headless
+
+from src.config import config, make_bottom_right_black  # noqa: E402
+from src.utils.benchmark import BenchmarkSuite, compare, load_results, missing_cases, save_results  # noqa: E402
+from src.utils.images import read_image  # noqa: E402
+from src.utils.pyramid_match import BatchTemplateMatcher, pyramid_match  # noqa: E402
+from src.utils.rec_ocr import recognize  # noqa: E402
+from src.utils.template_cache import TemplateCache  # noqa: E402
+
+# 命名box对应的画面比例 (x, y, to_x, to_y)
+OCR_BOXES = {
+    'top_left': (0, 0, 0.5, 0.5), 'top_right': (0.5, 0, 1, 0.5),
+    'bottom_left': (0, 0.5, 0.5, 1), 'bottom_right': (0.5, 0.5, 1, 1),
+    'left': (0, 0, 0.5, 1), 'right': (0.5, 0, 1, 1), 'top': (0, 0, 1, 0.5), 'bottom': (0, 0.5, 1, 1),
+}
+FEATURE_VARIANCES = (0, 0.05, 0.2)  # 框架find_feature在标注位置附近匹配的偏移
+PYRAMID_TOP_K = 5  # 与MyBaseTask.PYRAMID_TOP_K相同
+
+
+def ocr_backends():
+    """config['ocr']对应的ONNXPaddleOcr，未安装的后端跳过"""
+    params = dict(config['ocr'].get('params', {}))
+    params.setdefault('use_dml', False)
+    backends = {}
+    try:
+        from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+    except ImportError:
+        return backends
+    backends['onnxocr'] = ONNXPaddleOcr(**dict(params, use_openvino=False))
+    try:
+        import openvino  # noqa: F401
+        backends['openvino'] = ONNXPaddleOcr(**dict(params, use_openvino=True))
+    except ImportError:
+        pass
+    return backends
+
+
+def crop(frame, region):
+    """按画面比例 (x, y, to_x, to_y) 裁剪"""
+    height, width = frame.shape[:2]
+    x, y, to_x, to_y = region
+    return frame[int(y * height):int(to_y * height), int(x * width):int(to_x * width)]
+
+
+def add_fixed_text_cases(suite, prefix, model, frame):
+    """对右下角识别到的第一段文字，比较紧贴文字区域的检测+识别与跳过检测直接识别"""
+    image = crop(frame, OCR_BOXES['bottom_right'])
+    texts = model.ocr(image)[0]
+    if not texts:
+        return
+    points = texts[0][0]
+    xs = [int(point[0]) for point in points]
+    ys = [int(point[1]) for point in points]
+    text_image = image[min(ys):max(ys), min(xs):max(xs)]
+    suite.add(f'{prefix}/fixed_text/detect_recognize', lambda: model.ocr(text_image))
+    suite.add(f'{prefix}/fixed_text/recognize_only', lambda: recognize(model, [text_image]))
+
+
+def match_near(frame, template, box, variance):
+    """框架find_feature的匹配: 在标注位置扩展variance后的区域内cv2.matchTemplate"""
+    height, width = frame.shape[:2]
+    x, y, box_width, box_height = box
+    dx, dy = int(width * variance), int(height * variance)
+    image = frame[max(0, y - dy):y + box_height + dy, max(0, x - dx):x + box_width + dx]
+    _, confidence, _, location = cv2.minMaxLoc(cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED))
+    return confidence, location
+
+
+def add_feature_cases(suite, frame_name, frame, templates):
+    """各特征的模板匹配用例"""
+    matching = config['template_matching']
+    threshold = matching['default_threshold']
+    base_variance = max(matching['default_horizontal_variance'], matching['default_vertical_variance'])
+    resolution = frame.shape[1::-1]
+    features = {}
+    for name in templates.boxes:
+        template = templates.get(name, resolution)
+        box = templates.box(name, resolution)
+        if template is None or box is None:
+            continue
+        features[name] = template
+        for variance in FEATURE_VARIANCES:
+            suite.add(f'find_feature/{frame_name}/{name}/variance={variance}',
+                      lambda template=template, box=box, variance=max(variance, base_variance):
+                      match_near(frame, template, box, variance))
+        suite.add(f'find_feature/{frame_name}/{name}/full_screen',
+                  lambda template=template: pyramid_match(frame, template, threshold, top_k=PYRAMID_TOP_K))
+    suite.add(f'find_best_of/{frame_name}/all',
+              lambda: BatchTemplateMatcher(frame).match(features, threshold))
+
+
+def build_suite(frames, repeat, warmup):
+    suite = BenchmarkSuite(repeat, warmup)
+    backends = ocr_backends()
+    matching = config['template_matching']
+    templates = TemplateCache.shared(matching['coco_feature_json'], matching['template_cache'],
+                                     config['supported_resolution']['resize_to'])
+    for frame_name, frame in frames:
+        for backend_name, model in backends.items():
+            prefix = f'ocr/{backend_name}/{frame_name}'
+            suite.add(f'{prefix}/full', lambda model=model, frame=frame: model.ocr(frame))
+            for box, region in OCR_BOXES.items():
+                suite.add(f'{prefix}/{box}', lambda model=model, image=crop(frame, region): model.ocr(image))
+            add_fixed_text_cases(suite, prefix, model, frame)
+        suite.add(f'screenshot_processor/{frame_name}', lambda frame=frame.copy(): make_bottom_right_black(frame))
+        add_feature_cases(suite, frame_name, frame, templates)
+    if not backends:
+        print('onnxocr未安装，跳过OCR用例')
+    return suite
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OCR and feature matching micro benchmarks')
+    parser.add_argument('--frames', help='额外截图目录(*.png)')
+    parser.add_argument('--repeat', type=int, default=20, help='每个用例计时次数')
+    parser.add_argument('--warmup', type=int, default=2, help='每个用例预热次数')
+    parser.add_argument('--json', help='保存本次结果的路径')
+    parser.add_argument('--baseline', help='比较的基线结果')
+    parser.add_argument('--save-baseline', help='把本次结果保存为基线')
+    parser.add_argument('--metric', default='p95', help='与基线比较的指标')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='允许变慢的比例')
+    args = parser.parse_args()
+
+    paths = [os.path.join('tests', 'images', 'main.png')]
+    if args.frames:
+        paths += sorted(glob.glob(os.path.join(args.frames, '*.png')))
+    frames = [(os.path.splitext(os.path.basename(path))[0], read_image(path)) for path in paths]
+
+    suite = build_suite(frames, args.repeat, args.warmup)
+    results = suite.run()
+    meta = {'python': platform.python_version(), 'machine': platform.platform(), 'processor': platform.processor()}
+    for path in (args.json, args.save_baseline):
+        if path:
+            save_results(path, results, meta)
+
+    failed = bool(suite.errors)
+    for name, error in suite.errors.items():
+        print(f'出错: {name} {error}')
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        missing = missing_cases(results, baseline)
+        for name in missing:
+            print(f'缺少: {name} 基线中的用例本次没有结果')
+        regressions = compare(results, baseline, args.metric, args.tolerance)
+        for name, previous, current in regressions:
+            print(f'变慢: {name} {args.metric} {previous:.2f}ms -> {current:.2f}ms')
+        failed = failed or bool(missing or regressions)
+        if not failed:
+            print(f'与基线相比没有超过{args.tolerance:.0%}的变慢')
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,16 @@
+from src.utils import startup_profile  # 最先导入，记录进程启动时间
+
 import ok
 from src.config import config
+from src.globals import Globals
+from src.utils import openvino_cache
+
+startup_profile.mark('imports_done')
 
 if __name__ == '__main__':
     config = config
     config['debug'] = True
+    # 在ok创建OCR库之前替换编译方式，Globals中的调用可能晚于OCR库初始化
+    openvino_cache.install(Globals.OPENVINO_CACHE_DIR)
     ok = ok.OK(config)
     ok.start()
@@ -0,0 +1,65 @@
+"""多个客户端共用一个OCR引擎同时运行任务
+
+每个客户端的画面来自图片文件或目录，OCR请求跨客户端合并推理，输出吞吐量、批大小和内存占用。
+用法: python multi_session.py frames/client0 frames/client1 --task src.tasks.OpenWalnutTask:OpenWalnutTask --seconds 60
+"""
+import argparse
+import importlib
+import json
+import logging
+import sys
+
+from src.replay import headless
+
+sys.modules['ok'] = headless
+
+from src.config import config  # noqa: E402
+from src.replay.multi_session import FileFrameSource, MultiSessionRunner  # noqa: E402
+
+
+def peak_memory_mb():
+    """进程内存峰值(MB)，不支持的平台返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a task in several sessions sharing one OCR engine')
+    parser.add_argument('frames', nargs='+', help='每个客户端的图片文件或目录，少于--clients时循环使用')
+    parser.add_argument('--clients', type=int, default=0, help='客户端数量，默认为frames的数量')
+    parser.add_argument('--task', default='src.tasks.OpenWalnutTask:OpenWalnutTask', help='任务类 module:Class')
+    parser.add_argument('--config', default='{}', help='覆盖任务配置的JSON')
+    parser.add_argument('--seconds', type=float, default=30, help='每个会话的运行时长')
+    parser.add_argument('--fps', type=float, default=2, help='图片目录的切换帧率')
+    parser.add_argument('--max-batch', type=int, default=16, help='每批最多合并的OCR请求数')
+    parser.add_argument('--max-wait', type=float, default=0.005, help='收集同一批请求最多等待的秒数')
+    parser.add_argument('--json', help='保存报告的路径')
+    parser.add_argument('--verbose', action='store_true', help='输出任务日志')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    module_name, class_name = args.task.split(':')
+    task_class = getattr(importlib.import_module(module_name), class_name)
+    clients = args.clients or len(args.frames)
+    sources = {path: FileFrameSource(path, args.fps) for path in args.frames}
+    runner = MultiSessionRunner(config, [sources[args.frames[index % len(args.frames)]] for index in range(clients)],
+                                duration=args.seconds, max_batch=args.max_batch, max_wait=args.max_wait)
+    report = runner.run(task_class, json.loads(args.config))
+    report['peak_memory_mb'] = peak_memory_mb()
+
+    for session in report['sessions']:
+        print(f"{session['session']:<10} {session['finished']:<16} rounds={session['rounds']} "
+              f"steps={session['steps']} error={session['error']}")
+    print(json.dumps({key: value for key, value in report.items() if key != 'sessions'}, ensure_ascii=False,
+                     indent=2))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
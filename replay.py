@@ -0,0 +1,42 @@
+"""在无游戏环境下回放录制的任务会话
+
+用法: python replay.py recordings/OpenWalnutTask_20250101_120000 --task src.tasks.OpenWalnutTask:OpenWalnutTask
+"""
+import argparse
+import importlib
+import json
+import logging
+import sys
+
+from src.replay import headless
+
+sys.modules['ok'] = headless
+
+from src.config import config  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded task session headlessly')
+    parser.add_argument('session', help='录制的会话目录')
+    parser.add_argument('--task', default='src.tasks.OpenWalnutTask:OpenWalnutTask', help='任务类 module:Class')
+    parser.add_argument('--config', default='{}', help='覆盖任务配置的JSON')
+    parser.add_argument('--json', help='保存回放报告的路径')
+    parser.add_argument('--verbose', action='store_true', help='输出任务日志')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    module_name, class_name = args.task.split(':')
+    task_class = getattr(importlib.import_module(module_name), class_name)
+    report = headless.ReplayExecutor(args.session, config).run(task_class, json.loads(args.config))
+
+    for step in report['steps']:
+        print(f"{step['t']:>9.3f}s  {step['action']:<14} latency={step['latency']}s compute={step['compute_ms']}ms")
+    summary = {key: value for key, value in report.items() if key != 'steps'}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
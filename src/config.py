@@ -1,8 +1,9 @@
 import os
 
-import numpy as np
 from ok import ConfigOption
 
+from src.utils.frame_pipeline import FramePipeline, Mask
+
 version = "dev"
 
 key_config_option = ConfigOption('Game Hotkey Config', { #全局配置示例
@@ -12,45 +13,31 @@ key_config_option = ConfigOption('Game Hotkey Config', { #全局配置示例
     'Tool Key': 't',
 }, description='In Game Hotkey for Skills')
 
+replay_record_option = ConfigOption('Replay Recording', { #录制任务会话, 用 replay.py 在无游戏环境下回放
+    'Record Sessions': False,
+    'Record Folder': 'recordings',
+}, description='Record detection frames and inputs for offline replay')
 
-def make_bottom_right_black(frame):
-    """
-    Changes a portion of the frame's pixels at the bottom right to black.
-
-    Args:
-        frame: The input frame (NumPy array) from OpenCV.
-
-    Returns:
-        The modified frame with the bottom-right corner blackened.  Returns the original frame
-        if there's an error (e.g., invalid frame).
-    """
-    try:
-        height, width = frame.shape[:2]  # Get height and width
-
-        # Calculate the size of the black rectangle
-        black_width = int(0.13 * width)
-        black_height = int(0.025 * height)
+trace_option = ConfigOption('Span Tracing', { #任务结束时导出ocr/find_feature/wait/点击/按键/sleep的耗时区间
+    'Export Trace': False,
+    'Trace Folder': 'traces', #Chrome trace JSON, 可在 chrome://tracing 或 ui.perfetto.dev 打开
+}, description='Export detection, input and sleep spans as Chrome trace JSON when a task ends')
 
-        # Calculate the starting coordinates of the rectangle
-        start_x = width - black_width
-        start_y = height - black_height
+resource_option = ConfigOption('Shared Resources', { #og.my_app.resources中任务共享的模型/模板等资源
+    'Memory Cap (MB)': 512, #超过后释放最久未使用且没有任务持有的资源
+}, description='Memory cap for lazily loaded resources shared between tasks')
 
-        # Create a black rectangle (NumPy array of zeros)
-        black_rect = np.zeros((black_height, black_width, frame.shape[2]), dtype=frame.dtype)  # Ensure same dtype
 
-        # Replace the bottom-right portion of the frame with the black rectangle
-        frame[start_y:height, start_x:width] = black_rect
+# 把右下角宽13%、高2.5%的区域原地涂黑（与 width - int(0.13 * width) 起的旧写法逐像素一致），像素范围按分辨率只计算一次
+# 可继续组合 Crop/Downscale/ColorConvert 阶段，make_bottom_right_black.stats() 查看每个阶段的耗时
+make_bottom_right_black = FramePipeline(Mask([(0.87, 0.975, 1, 1)]))
 
-        return frame
-    except Exception as e:
-        print(f"Error processing frame: {e}")
-        return frame
 
 config = {
     'debug': False,  # Optional, default: False
     'use_gui': True,
     'config_folder': 'configs',
-    'global_configs': [key_config_option],
+    'global_configs': [key_config_option, replay_record_option, trace_option, resource_option],
     # 'screenshot_processor': make_bottom_right_black, # 在截图的时候对frame进行修改, 可选
     'gui_icon': 'icons/icon.png',
     'wait_until_before_delay': 0,
@@ -103,6 +90,7 @@ config = {
         'default_horizontal_variance': 0.002, #默认x偏移, 查找不传box的时候, 会根据coco坐标, match偏移box内的
         'default_vertical_variance': 0.002, #默认y偏移
         'default_threshold': 0.8, #默认threshold
+        'template_cache': os.path.join('cache', 'templates.bundle'), #按resize_to分辨率预计算的模板资源包(内存映射加载), 首次使用时生成, 不随assets同步
     },
     'version': version, #版本
     'my_app': ['src.globals', 'Globals'], # 全局单例对象, 可以存放加载的模型, 使用og.my_app调用
@@ -1,14 +1,69 @@
-from PySide6.QtCore import QObject
+import os
+import threading
+import time
 
-from ok import Logger
+from PySide6.QtCore import QObject, QTimer
+
+from ok import Logger, og
+
+from src.config import config
+from src.utils import openvino_cache, startup_profile
+from src.utils.resource_registry import ResourceRegistry
 
 logger = Logger.get_logger(__name__)
 
 
 class Globals(QObject):
+    # OpenVINO编译结果的磁盘缓存目录，按模型哈希和CPU分子目录
+    OPENVINO_CACHE_DIR = os.path.join('cache', 'openvino')
+    # 等待执行器创建的最长时间(秒)
+    WARM_UP_WAIT = 60
 
     def __init__(self, exit_event):
         super().__init__()
+        startup_profile.mark('globals_init')
+        self.exit_event = exit_event
+        self.ocr_ready = threading.Event()
+        self.ocr_warm_up_time = None
+        # 任务共享的惰性资源，任务通过MyBaseTask.use_resource使用，进程级缓存通过track_shared登记大小，
+        # 内存上限由Shared Resources配置
+        self.resources = ResourceRegistry()
+        # 必须在OCR库初始化之前替换编译方式，main.py在创建OK之前已调用，这里重复调用不生效
+        openvino_cache.install(self.OPENVINO_CACHE_DIR)
+        threading.Thread(target=self.prepare_ocr, name='ocr_warm_up', daemon=True).start()
+        # 事件循环开始处理事件时界面可用
+        QTimer.singleShot(0, self.on_gui_ready)
+
+    def on_gui_ready(self):
+        startup_profile.mark('gui_ready')
+        logger.info(f'startup timings: {startup_profile.marks()}')
+
+    def exiting(self):
+        return self.exit_event is not None and self.exit_event.is_set()
+
+    def prepare_ocr(self):
+        """在后台线程加载（或从缓存读取编译好的）OCR模型并执行一次预热推理，
+        使第一次ocr()就是稳定状态的耗时"""
+        deadline = time.time() + self.WARM_UP_WAIT
+        while getattr(og, 'executor', None) is None:
+            if self.exiting() or time.time() > deadline:
+                return
+            time.sleep(0.1)
+        start = time.time()
+        try:
+            openvino_cache.warm_up(og.executor.ocr_lib())
+        except Exception as e:
+            logger.error('OCR warm up failed', e)
+            return
+        self.ocr_warm_up_time = time.time() - start
+        if config['ocr'].get('params', {}).get('use_openvino'):
+            # install晚于OCR库创建时缓存不生效，每次启动都会重新编译
+            problem = openvino_cache.check()
+            if problem is not None:
+                logger.warning(f'OpenVINO compile cache not used: {problem}')
+        self.ocr_ready.set()
+        startup_profile.mark('ocr_ready')
+        logger.info(f'OCR models loaded and warmed up in {self.ocr_warm_up_time:.2f}s')
 
 
 if __name__ == "__main__":
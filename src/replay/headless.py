@@ -0,0 +1,595 @@
+"""无游戏环境下回放录制会话用的ok接口子集
+
+提供任务用到的 BaseTask、TriggerTask、Box、ConfigOption、Logger、WaitFailedException、og，
+replay.py 把本模块注册为 ok 模块后再导入任务，任务代码无需修改即可在 Linux 上运行。
+只实现本项目任务实际调用的方法，截图和交互由执行器提供，检测方法是在回放帧上运行的简化版；
+方法签名须与requirements.txt固定版本的ok-script一致，由tests/TestOkApi.py对照其接口声明检查。
+"""
+import logging
+import re
+import time
+from types import SimpleNamespace
+
+import cv2
+
+from src.replay.session import ReplaySession
+from src.utils.input_macro import INTERACTION_ACTIONS
+from src.utils.template_cache import TemplateCache
+
+og = SimpleNamespace(my_app=None, executor=None, config=None)
+
+
+class ReplayFinished(BaseException):
+    """录制的画面已全部回放完
+
+    继承BaseException，避免被任务中的 except Exception 吞掉。
+    """
+
+
+class WaitFailedException(Exception):
+    pass
+
+
+class Logger:
+
+    @staticmethod
+    def get_logger(name):
+        return logging.getLogger(name)
+
+
+class ConfigOption:
+
+    def __init__(self, name, default=None, description='', config_description=None, config_type=None,
+                 validator=None, icon=None):
+        self.name = name
+        self.default_config = default or {}
+        self.description = description
+        self.config_description = config_description or {}
+        self.config_type = config_type or {}
+        self.validator = validator
+        self.icon = icon
+
+
+class Box:
+
+    def __init__(self, x, y, width=0, height=0, confidence=1.0, name=None, to_x=-1, to_y=-1):
+        self.x = int(round(x))
+        self.y = int(round(y))
+        self.width = int(round(to_x - x)) if to_x != -1 else int(round(width))
+        self.height = int(round(to_y - y)) if to_y != -1 else int(round(height))
+        self.confidence = confidence
+        self.name = name
+
+    def __eq__(self, other):
+        return isinstance(other, Box) and (self.x, self.y, self.width, self.height, self.name) == (
+            other.x, other.y, other.width, other.height, other.name)
+
+    def __repr__(self):
+        return f'{self.name}_{self.x}_{self.y}_{self.width}_{self.height}_{round(self.confidence, 2)}'
+
+    def center(self):
+        return self.x + self.width / 2, self.y + self.height / 2
+
+
+def match_text(text, match):
+    """判断OCR文本是否符合match条件：字符串相等、正则搜索或列表中任一项"""
+    if match is None:
+        return True
+    if isinstance(match, (list, tuple)):
+        return any(match_text(text, item) for item in match)
+    if isinstance(match, re.Pattern):
+        return match.search(text) is not None
+    return text == match
+
+
+class OnnxOcrEngine:
+    """使用onnxocr识别，首次调用时加载模型"""
+
+    def __init__(self, **params):
+        self.params = params
+        self._ocr = None
+
+    @property
+    def model(self):
+        """onnxocr的ONNXPaddleOcr"""
+        if self._ocr is None:
+            from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+            self._ocr = ONNXPaddleOcr(**self.params)
+        return self._ocr
+
+    def __call__(self, image):
+        """识别图像中的文字
+
+        Returns:
+            list: [(文本, (x, y, 宽, 高), 置信度)]
+        """
+        results = []
+        for points, (text, score) in self.model.ocr(image)[0] or []:
+            xs = [point[0] for point in points]
+            ys = [point[1] for point in points]
+            results.append((text, (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)), score))
+        return results
+
+
+class ReplayInteraction:
+    """记录任务发出的交互操作，不实际操作窗口"""
+
+    def __init__(self, executor):
+        self.executor = executor
+
+    def _step(self, action, **fields):
+        self.executor.add_step(action, **fields)
+
+    def click(self, x, y, key='left', down_time=0.01):
+        self._step('click', x=int(x), y=int(y), key=key)
+
+    def send_key(self, key, down_time=0.02):
+        self._step('send_key', key=str(key), down_time=down_time)
+
+    def send_key_down(self, key):
+        self._step('send_key_down', key=str(key))
+
+    def send_key_up(self, key):
+        self._step('send_key_up', key=str(key))
+
+    def mouse_down(self, x=-1, y=-1, key='left'):
+        self._step('mouse_down', x=int(x), y=int(y), key=key)
+
+    def mouse_up(self, key='left'):
+        self._step('mouse_up', key=key)
+
+    def operate(self, func, block=False):
+        return func()
+
+    def do_mouse_down(self, key='left'):
+        self.mouse_down(key=key)
+
+    def do_mouse_up(self, key='left'):
+        self.mouse_up(key=key)
+
+    def do_send_key_down(self, key):
+        self.send_key_down(key)
+
+    def do_send_key_up(self, key):
+        self.send_key_up(key)
+
+
+class HeadlessExecutor:
+    """无游戏环境的执行器，任务读取的画面由image指定
+
+    虚拟时间 = 实际经过的时间 + 跳过的sleep时间，sleep不真正等待。
+    """
+
+    def __init__(self, app_config, ocr_engine=None, wait_interval=0.1, image=None, frame_interval=1 / 30):
+        """初始化执行器
+
+        Args:
+            app_config: src.config中的config
+            ocr_engine: OCR函数，输入图像返回 [(文本, (x, y, 宽, 高), 置信度)]，默认使用onnxocr
+            wait_interval: wait_*方法的检测间隔(秒)
+            image: 任务读取的画面
+            frame_interval: next_frame等待的截图间隔(秒)
+        """
+        self.config = app_config
+        self.ocr_engine = ocr_engine or OnnxOcrEngine(**app_config.get('ocr', {}).get('params', {}))
+        self.wait_interval = wait_interval
+        self.image = image
+        self.frame_interval = frame_interval
+        matching = app_config['template_matching']
+        self.feature_set = SimpleNamespace(default_threshold=matching.get('default_threshold', 0.8),
+                                           default_horizontal_variance=matching.get('default_horizontal_variance', 0),
+                                           default_vertical_variance=matching.get('default_vertical_variance', 0))
+        self.interaction = ReplayInteraction(self)
+        self.global_configs = {option.name: dict(option.default_config)
+                               for option in app_config.get('global_configs', [])}
+        self.steps = []
+        self._skipped = 0.0
+        self._wall_start = time.perf_counter()
+        self._last_step = self._wall_start
+        self._templates = None
+
+    def now(self):
+        """当前虚拟时间(秒)"""
+        return time.perf_counter() - self._wall_start + self._skipped
+
+    def sleep(self, timeout):
+        self.now()
+        self._skipped += max(0.0, timeout)
+
+    def frame(self):
+        return self.image
+
+    def ocr_lib(self, name='default'):
+        """OCR库，使用onnxocr时返回ONNXPaddleOcr"""
+        if isinstance(self.ocr_engine, OnnxOcrEngine):
+            return self.ocr_engine.model
+        return self.ocr_engine
+
+    def next_frame(self):
+        """等待一个截图间隔后的帧"""
+        self.sleep(self.frame_interval)
+        return self.frame()
+
+    @property
+    def templates(self):
+        if self._templates is None:
+            matching = self.config['template_matching']
+            self._templates = TemplateCache.shared(matching['coco_feature_json'], matching['template_cache'],
+                                                   self.config['supported_resolution']['resize_to'])
+        return self._templates
+
+    def create_task(self, task_class, task_config=None):
+        """创建任务并应用配置
+
+        Args:
+            task_class: 任务类
+            task_config: 覆盖任务默认配置的字典
+
+        Returns:
+            任务实例
+        """
+        og.executor = self
+        og.config = self.config
+        task = task_class(executor=self)
+        task.config = dict(task.default_config)
+        task.config.update(task_config or {})
+        task.start_time = time.time()
+        return task
+
+    def step_latency(self, now):
+        return None
+
+    def add_step(self, action, **fields):
+        """记录一步交互操作
+
+        compute_ms为距上一步的实际计算耗时，latency为操作时刻与所依据的帧出现时刻之差。
+        """
+        now = self.now()
+        wall = time.perf_counter()
+        step = {'action': action, 't': round(now, 4), 'compute_ms': round((wall - self._last_step) * 1000, 2),
+                'latency': self.step_latency(now)}
+        step.update(fields)
+        self.steps.append(step)
+        self._last_step = wall
+
+
+class ReplayExecutor(HeadlessExecutor):
+    """按虚拟时钟回放录制的画面，运行任务并统计每步延迟
+
+    任务读取的画面是当前虚拟时刻录制中显示的帧，sleep不真正等待，
+    所以回放比实际运行快。画面回放完后结束任务。
+    """
+
+    def __init__(self, session, app_config, ocr_engine=None, tail=1.0, wait_interval=0.1):
+        """初始化回放执行器
+
+        Args:
+            session: ReplaySession或会话目录
+            app_config: src.config中的config
+            ocr_engine: OCR函数，默认使用onnxocr
+            tail: 最后一帧之后继续运行的时间(秒)
+            wait_interval: wait_*方法的检测间隔(秒)
+        """
+        super().__init__(app_config, ocr_engine, wait_interval)
+        self.session = session if isinstance(session, ReplaySession) else ReplaySession(session)
+        self.tail = tail
+        self.frame_index = 0
+
+    def now(self):
+        """当前虚拟时间(秒)，超过录制时长时结束回放"""
+        now = super().now()
+        if now > self.session.duration + self.tail:
+            raise ReplayFinished()
+        return now
+
+    def frame(self):
+        """当前虚拟时间录制中显示的帧"""
+        self.frame_index = self.session.frame_index_at(self.now())
+        return self.session.frame(self.frame_index)
+
+    def step_latency(self, now):
+        if not self.session.frame_events:
+            return None
+        return round(now - self.session.frame_time(self.frame_index), 4)
+
+    def run(self, task_class, task_config=None):
+        """运行任务直到任务结束或画面回放完
+
+        Args:
+            task_class: 任务类
+            task_config: 覆盖任务默认配置的字典
+
+        Returns:
+            dict: 回放报告
+        """
+        task = self.create_task(task_class, task_config)
+        self.steps = []
+        self._skipped = 0.0
+        self._wall_start = self._last_step = time.perf_counter()
+        finished = 'task_returned'
+        error = None
+        try:
+            task.run()
+        except ReplayFinished:
+            finished = 'replay_finished'
+        except Exception as e:
+            finished = 'error'
+            error = f'{type(e).__name__}: {e}'
+        total_time = time.perf_counter() - self._wall_start + self._skipped
+        return self.report(task, finished, error, total_time)
+
+    def report(self, task, finished, error, total_time):
+        """汇总回放结果，并与录制中的操作序列比较"""
+        rounds = getattr(task, 'loop_count', None)
+        latencies = sorted(step['latency'] for step in self.steps if step['latency'] is not None)
+        # 录制时click_box单独记录，回放时统一为点击坐标；宏整体记录一条，回放时逐个发出按键
+        recorded = []
+        for event in self.session.actions:
+            if event['type'] == 'macro':
+                recorded += [INTERACTION_ACTIONS[action] for _, action, _ in event['events']]
+            else:
+                recorded.append('click' if event['type'] == 'click_box' else event['type'])
+        replayed = [step['action'] for step in self.steps]
+        return {
+            'task': type(task).__name__,
+            'session': self.session.folder,
+            'finished': finished,
+            'error': error,
+            'total_time': round(total_time, 4),
+            'compute_time': round(sum(step['compute_ms'] for step in self.steps) / 1000, 4),
+            'rounds': rounds,
+            'round_time': round(total_time / rounds, 4) if rounds else None,
+            'max_latency': latencies[-1] if latencies else None,
+            'median_latency': latencies[len(latencies) // 2] if latencies else None,
+            'matches_recording': recorded == replayed if recorded else None,
+            'recorded_actions': len(recorded),
+            'info': dict(task.info),
+            'steps': self.steps,
+        }
+
+
+class BaseTask:
+    """ok.BaseTask 在回放中用到的子集，检测在回放执行器提供的帧上进行"""
+
+    def __init__(self, executor=None):
+        self.executor = executor
+        self.name = type(self).__name__
+        self.description = ''
+        self.default_config = {}
+        self.config_description = {}
+        self.config_type = {}
+        self.config = {}
+        self.info = {}
+        self.start_time = 0
+        self.enabled = True
+        self.logger = Logger.get_logger(type(self).__module__)
+
+    # 日志和信息
+    def log_info(self, message, notify=False):
+        self.logger.info(message)
+
+    def log_debug(self, message, notify=False):
+        self.logger.debug(message)
+
+    def info_set(self, key, value):
+        self.info[key] = value
+
+    def get_global_config(self, option):
+        return self.executor.global_configs.setdefault(option.name, dict(option.default_config))
+
+    # 画面和时间
+    @property
+    def frame(self):
+        return self.executor.frame()
+
+    def next_frame(self):
+        return self.executor.next_frame()
+
+    def sleep(self, timeout):
+        self.executor.sleep(timeout)
+        return True
+
+    def wait_until(self, condition, time_out=0, pre_action=None, post_action=None, settle_time=-1,
+                   raise_if_not_found=False):
+        start = self.executor.now()
+        while True:
+            if pre_action is not None:
+                pre_action()
+            result = condition()
+            if result:
+                if settle_time > 0:
+                    self.sleep(settle_time)
+                    result = condition() or result
+                return result
+            if post_action is not None:
+                post_action()
+            if self.executor.now() - start >= (time_out or 10):
+                if raise_if_not_found:
+                    raise WaitFailedException()
+                return None
+            self.sleep(self.executor.wait_interval)
+
+    # 区域
+    def get_box_by_name(self, name):
+        if isinstance(name, Box):
+            return name
+        resolution = self.frame.shape[1::-1]
+        box = self.executor.templates.box(name, resolution)
+        if box is not None:
+            return Box(*box, name=name)
+        vertical, _, horizontal = name.partition('_')
+        if not horizontal:
+            vertical, horizontal = ('', vertical) if vertical in ('left', 'right') else (vertical, '')
+        y, to_y = {'top': (0, 0.5), 'bottom': (0.5, 1)}.get(vertical, (0, 1))
+        x, to_x = {'left': (0, 0.5), 'right': (0.5, 1)}.get(horizontal, (0, 1))
+        return self._region(self.frame, x, y, to_x, to_y, name=name)
+
+    def _region(self, frame, x=0, y=0, to_x=1, to_y=1, width=0, height=0, box=None, name=None):
+        if box is not None:
+            return self.get_box_by_name(box) if isinstance(box, str) else box
+        frame_height, frame_width = frame.shape[:2]
+        if width:
+            to_x = x + width
+        if height:
+            to_y = y + height
+        return Box(x * frame_width, y * frame_height, to_x=to_x * frame_width, to_y=to_y * frame_height, name=name)
+
+    # 检测
+    def ocr(self, x=0, y=0, to_x=1, to_y=1, match=None, width=0, height=0, box=None, name=None, threshold=0,
+            frame=None, target_height=0, use_grayscale=False, log=False, frame_processor=None, lib='default'):
+        if frame is None:
+            frame = self.frame
+        region = self._region(frame, x, y, to_x, to_y, width, height, box, name)
+        image = frame[max(0, region.y):region.y + region.height, max(0, region.x):region.x + region.width]
+        if frame_processor is not None:
+            image = frame_processor(image)
+        if use_grayscale and image.ndim == 3:
+            image = cv2.cvtColor(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
+        boxes = [Box(region.x + bx, region.y + by, bw, bh, confidence=score, name=text)
+                 for text, (bx, by, bw, bh), score in self.executor.ocr_engine(image)
+                 if score >= threshold and match_text(text, match)]
+        if log:
+            self.log_debug(f'ocr {match} {boxes}')
+        return sorted(boxes, key=lambda b: (b.y, b.x))
+
+    def wait_ocr(self, x=0, y=0, to_x=1, to_y=1, width=0, height=0, name=None, box=None, match=None, threshold=0,
+                 frame=None, target_height=0, time_out=0, post_action=None, raise_if_not_found=False, log=False,
+                 settle_time=-1, lib='default'):
+        return self.wait_until(
+            lambda: self.ocr(x, y, to_x, to_y, match=match, width=width, height=height, box=box, name=name,
+                             threshold=threshold, frame=frame, log=log, lib=lib),
+            time_out=time_out, post_action=post_action, settle_time=settle_time,
+            raise_if_not_found=raise_if_not_found)
+
+    def wait_click_ocr(self, x=0, y=0, to_x=1, to_y=1, width=0, height=0, box=None, name=None, match=None,
+                       threshold=0, frame=None, target_height=0, time_out=0, raise_if_not_found=False,
+                       recheck_time=0, after_sleep=0, post_action=None, log=False, settle_time=-1, lib='default'):
+        result = self.wait_ocr(x, y, to_x, to_y, width, height, name, box, match, threshold, frame, time_out=time_out,
+                               post_action=post_action, raise_if_not_found=raise_if_not_found, log=log,
+                               settle_time=settle_time, lib=lib)
+        if result:
+            self.click_box(result, after_sleep=after_sleep)
+        return result
+
+    def get_feature_by_name(self, name):
+        source = self.executor.templates.sources.get(name)
+        return SimpleNamespace(name=name, mat=source) if source is not None else None
+
+    def find_feature(self, feature_name=None, horizontal_variance=0, vertical_variance=0, threshold=0,
+                     use_gray_scale=False, x=-1, y=-1, to_x=-1, to_y=-1, width=-1, height=-1, box=None,
+                     canny_lower=0, canny_higher=0, frame_processor=None, template=None,
+                     match_method=cv2.TM_CCOEFF_NORMED, screenshot=False, mask_function=None, frame=None):
+        if frame is None:
+            frame = self.frame
+        frame_height, frame_width = frame.shape[:2]
+        resolution = (frame_width, frame_height)
+        if template is None:
+            template = self.executor.templates.get(feature_name, resolution, 'gray' if use_gray_scale else 'bgr')
+            if template is None:
+                return []
+        if x != -1 or y != -1:
+            box = self._region(frame, max(0, x), max(0, y), to_x if to_x != -1 else 1, to_y if to_y != -1 else 1,
+                               max(0, width), max(0, height))
+        elif box is None:
+            annotated = self.executor.templates.box(feature_name, resolution)
+            if annotated is not None:
+                bx, by, bw, bh = annotated
+                dx = int(frame_width * max(horizontal_variance, self.executor.feature_set.default_horizontal_variance))
+                dy = int(frame_height * max(vertical_variance, self.executor.feature_set.default_vertical_variance))
+                box = Box(bx - dx, by - dy, to_x=bx + bw + dx, to_y=by + bh + dy)
+        elif isinstance(box, str):
+            box = self.get_box_by_name(box)
+        image = frame if frame_processor is None else frame_processor(frame)
+        if use_gray_scale and image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        offset_x = offset_y = 0
+        if box is not None:
+            offset_x, offset_y = max(0, box.x), max(0, box.y)
+            image = image[offset_y:box.y + box.height, offset_x:box.x + box.width]
+        if image.shape[0] < template.shape[0] or image.shape[1] < template.shape[1]:
+            return []
+        _, confidence, _, (mx, my) = cv2.minMaxLoc(cv2.matchTemplate(image, template, match_method))
+        if confidence < (threshold or self.executor.feature_set.default_threshold):
+            return []
+        return [Box(offset_x + mx, offset_y + my, template.shape[1], template.shape[0], confidence=confidence,
+                    name=feature_name)]
+
+    def find_one(self, feature_name=None, horizontal_variance=0, vertical_variance=0, threshold=0,
+                 use_gray_scale=False, box=None, canny_lower=0, canny_higher=0, frame_processor=None,
+                 template=None, mask_function=None, frame=None, match_method=cv2.TM_CCOEFF_NORMED, screenshot=False):
+        boxes = self.find_feature(feature_name, horizontal_variance, vertical_variance, threshold, use_gray_scale,
+                                  box=box, frame_processor=frame_processor, template=template,
+                                  match_method=match_method, frame=frame)
+        return boxes[0] if boxes else None
+
+    def wait_click_feature(self, feature, horizontal_variance=0, vertical_variance=0, threshold=0, relative_x=0.5,
+                           relative_y=0.5, time_out=0, pre_action=None, post_action=None, box=None,
+                           raise_if_not_found=True, use_gray_scale=False, canny_lower=0, canny_higher=0,
+                           click_after_delay=0, settle_time=-1, after_sleep=0):
+        result = self.wait_until(
+            lambda: self.find_one(feature, horizontal_variance, vertical_variance, threshold, use_gray_scale, box),
+            time_out=time_out, pre_action=pre_action, post_action=post_action, settle_time=settle_time,
+            raise_if_not_found=raise_if_not_found)
+        if result:
+            self.click_box(result, relative_x, relative_y, after_sleep=after_sleep)
+            return True
+        return False
+
+    # 交互
+    def click(self, x=-1, y=-1, move_back=False, name=None, interval=-1, move=True, down_time=0.01, after_sleep=0,
+              key='left'):
+        if isinstance(x, (Box, list)):
+            return self.click_box(x, move_back=move_back, down_time=down_time, after_sleep=after_sleep)
+        frame_height, frame_width = self.frame.shape[:2]
+        if isinstance(x, float) and x <= 1:
+            x = x * frame_width
+        if isinstance(y, float) and y <= 1:
+            y = y * frame_height
+        self.executor.interaction.click(x, y, key=key, down_time=down_time)
+        if after_sleep:
+            self.sleep(after_sleep)
+        return True
+
+    def click_box(self, box=None, relative_x=0.5, relative_y=0.5, raise_if_not_found=False, move_back=False,
+                  down_time=0.01, after_sleep=1):
+        if isinstance(box, list):
+            box = box[0] if box else None
+        if isinstance(box, str):
+            box = self.get_box_by_name(box)
+        if box is None:
+            if raise_if_not_found:
+                raise WaitFailedException('click_box: box not found')
+            return False
+        return self.click(int(box.x + box.width * relative_x), int(box.y + box.height * relative_y),
+                          down_time=down_time, after_sleep=after_sleep)
+
+    def send_key(self, key, down_time=0.02, interval=-1, after_sleep=0):
+        self.executor.interaction.send_key(key, down_time)
+        if after_sleep:
+            self.sleep(after_sleep)
+        return True
+
+    def send_key_down(self, key):
+        self.executor.interaction.send_key_down(key)
+
+    def send_key_up(self, key):
+        self.executor.interaction.send_key_up(key)
+
+    def mouse_down(self, x=-1, y=-1, name=None, key='left'):
+        self.executor.interaction.mouse_down(x, y, key=key)
+
+    def mouse_up(self, name=None, key='left'):
+        self.executor.interaction.mouse_up(key=key)
+
+    def run(self):
+        pass
+
+
+class TriggerTask(BaseTask):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.trigger_interval = 0
+
+    def trigger(self):
+        return False
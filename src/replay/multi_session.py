@@ -0,0 +1,172 @@
+"""多个客户端共用一个OCR引擎的多会话执行
+
+每个会话有自己的截图源、交互记录和执行器，任务在各自的线程中运行；
+OCR请求都提交到同一个SharedOcrEngine，模型只加载一份，同时到达的请求合并为一次推理。
+截图源可以是图片文件（FileFrameSource），方便在Linux上测试。
+"""
+import os
+import threading
+import time
+
+from src.replay.headless import HeadlessExecutor, ReplayFinished
+from src.utils.derived_frame import DerivedFrameCache
+from src.utils.images import read_image
+from src.utils.ocr_pool import OcrPool
+from src.utils.shared_ocr import SharedOcrEngine
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class FileFrameSource:
+    """从图片文件读取画面的截图源，按fps循环播放"""
+
+    def __init__(self, path, fps=2.0):
+        """加载图片
+
+        Args:
+            path: 图片文件、图片目录或图片文件列表
+            fps: 每秒切换的帧数，0表示一直显示第一帧
+        """
+        if isinstance(path, (list, tuple)):
+            files = list(path)
+        elif os.path.isdir(path):
+            files = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                     if name.lower().endswith(IMAGE_EXTENSIONS)]
+        else:
+            files = [path]
+        self.files = files
+        self.frames = [read_image(file) for file in files]
+        if not self.frames or any(frame is None for frame in self.frames):
+            raise ValueError(f'no readable frames in {path}')
+        self.fps = fps
+
+    def frame(self, now):
+        """now时刻显示的帧"""
+        if self.fps <= 0:
+            return self.frames[0]
+        return self.frames[int(now * self.fps) % len(self.frames)]
+
+
+class SessionExecutor(HeadlessExecutor):
+    """多会话中的一个执行器
+
+    画面来自自己的截图源，交互记录在自己的steps中，OCR使用共享引擎。
+    sleep真实等待，各会话按实际时间并发运行；超过duration后结束任务。
+    """
+
+    def __init__(self, app_config, source, engine, name='session', duration=0.0, wait_interval=0.1,
+                 frame_interval=1 / 30, ocr_workers=2):
+        """初始化会话执行器
+
+        Args:
+            app_config: src.config中的config
+            source: 截图源，有frame(now)方法
+            engine: SharedOcrEngine
+            name: 会话名
+            duration: 运行时长(秒)，0表示直到任务结束
+            wait_interval: wait_*方法的检测间隔(秒)
+            frame_interval: next_frame等待的截图间隔(秒)
+            ocr_workers: 本会话流水线OCR的线程数，请求仍提交到共享引擎
+        """
+        super().__init__(app_config, engine.attach(), wait_interval, frame_interval=frame_interval)
+        self.name = name
+        self.source = source
+        self.duration = duration
+        self.derived_frames = DerivedFrameCache()
+        self.ocr_pool = OcrPool(workers=ocr_workers, max_pending=ocr_workers * 2) if ocr_workers > 0 else None
+
+    def now(self):
+        """会话开始后经过的时间(秒)，超过duration时结束任务"""
+        now = time.perf_counter() - self._wall_start
+        if 0 < self.duration < now:
+            raise ReplayFinished()
+        return now
+
+    def sleep(self, timeout):
+        self.now()
+        time.sleep(max(0.0, timeout))
+
+    def frame(self):
+        return self.source.frame(self.now())
+
+    def run(self, task_class, task_config=None):
+        """在当前线程运行任务直到任务结束或超过duration
+
+        Returns:
+            dict: 会话报告
+        """
+        task = self.create_task(task_class, task_config)
+        self.steps = []
+        self._wall_start = self._last_step = time.perf_counter()
+        finished = 'task_returned'
+        error = None
+        try:
+            task.run()
+        except ReplayFinished:
+            finished = 'duration_reached'
+        except Exception as e:
+            finished = 'error'
+            error = f'{type(e).__name__}: {e}'
+        finally:
+            if self.ocr_pool is not None:
+                self.ocr_pool.shutdown(wait=False)
+        return {
+            'session': self.name,
+            'finished': finished,
+            'error': error,
+            'time': round(time.perf_counter() - self._wall_start, 3),
+            'rounds': getattr(task, 'loop_count', None),
+            'steps': len(self.steps),
+            'info': dict(task.info),
+        }
+
+
+class MultiSessionRunner:
+    """在多个会话中同时运行同一个任务，共用一个OCR引擎"""
+
+    def __init__(self, app_config, sources, engine=None, duration=0.0, max_batch=16, max_wait=0.005, **kwargs):
+        """初始化多会话
+
+        Args:
+            app_config: src.config中的config
+            sources: 每个会话的截图源列表
+            engine: SharedOcrEngine，默认按config['ocr']['params']创建
+            duration: 每个会话的运行时长(秒)，0表示直到任务结束
+            max_batch: 每批最多合并的OCR请求数
+            max_wait: 收集同一批请求最多等待的秒数
+            **kwargs: 传给SessionExecutor的其他参数
+        """
+        self.engine = engine or SharedOcrEngine(params=app_config.get('ocr', {}).get('params', {}),
+                                                max_batch=max_batch, max_wait=max_wait)
+        self.executors = [SessionExecutor(app_config, source, self.engine, name=f'session{index}',
+                                          duration=duration, **kwargs)
+                          for index, source in enumerate(sources)]
+
+    def run(self, task_class, task_config=None):
+        """每个会话一个线程运行任务，全部结束后汇总
+
+        Returns:
+            dict: 各会话报告、OCR引擎批处理统计和总吞吐量
+        """
+        reports = [None] * len(self.executors)
+
+        def run_session(index, executor):
+            reports[index] = executor.run(task_class, task_config)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=run_session, args=(index, executor), name=executor.name, daemon=True)
+                   for index, executor in enumerate(self.executors)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        engine = self.engine.stats()
+        requests = engine['ocr']['requests'] + engine['rec']['requests']
+        return {
+            'sessions': reports,
+            'elapsed': round(elapsed, 3),
+            'ocr_requests': requests,
+            'ocr_per_second': round(requests / elapsed, 2) if elapsed > 0 else None,
+            'engine': engine,
+        }
@@ -0,0 +1,96 @@
+import json
+import os
+import queue
+import threading
+import time
+
+from src.replay.session import EVENTS_FILE, FRAMES_FOLDER, SESSION_FILE, SESSION_VERSION, write_frame
+from src.utils.frame_change import FrameChangeGate
+
+
+class SessionRecorder:
+    """任务会话录制器
+
+    记录任务检测时使用的帧（只保存与上一帧不同的帧）和发出的交互操作，
+    帧图片由后台线程写入，不阻塞任务线程。录制结果可用 replay.py 在无游戏环境下回放。
+    """
+
+    def __init__(self, folder, task_name, change_threshold=1.0):
+        """开始录制
+
+        Args:
+            folder: 会话目录
+            task_name: 任务类名
+            change_threshold: 判定为新帧的平均灰度差
+        """
+        self.folder = folder
+        self.task_name = task_name
+        self.start = time.time()
+        self.frame_count = 0
+        self._gate = FrameChangeGate(change_threshold=change_threshold, max_interval=0, percentile=None)
+        self._last_frame = None
+        self._lock = threading.Lock()
+        self._frame_lock = threading.Lock()  # ocr可能在OcrPool的工作线程中调用
+        self._queue = queue.Queue()
+        os.makedirs(os.path.join(folder, FRAMES_FOLDER), exist_ok=True)
+        self._events = open(os.path.join(folder, EVENTS_FILE), 'a', encoding='utf-8')
+        self._info = {'version': SESSION_VERSION, 'task': task_name, 'started': self.start, 'resolution': None}
+        self._write_info()
+        self._writer = threading.Thread(target=self._write_frames, name='SessionRecorder', daemon=True)
+        self._writer.start()
+
+    def _write_info(self):
+        with open(os.path.join(self.folder, SESSION_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self._info, f, ensure_ascii=False, indent=2)
+
+    def _write_frames(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            path, frame = item
+            write_frame(path, frame)
+
+    def _event(self, event_type, **fields):
+        event = {'t': round(time.time() - self.start, 4), 'type': event_type}
+        event.update(fields)
+        with self._lock:
+            self._events.write(json.dumps(event, ensure_ascii=False) + '\n')
+        return event
+
+    def record_frame(self, frame):
+        """记录一帧，与上一帧相同时忽略
+
+        Args:
+            frame: 图像帧
+        """
+        if frame is None or frame is self._last_frame:
+            return
+        with self._frame_lock:
+            first = self._last_frame is None
+            self._last_frame = frame
+            if self._gate.diff(frame) <= self._gate.change_threshold and not first:
+                return
+            if first:
+                self._info['resolution'] = [frame.shape[1], frame.shape[0]]
+                self._write_info()
+            file_name = os.path.join(FRAMES_FOLDER, f'{self.frame_count:06d}.png')
+            self._event('frame', index=self.frame_count, file=file_name.replace(os.sep, '/'))
+            self._queue.put((os.path.join(self.folder, file_name), frame.copy()))
+            self.frame_count += 1
+
+    def record_action(self, action, **fields):
+        """记录一次交互操作
+
+        Args:
+            action: 操作名，如 click_box、send_key
+            **fields: 操作参数，需可JSON序列化
+        """
+        self._event(action, **fields)
+
+    def close(self):
+        """停止录制，等待帧图片写完"""
+        self._queue.put(None)
+        self._writer.join()
+        with self._lock:
+            self._events.close()
@@ -0,0 +1,72 @@
+import bisect
+import json
+import os
+
+import cv2
+
+from src.utils.images import read_image
+
+SESSION_VERSION = 1
+SESSION_FILE = 'session.json'
+EVENTS_FILE = 'events.jsonl'
+FRAMES_FOLDER = 'frames'
+
+
+class ReplaySession:
+    """录制的会话
+
+    目录结构:
+        session.json  会话信息（版本、任务、分辨率）
+        events.jsonl  按时间排序的事件，每行一个JSON，t为相对会话开始的秒数
+        frames/       事件中引用的帧图片
+    """
+
+    def __init__(self, folder):
+        """加载录制的会话
+
+        Args:
+            folder: 会话目录
+        """
+        self.folder = folder
+        with open(os.path.join(folder, SESSION_FILE), 'r', encoding='utf-8') as f:
+            self.info = json.load(f)
+        if self.info.get('version') != SESSION_VERSION:
+            raise ValueError(f'unsupported session version: {self.info.get("version")}')
+        self.events = []
+        with open(os.path.join(folder, EVENTS_FILE), 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    self.events.append(json.loads(line))
+        self.events.sort(key=lambda event: event['t'])
+        self.frame_events = [event for event in self.events if event['type'] == 'frame']
+        self.actions = [event for event in self.events if event['type'] != 'frame']
+        self._frame_times = [event['t'] for event in self.frame_events]
+        self._frames = {}
+
+    @property
+    def duration(self):
+        """会话时长(秒)"""
+        return self.events[-1]['t'] if self.events else 0.0
+
+    def frame_index_at(self, t):
+        """获取t时刻屏幕上显示的帧序号，t早于第一帧时返回0"""
+        return max(0, bisect.bisect_right(self._frame_times, t) - 1)
+
+    def frame_time(self, index):
+        """获取帧出现的时刻"""
+        return self._frame_times[index]
+
+    def frame(self, index):
+        """读取帧图片，读取过的帧会缓存"""
+        frame = self._frames.get(index)
+        if frame is None:
+            frame = read_image(os.path.join(self.folder, self.frame_events[index]['file']))
+            self._frames[index] = frame
+        return frame
+
+
+def write_frame(path, frame):
+    """保存帧图片，支持中文路径"""
+    ok, data = cv2.imencode(os.path.splitext(path)[1] or '.png', frame, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    if ok:
+        data.tofile(path)
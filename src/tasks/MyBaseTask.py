@@ -1,38 +1,915 @@
-import re
-import win32gui
-import win32con
+import os
+import time
+from collections import deque
+from concurrent.futures import Future
 
-from ok import BaseTask
+import cv2
+
+from ok import BaseTask, Box, WaitFailedException, og
+
+from src.config import config, replay_record_option, resource_option, trace_option
+from src.utils.frame_cache import FrameResultCache
+from src.utils.derived_frame import DerivedFrameCache
+from src.utils.ocr_roi import OcrRoiRegistry
+from src.utils.resource_registry import ResourceRegistry
+from src.utils.tracing import Tracer
+
+# 没有全局对象og.my_app时（如离线回放）使用的资源表
+_local_resources = ResourceRegistry()
 
 
 class MyBaseTask(BaseTask):
     """基础任务类，提供通用功能和辅助方法"""
 
+    # ocr方法位置参数的顺序
+    OCR_ARG_NAMES = ('x', 'y', 'to_x', 'to_y', 'match', 'width', 'height', 'box', 'name', 'threshold',
+                     'frame', 'target_height', 'use_grayscale', 'log', 'frame_processor', 'lib')
+    # find_feature方法位置参数的顺序
+    FIND_FEATURE_ARG_NAMES = ('feature_name', 'horizontal_variance', 'vertical_variance', 'threshold',
+                              'use_gray_scale', 'x', 'y', 'to_x', 'to_y', 'width', 'height', 'box', 'canny_lower',
+                              'canny_higher', 'frame_processor', 'template', 'match_method', 'screenshot',
+                              'mask_function', 'frame')
+    # wait_ocr和wait_click_ocr方法位置参数的顺序
+    WAIT_OCR_ARG_NAMES = ('x', 'y', 'to_x', 'to_y', 'width', 'height', 'name', 'box', 'match', 'threshold', 'frame',
+                          'target_height', 'time_out', 'post_action', 'raise_if_not_found', 'log', 'settle_time',
+                          'lib')
+    WAIT_CLICK_OCR_ARG_NAMES = ('x', 'y', 'to_x', 'to_y', 'width', 'height', 'box', 'name', 'match', 'threshold',
+                                'frame', 'target_height', 'time_out', 'raise_if_not_found', 'recheck_time',
+                                'after_sleep', 'post_action', 'log', 'settle_time', 'lib')
+    # 限定ocr范围的参数及其默认值，均为默认值时表示全屏识别
+    OCR_REGION_DEFAULTS = {'x': 0, 'y': 0, 'to_x': 1, 'to_y': 1, 'width': 0, 'height': 0, 'box': None, 'name': None}
+    # 传入这些参数时结果无法由画面哈希决定，不使用缓存
+    UNCACHEABLE_ARGS = ('frame_processor', 'template', 'mask_function')
+    # 不影响检测结果的参数，不计入缓存键
+    CACHE_IGNORED_ARGS = ('frame', 'log', 'screenshot')
+
+    # 检测结果缓存大小，0表示关闭
+    DETECTION_CACHE_SIZE = 256
+
+    # 金字塔匹配配置，水平和垂直偏移都不小于PYRAMID_MIN_VARIANCE视为全屏查找
+    PYRAMID_MATCH = True
+    PYRAMID_MIN_VARIANCE = 1
+    PYRAMID_TOP_K = 5  # 精匹配的候选数量
+    DEFAULT_FEATURE_THRESHOLD = 0.8  # 特征集未提供默认阈值时使用
+
+    # OCR线程池配置，wait_ocr/wait_click_ocr在推理上一帧时截取下一帧，0表示不使用线程池
+    OCR_POOL_WORKERS = max(1, min(2, (os.cpu_count() or 2) - 1))
+    OCR_PIPELINE_DEPTH = 2  # 同时在识别的帧数
+
+    # 界面分类参考截图目录，按 <界面名>/*.png 存放
+    SCREEN_FOLDER = os.path.join('assets', 'screens')
+
+    # OCR区域学习配置
+    OCR_ROI_FILE = os.path.join('cache', 'ocr_roi.json')  # 运行时学习的数据，不随资源同步
+    OCR_ROI_MARGIN = 0.05  # 学习区域四周扩展的边距（屏幕比例）
+    OCR_ROI_MAX_SPAN = 0.3  # 一次命中的外接框超过该屏幕比例时不学习，避免分散的命中把区域撑大
+    OCR_ROI_FORGET_MISSES = 3  # 学习区域和全屏都连续未命中的次数达到该值时忘记该区域
+    OCR_ROI_MATCHES = ()  # 需要学习区域的全屏match文本，由子类指定
+    FIXED_OCR_PADDING = (0.5, 0.25)  # 固定按钮识别区域按文字高度向左右、上下扩展的比例
+    FIXED_OCR_THRESHOLD = 0.6  # 固定按钮识别的最低置信度
+
+    # 耗时追踪缓冲的span数量，只在开启Export Trace时记录
+    TRACE_CAPACITY = 20000
+
     def __init__(self, *args, **kwargs):
         """初始化基础任务"""
         super().__init__(*args, **kwargs)
+        self.ocr_roi = self.track_shared(f'ocr_roi:{self.OCR_ROI_FILE}', OcrRoiRegistry.shared(
+            self.OCR_ROI_FILE, self.OCR_ROI_MARGIN, self.OCR_ROI_MAX_SPAN))
+        self._ocr_roi_keys = {OcrRoiRegistry.key_of(match) for match in self.OCR_ROI_MATCHES}
+        self._roi_misses = {}
+        self.detection_cache = FrameResultCache(self.DETECTION_CACHE_SIZE)
+        # 多会话时每个执行器有自己的截图，派生图像缓存也按执行器分开
+        self.derived_frames = getattr(self.executor, 'derived_frames', None) or self.track_shared(
+            'derived_frames', DerivedFrameCache.shared())
+        self.recorder = None
+        self._recorder_start = None
+        self._recording_action = False
+        self._hot_log = None
+
+    def now(self):
+        """任务时钟(秒)，等待超时、画面变化判定和轮次统计都使用它
+
+        执行器提供now()时（回放、多会话）使用执行器的时钟，回放跳过的等待也计入；否则为time.time()。
+        """
+        clock = getattr(self.executor, 'now', None)
+        return clock() if clock is not None else time.time()
+
+    @property
+    def tracer(self):
+        """进程内共享的追踪器，只在开启Span Tracing的Export Trace时记录"""
+        enabled = bool(self.get_global_config(trace_option).get('Export Trace'))
+        tracer = self.track_shared('tracer', Tracer.shared(self.TRACE_CAPACITY, enabled))
+        tracer.enabled = enabled
+        return tracer
+
+    def ocr(self, *args, **kwargs):
+        """OCR识别
+
+        对OCR_ROI_MATCHES中的文本做全屏识别时，先在学习到的区域内识别，
+        未命中再回退到全屏；全屏命中后记录区域供之后使用。
+        查找区域画面未变化时直接返回缓存的结果。
+        """
+        params = dict(zip(self.OCR_ARG_NAMES, args))
+        params.update(kwargs)
+        with self.tracer.span('ocr', 'detect', match=params.get('match'), box=params.get('box')) as span:
+            result = self._ocr_with_roi(params)
+            span.tag('hit', bool(result))
+        return result
+
+    def _ocr_with_roi(self, params):
+        key = self._ocr_roi_key(params)
+        if key is None:
+            return self._cached_detect('ocr', super().ocr, params)
+
+        if params.get('frame') is None:
+            params['frame'] = self.frame
+        height, width = params['frame'].shape[:2]
+
+        region = self.ocr_roi.get(key)
+        if region is not None:
+            x, y, to_x, to_y = region
+            roi_box = Box(int(x * width), int(y * height), to_x=int(to_x * width), to_y=int(to_y * height),
+                          name=f'roi_{key}')
+            result = self._cached_detect('ocr', super().ocr, dict(params, box=roi_box))
+            if result:
+                self._roi_misses.pop(key, None)
+                return result
+
+        result = self._cached_detect('ocr', super().ocr, params)
+        if result:
+            self._roi_learned(key, result, width, height)
+        elif region is not None:
+            self._roi_missed(key)
+        return result
+
+    def ocr_fixed(self, match, box=None, threshold=0, frame=None, lib='default', key=None):
+        """识别固定位置的按钮文字，跳过文本检测
+
+        第一次在box范围内（默认全屏）完整检测识别并记住文字位置，
+        之后只裁剪该位置直接识别，归一化后与match比较，比检测+识别快数倍。
+        记住的位置未命中时回退到ocr并按命中位置重新学习，
+        连续OCR_ROI_FORGET_MISSES次都未命中时忘记该位置。
+        OCR库不支持单独识别或match不是字符串时使用普通ocr。
+
+        Args:
+            match: 期望的文本或文本列表
+            box: 首次查找的范围
+            threshold: 最低置信度，0表示使用FIXED_OCR_THRESHOLD
+            frame: 要识别的帧，默认为当前帧
+            lib: OCR库名
+            key: 记住位置的键，同一文本在不同界面位置不同时按界面区分（如"奖励/确认选择"），默认为match
+
+        Returns:
+            list: 命中时返回文字位置的Box列表，否则返回空列表
+        """
+        from src.utils.rec_ocr import supports_recognition
+        if frame is None:
+            frame = self.frame
+        height, width = frame.shape[:2]
+        if key is None:
+            key = OcrRoiRegistry.key_of(match)
+        region = self.ocr_roi.regions.get(key) if key is not None else None
+        if region is None or not supports_recognition(self.executor.ocr_lib(lib)):
+            result = self.ocr(match=match, box=box, frame=frame, lib=lib)
+            if result and key is not None:
+                self._roi_learned(key, result, width, height)
+            return result
+        x, y, to_x, to_y = region
+        text_height = (to_y - y) * height
+        pad_x, pad_y = text_height * self.FIXED_OCR_PADDING[0], text_height * self.FIXED_OCR_PADDING[1]
+        text_box = Box(max(0, int(x * width - pad_x)), max(0, int(y * height - pad_y)),
+                       to_x=min(width, int(to_x * width + pad_x)), to_y=min(height, int(to_y * height + pad_y)),
+                       name=f'fixed_{key}')
+        with self.tracer.span('ocr_fixed', 'detect', match=match, box=text_box) as span:
+            params = {'match': match, 'box': text_box, 'threshold': threshold or self.FIXED_OCR_THRESHOLD,
+                      'frame': frame, 'lib': lib}
+            result = self._cached_detect('ocr_fixed', self._recognize_fixed, params)
+            span.tag('hit', bool(result))
+        if result:
+            self._roi_misses.pop(key, None)
+            return result
+        # 记住的位置未命中时用ocr查找，命中则重新学习位置；键与ocr学习的相同时ocr已经处理过
+        ocr_params = {'match': match, 'box': box, 'frame': frame, 'lib': lib}
+        result = self.ocr(**ocr_params)
+        if self._ocr_roi_key(ocr_params) == key:
+            return result
+        if result:
+            self._roi_learned(key, result, width, height)
+        else:
+            self._roi_missed(key)
+        return result
+
+    def _roi_learned(self, key, result, width, height):
+        """按命中位置学习区域，清除连续未命中计数"""
+        self._roi_misses.pop(key, None)
+        self.ocr_roi.record(key, result, width, height)
+
+    def _roi_missed(self, key):
+        """学习区域和全屏都未命中，连续OCR_ROI_FORGET_MISSES次后忘记该区域"""
+        misses = self._roi_misses.get(key, 0) + 1
+        if misses >= self.OCR_ROI_FORGET_MISSES:
+            self.ocr_roi.forget(key)
+            self._roi_misses.pop(key, None)
+        else:
+            self._roi_misses[key] = misses
+
+    def _recognize_fixed(self, match, box, threshold, frame, lib):
+        from src.utils.rec_ocr import recognize, text_matches
+        crop = frame[box.y:box.y + box.height, box.x:box.x + box.width]
+        text, score = recognize(self.executor.ocr_lib(lib), [crop])[0]
+        if score < threshold or not text_matches(text, match):
+            return []
+        return [Box(box.x, box.y, box.width, box.height, confidence=score, name=text)]
+
+    def wait_click_fixed(self, match, box=None, time_out=0, after_sleep=0, raise_if_not_found=False, key=None):
+        """等待固定位置的按钮文字出现并点击，使用ocr_fixed识别
+
+        Args:
+            key: 记住位置的键，见ocr_fixed
+
+        Returns:
+            list: 命中的Box列表，超时返回None
+        """
+        with self.tracer.span('wait_click_fixed', 'wait', match=match, time_out=time_out) as span:
+            result = self.wait_until(lambda: self.ocr_fixed(match, box, key=key), time_out=time_out,
+                                     raise_if_not_found=raise_if_not_found)
+            if result:
+                self.click_box(result, after_sleep=after_sleep)
+            span.tag('hit', bool(result))
+        return result
+
+    def find_feature(self, *args, **kwargs):
+        """查找特征，查找区域画面未变化时直接返回缓存的结果"""
+        params = dict(zip(self.FIND_FEATURE_ARG_NAMES, args))
+        params.update(kwargs)
+        with self.tracer.span('find_feature', 'detect', feature=params.get('feature_name'),
+                              box=params.get('box')) as span:
+            result = self._cached_detect('find_feature', self._find_feature_uncached, params)
+            span.tag('hit', bool(result))
+        return result
+
+    def wait_ocr(self, *args, **kwargs):
+        """等待OCR识别到文本
+
+        使用OCR线程池且调用方显式传入settle_time=0时流水线执行：识别一帧的同时截取下一帧并提交，
+        最多OCR_PIPELINE_DEPTH帧同时识别，按截取顺序取结果。
+        settle_time为默认值时按框架的wait_until_settle_time等待画面稳定，不使用流水线。
+        """
+        params = dict(zip(self.WAIT_OCR_ARG_NAMES, args))
+        params.update(kwargs)
+        with self.tracer.span('wait_ocr', 'wait', match=params.get('match'), box=params.get('box'),
+                              time_out=params.get('time_out')) as span:
+            if self._can_pipeline(params):
+                result = self._pipelined_wait_ocr(params)
+            else:
+                result = super().wait_ocr(**params)
+            span.tag('hit', bool(result))
+        return result
+
+    def wait_click_ocr(self, *args, **kwargs):
+        """等待OCR识别到文本并点击"""
+        params = dict(zip(self.WAIT_CLICK_OCR_ARG_NAMES, args))
+        params.update(kwargs)
+        with self.tracer.span('wait_click_ocr', 'wait', match=params.get('match'), box=params.get('box'),
+                              time_out=params.get('time_out')) as span:
+            if self._can_pipeline(params) and not params.get('recheck_time'):
+                wait_params = {name: value for name, value in params.items() if name in self.WAIT_OCR_ARG_NAMES}
+                result = self.wait_ocr(**wait_params)
+                if result:
+                    self.click_box(result, after_sleep=params.get('after_sleep', 0))
+            else:
+                result = super().wait_click_ocr(**params)
+            span.tag('hit', bool(result))
+        return result
+
+    @property
+    def ocr_pool(self):
+        """共享的OCR线程池，OCR_POOL_WORKERS为0时返回None
+
+        OpenVINO编译模型的默认推理请求不能多线程同时使用，此时串行推理，只与截图并行。
+        执行器自带线程池时（多会话）使用执行器的。
+        """
+        from src.utils.ocr_pool import OcrPool
+        pool = getattr(self.executor, 'ocr_pool', None)
+        if pool is not None:
+            return pool
+        if self.OCR_POOL_WORKERS <= 0:
+            return None
+        serialize = bool(config['ocr'].get('params', {}).get('use_openvino'))
+        key = (self.OCR_POOL_WORKERS, self.OCR_PIPELINE_DEPTH * 2, serialize)
+        return self.track_shared(f'ocr_pool:{key}', OcrPool.shared(*key))
+
+    def ocr_async(self, *args, **kwargs):
+        """提交OCR到线程池，立即返回
+
+        未指定frame时在调用线程截取当前帧，保证识别的是提交时的画面。
+        线程池中只执行框架的OCR检测，录制、追踪等任务状态只在调用线程读写。
+
+        Returns:
+            concurrent.futures.Future: ocr的结果，不使用线程池时为已完成的Future
+        """
+        params = dict(zip(self.OCR_ARG_NAMES, args))
+        params.update(kwargs)
+        if params.get('frame') is None:
+            params['frame'] = self.frame
+        pool = self.ocr_pool
+        if pool is None:
+            future = Future()
+            future.set_result(self.ocr(**params))
+            return future
+        self._record_frame(params['frame'])
+        return pool.submit(super().ocr, **params)
+
+    def _can_pipeline(self, params):
+        """wait_ocr参数是否可以流水线执行
+
+        只有显式传入settle_time=0时才流水线执行；默认-1表示使用wait_until_settle_time，
+        与需要后置动作或指定帧时一样使用框架原有实现。
+        """
+        return (self.ocr_pool is not None and params.get('settle_time') == 0
+                and params.get('post_action') is None and params.get('frame') is None)
+
+    def _pipelined_wait_ocr(self, params):
+        ocr_params = {name: value for name, value in params.items() if name in self.OCR_ARG_NAMES}
+        time_out = params.get('time_out') or getattr(self.executor, 'wait_until_timeout', 10)
+        pending = deque()
+        start = self.now()
+        try:
+            while True:
+                while len(pending) < self.OCR_PIPELINE_DEPTH and self.now() - start < time_out:
+                    pending.append(self.ocr_async(**dict(ocr_params, frame=self.next_frame())))
+                if not pending:
+                    break
+                result = pending.popleft().result()
+                if result:
+                    return result
+        finally:
+            for future in pending:
+                future.cancel()
+        if params.get('raise_if_not_found'):
+            raise WaitFailedException(f'wait_ocr {params.get("match")} timeout after {time_out}s')
+        return None
+
+    def sleep(self, timeout):
+        """等待timeout秒"""
+        with self.tracer.span('sleep', 'sleep', timeout=timeout):
+            return super().sleep(timeout)
+
+    def _find_feature_uncached(self, **params):
+        """查找特征，全屏查找单个特征时使用金字塔匹配"""
+        if self._use_pyramid_match(params):
+            return self._pyramid_find_feature(params)
+        return super().find_feature(**params)
+
+    def _use_pyramid_match(self, params):
+        """判断是否为可以使用金字塔匹配的全屏查找"""
+        if not self.PYRAMID_MATCH or not isinstance(params.get('feature_name'), str):
+            return False
+        if min(params.get('horizontal_variance', 0), params.get('vertical_variance', 0)) < self.PYRAMID_MIN_VARIANCE:
+            return False
+        if any(params.get(name, -1) != -1 for name in ('x', 'y', 'to_x', 'to_y', 'width', 'height')):
+            return False
+        if params.get('canny_lower') or params.get('canny_higher'):
+            return False
+        if params.get('match_method', cv2.TM_CCOEFF_NORMED) != cv2.TM_CCOEFF_NORMED:
+            return False
+        return all(params.get(name) is None for name in ('box', 'frame_processor', 'template', 'mask_function'))
+
+    def _pyramid_find_feature(self, params):
+        """在缩小的画面上粗匹配，再在候选位置原分辨率精匹配
+
+        Returns:
+            list: Box列表，按置信度从高到低排序
+        """
+        from src.utils.pyramid_match import pyramid_match
+        feature_name = params['feature_name']
+        frame = params.get('frame')
+        if frame is None:
+            frame = self.frame
+        use_gray_scale = params.get('use_gray_scale')
+        template = self._feature_template(feature_name, frame, use_gray_scale)
+        if template is None:
+            return super().find_feature(**params)
+        derived = self.derived_frame(frame)
+        gray = bool(use_gray_scale)
+        threshold = params.get('threshold') or self._default_feature_threshold()
+        matches = pyramid_match(derived.image(gray), template, threshold, top_k=self.PYRAMID_TOP_K,
+                                scaled=lambda factor: derived.scaled(factor, gray))
+        return [Box(x, y, width, height, confidence=confidence, name=feature_name)
+                for x, y, width, height, confidence in matches]
+
+    def find_best_of(self, feature_names, box=None, threshold=0, use_gray_scale=False, frame=None):
+        """在同一画面中批量查找多个互斥的特征
+
+        所有特征共享缩小图、FFT和积分图等预处理，耗时随特征数量线性增长，
+        而不是每个特征都做一次全屏匹配。
+
+        Args:
+            feature_names: 特征名列表
+            box: 限定查找范围，默认为全屏
+            threshold: 匹配阈值，0表示使用默认阈值
+            use_gray_scale: 是否使用灰度图匹配
+            frame: 要查找的帧，默认为当前帧
+
+        Returns:
+            list: 所有特征的匹配结果Box，按置信度从高到低排序
+        """
+        params = {'feature_names': tuple(feature_names), 'box': box, 'threshold': threshold,
+                  'use_gray_scale': use_gray_scale, 'frame': frame}
+        return self._cached_detect('find_best_of', self._find_best_of_uncached, params)
+
+    def _find_best_of_uncached(self, feature_names, box, threshold, use_gray_scale, frame):
+        from src.utils.pyramid_match import BatchTemplateMatcher
+        if frame is None:
+            frame = self.frame
+        templates = {}
+        for name in feature_names:
+            template = self._feature_template(name, frame, use_gray_scale)
+            if template is not None:
+                templates[name] = template
+        derived = self.derived_frame(frame)
+        gray = bool(use_gray_scale)
+        if isinstance(box, str):
+            box = self.get_box_by_name(box)
+        offset_x = offset_y = 0
+        if box is None:
+            # 全屏匹配时缩小图的FFT和积分图在同一帧的多次调用间共用
+            matcher = derived.get(('batch_matcher', gray), lambda: BatchTemplateMatcher(
+                derived.image(gray), lambda factor: derived.scaled(factor, gray)))
+        else:
+            offset_x, offset_y = max(0, box.x), max(0, box.y)
+            matcher = BatchTemplateMatcher(derived.image(gray)[offset_y:box.y + box.height,
+                                                               offset_x:box.x + box.width])
+        matches = matcher.match(templates, threshold or self._default_feature_threshold())
+        return [Box(offset_x + x, offset_y + y, width, height, confidence=confidence, name=name)
+                for name, x, y, width, height, confidence in matches]
+
+    def _feature_template(self, feature_name, frame, use_gray_scale=False):
+        """获取当前分辨率下的特征模板，优先使用预计算的模板缓存
+
+        Returns:
+            np.ndarray: 模板，特征不存在返回None
+        """
+        height, width = frame.shape[:2]
+        template = self.template_cache.get(feature_name, (width, height), 'gray' if use_gray_scale else 'bgr')
+        if template is None:
+            feature = self.get_feature_by_name(feature_name)
+            if feature is None:
+                return None
+            template = feature.mat
+            if use_gray_scale and template.ndim == 3:
+                template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+        return template
+
+    def _default_feature_threshold(self):
+        """获取template_matching.default_threshold配置的默认匹配阈值"""
+        return getattr(self.executor.feature_set, 'default_threshold', self.DEFAULT_FEATURE_THRESHOLD)
+
+    def _cached_detect(self, kind, detect, params):
+        """以查找区域的画面哈希和查询参数为键缓存检测结果
+
+        Args:
+            kind: 检测类型
+            detect: 实际执行检测的方法
+            params: 检测参数字典
+
+        Returns:
+            list: 检测结果
+        """
+        frame = params.get('frame')
+        if frame is None:
+            frame = self.frame
+        self._record_frame(frame)
+        cache = self.detection_cache
+        if not cache.enabled or any(params.get(name) is not None for name in self.UNCACHEABLE_ARGS):
+            return detect(**params)
+        query = repr(sorted((name, value) for name, value in params.items()
+                            if name not in self.CACHE_IGNORED_ARGS))
+        # 哈希只用灰度图，使用同一帧共用的灰度图
+        region_hash = cache.region_hash(self.derived_frame(frame).gray, self._detect_region(params, frame))
+        cache_key = (kind, region_hash, query)
+        hit, result = cache.get(cache_key)
+        if hit:
+            return list(result) if result is not None else None
+        result = detect(**params)
+        cache.put(cache_key, list(result) if result is not None else None)
+        return result
+
+    def derived_frame(self, frame=None):
+        """获取帧的派生图像（灰度、缩小、HSV、二值），同一帧的多次检测共用
+
+        Args:
+            frame: 图像帧，默认为当前帧
+
+        Returns:
+            DerivedFrame: 派生图像，新的一帧到来时释放
+        """
+        return self.derived_frames.of(self.frame if frame is None else frame)
+
+    def _detect_region(self, params, frame=None):
+        """获取检测参数中指定的区域
 
+        box优先；未指定box时按框架的规则把x/y/to_x/to_y（或width/height）屏幕比例换算为像素区域。
+
+        Args:
+            params: 检测参数字典
+            frame: 换算比例用的帧，默认为当前帧
+
+        Returns:
+            tuple: (x, y, width, height)，整帧时返回None
+        """
+        box = params.get('box')
+        if isinstance(box, str):
+            box = self.get_box_by_name(box)
+        if box is not None:
+            return box.x, box.y, box.width, box.height
+        x, y = params.get('x') or 0, params.get('y') or 0
+        to_x = x + params['width'] if params.get('width') else params.get('to_x', 1)
+        to_y = y + params['height'] if params.get('height') else params.get('to_y', 1)
+        if (x, y, to_x, to_y) == (0, 0, 1, 1):
+            return None
+        frame_height, frame_width = (self.frame if frame is None else frame).shape[:2]
+        left, top = int(x * frame_width), int(y * frame_height)
+        return left, top, int(to_x * frame_width) - left, int(to_y * frame_height) - top
+
+    def _ocr_roi_key(self, params):
+        """获取可使用区域学习的键
+
+        Args:
+            params: ocr的参数字典
+
+        Returns:
+            str: 全屏识别且文本需要学习时返回键，否则返回None
+        """
+        if not self._ocr_roi_keys:
+            return None
+        for name, default in self.OCR_REGION_DEFAULTS.items():
+            value = params.get(name, default)
+            if default is None:
+                if value is not None:
+                    return None
+            elif value != default:
+                return None
+        key = OcrRoiRegistry.key_of(params.get('match'))
+        return key if key in self._ocr_roi_keys else None
+
+    @property
+    def template_cache(self):
+        """按分辨率预计算的模板缓存，首次使用时加载"""
+        from src.utils.template_cache import TemplateCache
+        matching = config['template_matching']
+        return self.track_shared(f"template_cache:{matching['template_cache']}", TemplateCache.shared(
+            matching['coco_feature_json'], matching['template_cache'], config['supported_resolution']['resize_to']))
+
+    @property
+    def resources(self):
+        """og.my_app中任务共享的资源表，内存上限取Shared Resources全局配置"""
+        registry = self._registry()
+        max_bytes = int(self.get_global_config(resource_option).get('Memory Cap (MB)', 512) * 1048576)
+        if registry.max_bytes != max_bytes:
+            registry.set_max_bytes(max_bytes)
+        return registry
+
+    @staticmethod
+    def _registry():
+        return getattr(og.my_app, 'resources', None) or _local_resources
+
+    def track_shared(self, name, value, size=None):
+        """把进程级共享的缓存、线程池等登记到共享资源表，大小计入内存上限，不会被释放
+
+        Args:
+            name: 资源名
+            value: 共享对象
+            size: 返回大小(字节)的函数，默认估算
+
+        Returns:
+            value
+        """
+        return self._registry().track(name, value, size)
+
+    def use_resource(self, name, factory, size=None, dispose=None):
+        """在with块内持有共享资源，第一次使用时由factory创建，之后所有任务共享
+
+        Args:
+            name: 资源名
+            factory: 无参数的创建函数
+            size: 返回资源大小(字节)的函数，默认估算
+            dispose: 资源被释放时调用的函数
+
+        Returns:
+            上下文管理器，进入时返回资源对象
+        """
+        return self.resources.use(name, factory, size, dispose)
+
+    def screen_classifier(self):
+        """持有界面分类器的上下文管理器，分类器首次使用时加载参考截图"""
+        from src.utils.screen_classifier import ScreenClassifier
+        folder = self.SCREEN_FOLDER
+        return self.use_resource(f'screen_classifier:{folder}', lambda: ScreenClassifier(folder))
+
+    def current_screen(self, frame=None):
+        """识别当前所在界面
+
+        Args:
+            frame: 要识别的帧，默认为当前帧
+
+        Returns:
+            str: 界面名，无法识别或没有参考截图时返回None
+        """
+        with self.screen_classifier() as classifier:
+            if not classifier.states:
+                return None
+            if frame is None:
+                frame = self.frame
+            self._record_frame(frame)
+            state, _ = classifier.classify(frame)
+        return state
+
+    def maybe_on_screen(self, state):
+        """判断当前是否可能处于指定界面
+
+        分类器没有该界面的参考截图或无法识别当前界面时返回True，
+        由调用方继续用OCR/特征检测确认。
+
+        Args:
+            state: 界面名
+
+        Returns:
+            bool: 是否需要继续检测
+        """
+        with self.screen_classifier() as classifier:
+            if state not in classifier.states:
+                return True
+        current = self.current_screen()
+        return current is None or current == state
+
+    def learned_box(self, *matches):
+        """OCR学习到的文字区域（含边距）的外接框，供wait_for_change_then只关注等待的元素
+
+        Args:
+            *matches: ocr的match参数或OcrRoiRegistry的键
+
+        Returns:
+            Box: 都已学习时返回外接框，否则返回None表示全屏
+        """
+        regions = [self.ocr_roi.get(OcrRoiRegistry.key_of(match)) for match in matches]
+        if not regions or None in regions:
+            return None
+        height, width = self.frame.shape[:2]
+        xs, ys, to_xs, to_ys = zip(*regions)
+        return Box(round(min(xs) * width), round(min(ys) * height), to_x=round(max(to_xs) * width),
+                   to_y=round(max(to_ys) * height), name='learned')
+
+    def wait_for_change_then(self, condition, time_out=10, box=None, settle_time=0.2, max_interval=5,
+                             check_interval=0.05, change_threshold=10.0, raise_if_not_found=False):
+        """等待画面变化并稳定后再执行检测，代替固定间隔的sleep轮询
+
+        以采集速率比较缩略图差异，只有画面变化且稳定后才调用condition，
+        画面长时间不变时每max_interval秒兜底调用一次。
+        box传入等待的元素所在区域（如learned_box）时只关注该区域，小按钮出现也能触发检测。
+        max_interval可以是 已等待秒数 -> 间隔 的函数（如PollSchedule.poller），
+        此时采集间隔也随之放宽为兜底间隔的1/10，不低于check_interval。
+
+        Args:
+            condition: 检测函数，返回真值表示找到
+            time_out: 超时时间(秒)
+            box: 只关注该区域的变化，默认为全屏
+            settle_time: 画面变化后需要保持稳定的时间(秒)
+            max_interval: 画面不变时兜底检测的间隔(秒)，或根据已等待时间返回间隔的函数
+            check_interval: 采集新帧的间隔(秒)
+            change_threshold: 判定为变化的灰度差(0~255)，取缩略图逐像素差的99百分位
+            raise_if_not_found: 超时后是否抛出WaitFailedException
+
+        Returns:
+            condition的返回值，超时返回最后一次的结果
+        """
+        from src.utils.frame_change import FrameChangeGate
+        region = self._detect_region({'box': box})
+        schedule = max_interval if callable(max_interval) else None
+        gate = FrameChangeGate(change_threshold, settle_time, schedule(0) if schedule else max_interval)
+        start = self.now()
+        gate.reset(start)
+        gate.update(self.derived_frame().gray, start, region)
+        result = condition()
+        while not result and self.now() - start < time_out:
+            if schedule is None:
+                self.sleep(check_interval)
+            else:
+                gate.max_interval = schedule(self.now() - start)
+                self.sleep(max(check_interval, gate.max_interval / 10))
+            frame = self.next_frame()
+            if gate.update(self.derived_frame(frame).gray, self.now(), region):
+                result = condition()
+        if not result and raise_if_not_found:
+            raise WaitFailedException(f'wait_for_change_then timeout after {time_out}s')
+        return result
+
+    def session_recorder(self):
+        """获取当前任务运行的会话录制器
+
+        开启Replay Recording全局配置后，每次任务运行录制到
+        <Record Folder>/<任务类名>_<开始时间> 目录，未开启时返回None。
+        """
+        from src.replay.recorder import SessionRecorder
+        record_config = self.get_global_config(replay_record_option)
+        if not record_config.get('Record Sessions'):
+            self.stop_recording()
+            return None
+        if self.recorder is None or self._recorder_start != self.start_time:
+            self.stop_recording()
+            task_name = type(self).__name__
+            started = time.strftime('%Y%m%d_%H%M%S', time.localtime(self.start_time or time.time()))
+            folder = os.path.join(record_config.get('Record Folder') or 'recordings', f'{task_name}_{started}')
+            self.recorder = SessionRecorder(folder, task_name)
+            self._recorder_start = self.start_time
+            self.log_info(f'开始录制会话: {folder}')
+        return self.recorder
+
+    def stop_recording(self):
+        """停止录制当前会话"""
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def export_trace(self):
+        """开启Span Tracing全局配置时，把追踪到的区间导出为Chrome trace JSON
+
+        Returns:
+            str: 导出的文件路径，未开启时返回None
+        """
+        trace_config = self.get_global_config(trace_option)
+        if not trace_config.get('Export Trace'):
+            return None
+        started = time.strftime('%Y%m%d_%H%M%S', time.localtime(self.start_time or time.time()))
+        path = os.path.join(trace_config.get('Trace Folder') or 'traces', f'{type(self).__name__}_{started}.json')
+        self.tracer.export_chrome_trace(path)
+        self.log_info(f'已导出追踪数据: {path}')
+        return path
+
+    def _record_frame(self, frame):
+        recorder = self.session_recorder()
+        if recorder is not None:
+            recorder.record_frame(frame)
+
+    def _record_action(self, action, **fields):
+        if self._recording_action:
+            return
+        recorder = self.session_recorder()
+        if recorder is not None:
+            recorder.record_action(action, **fields)
+
+    def click(self, x=-1, y=-1, *args, **kwargs):
+        """点击，开启录制时记录点击位置"""
+        if isinstance(x, (Box, list)):
+            self._record_action('click_box', **self._box_fields(x))
+        else:
+            self._record_action('click', x=x, y=y, key=kwargs.get('key', 'left'))
+        return self._without_recording(super().click, x, y, *args, **kwargs)
+
+    def click_box(self, box=None, relative_x=0.5, relative_y=0.5, *args, **kwargs):
+        """点击Box，开启录制时记录Box位置"""
+        fields = self._box_fields(box)
+        self._record_action('click_box', relative_x=relative_x, relative_y=relative_y, **fields)
+        with self.tracer.span('click_box', 'input', box=fields['box'], target=fields['name']):
+            return self._without_recording(super().click_box, box, relative_x, relative_y, *args, **kwargs)
+
+    def send_key(self, key, *args, **kwargs):
+        """发送按键，开启录制时记录按键"""
+        self._record_action('send_key', key=str(key))
+        with self.tracer.span('send_key', 'input', key=str(key)):
+            return self._without_recording(super().send_key, key, *args, **kwargs)
+
+    def send_key_down(self, key):
+        """按下按键，开启录制时记录按键"""
+        self._record_action('send_key_down', key=str(key))
+        return self._without_recording(super().send_key_down, key)
+
+    def send_key_up(self, key):
+        """释放按键，开启录制时记录按键"""
+        self._record_action('send_key_up', key=str(key))
+        return self._without_recording(super().send_key_up, key)
+
+    def _without_recording(self, action, *args, **kwargs):
+        """执行交互操作，期间嵌套调用的交互方法不重复记录"""
+        if self._recording_action:
+            return action(*args, **kwargs)
+        self._recording_action = True
+        try:
+            return action(*args, **kwargs)
+        finally:
+            self._recording_action = False
+
+    @staticmethod
+    def _box_fields(box):
+        """把要点击的Box转换为可记录的字段"""
+        if isinstance(box, list):
+            box = box[0] if box else None
+        if isinstance(box, Box):
+            return {'name': str(box.name) if box.name is not None else None,
+                    'box': [box.x, box.y, box.width, box.height]}
+        return {'name': box, 'box': None}
 
     def operate(self, func):
         """执行交互操作，阻塞模式"""
         self.executor.interaction.operate(func, block=True)
 
+    @property
+    def hot_log(self):
+        """热循环用的异步日志，第一次使用时创建后台输出线程"""
+        from src.utils.async_log import AsyncLog
+        if self._hot_log is None:
+            self._hot_log = AsyncLog(self._write_hot_log)
+        return self._hot_log
+
+    def _write_hot_log(self, level, message):
+        getattr(self, f'log_{level}')(message, notify=False)
+
+    def log_hot(self, template, *args, level='info', site=None):
+        """在每次检测、每次按键都会执行的热循环位置记录日志
+
+        只把模板和参数放入缓冲区，由后台线程格式化输出；每个位置限速，
+        连续重复的消息合并为一条带次数的消息。每轮一次的流程日志直接用log_info，不经过限速。
+        使用它的任务结束时调用hot_log.flush()输出剩余的消息。
+
+        Args:
+            template: str.format模板，如 "发送按键 {}"
+            *args: 模板参数
+            level: 日志级别
+            site: 限速的位置，默认为模板本身
+        """
+        self.hot_log.log(level, template, *args, site=site)
+
+    def precise_sleep(self, seconds, tag='sleep'):
+        """高精度等待，用于按键保持时间等需要亚毫秒精度的短等待
+
+        Args:
+            seconds: 等待秒数
+            tag: 超出时间直方图的名称，PreciseTimer.shared().stats()查看
+
+        Returns:
+            float: 实际超出的秒数
+        """
+        from src.utils.precise_timer import PreciseTimer
+        with self.tracer.span('precise_sleep', 'sleep', seconds=seconds):
+            return self.track_shared('precise_timer', PreciseTimer.shared()).sleep(seconds, tag)
+
+    def macro(self, name='macro'):
+        """创建输入宏，见Macro"""
+        from src.utils.input_macro import Macro
+        return Macro(name)
+
+    def play_macro(self, macro, wait=True):
+        """在专用的输入线程中按时间线回放宏
+
+        按键保持时间和间隔不受任务线程中的检测、日志影响。
+        开启录制时在任务线程记录整个宏的时间线，输入线程只调用executor.interaction，不读写任务状态。
+
+        Args:
+            macro: Macro
+            wait: 是否等待回放结束；False时立即返回，任务线程可以同时检测画面
+
+        Returns:
+            wait为True时返回计时报告dict，否则返回MacroPlayback
+        """
+        from src.utils.input_macro import MacroPlayer
+        self._record_action('macro', name=macro.name,
+                            events=[[round(t, 4), action, str(key)] for t, action, key in macro.compile()])
+        interaction = self.executor.interaction
+        handlers = {'key_down': interaction.do_send_key_down, 'key_up': interaction.do_send_key_up,
+                    'mouse_down': lambda key: interaction.do_mouse_down(key=key),
+                    'mouse_up': lambda key: interaction.do_mouse_up(key=key)}
+        playback = self.track_shared('macro_player', MacroPlayer.shared()).play(macro, handlers)
+        if not wait:
+            return playback
+        with self.tracer.span('play_macro', 'input', target=macro.name):
+            try:
+                while not playback.wait(0.05):
+                    self.sleep(0)  # 让任务停止/暂停时能中断等待，finally中取消回放并释放按键
+            finally:
+                if not playback.done():
+                    playback.cancel()
+                    playback.wait()
+        report = playback.result()
+        self.log_debug(f'宏{macro.name}回放完成: {report}')
+        return report
+
     def do_mouse_down(self, key):
         """按下鼠标键"""
+        self._record_action('mouse_down', key=key)
         self.executor.interaction.do_mouse_down(key=key)
 
     def do_mouse_up(self, key):
         """释放鼠标键"""
+        self._record_action('mouse_up', key=key)
         self.executor.interaction.do_mouse_up(key=key)
 
     def do_send_key_down(self, key):
         """按下键盘按键"""
+        self._record_action('send_key_down', key=str(key))
         self.executor.interaction.do_send_key_down(key)
 
     def do_send_key_up(self, key):
         """释放键盘按键"""
+        self._record_action('send_key_up', key=str(key))
         self.executor.interaction.do_send_key_up(key)
-
-
-
-
@@ -214,48 +214,39 @@ class MyOneTimeTask(MyBaseTask):
     
     def _execute_random_wasd_movement(self, duration=10, min_move_time=0.5, max_move_time=1.5, move_interval=0.2):
         """执行随机WASD移动操作
-        
+
+        先把整段移动编译为按键时间线，再由输入线程按时间线回放，
+        按下时间和间隔不受日志和检测耗时影响。
+
         Args:
             duration: 总移动持续时间(秒)
             min_move_time: 每次移动的最短时间(秒)
             max_move_time: 每次移动的最长时间(秒)
             move_interval: 两次移动之间的间隔时间(秒)
         """
-        import time
         self.log_info(f"开始随机WASD移动，持续时间: {duration}秒", notify=False)
         
         # 定义方向键列表
         direction_keys = ['w', 'a', 's', 'd']
-        direction_names = {'w': '前进', 'a': '向左', 's': '后退', 'd': '向右'}
         
-        start_time = time.time()
+        macro = self.macro('随机WASD移动')
         move_count = 0
+        while macro.cursor < duration:
+            # 随机选择一个方向键和按下时间
+            down_time = random.uniform(min_move_time, max_move_time)
+            macro.key(random.choice(direction_keys), hold=down_time)
+            move_count += 1
+            # 剩余时间不足一个间隔时结束
+            if duration - macro.cursor <= move_interval:
+                break
+            macro.wait(move_interval)
         
         try:
-            while time.time() - start_time < duration:
-                # 随机选择一个方向键
-                key = random.choice(direction_keys)
-                # 随机生成按下时间
-                down_time = random.uniform(min_move_time, max_move_time)
-                
-                # 发送按键
-                direction = direction_names.get(key, key)
-                self.log_info(f"随机移动: {direction}，持续时间: {down_time:.2f}秒", notify=False)
-                self.send_key(key, down_time=down_time)
-                
-                move_count += 1
-                
-                # 等待间隔时间
-                remaining_time = duration - (time.time() - start_time)
-                if remaining_time > move_interval:
-                    self.sleep(move_interval)
-                else:
-                    break
+            report = self.play_macro(macro)
+            self.log_info(f"随机WASD移动完成，共执行{move_count}次移动，"
+                          f"时间误差p95: {report['error_ms']['p95']}ms", notify=False)
         except Exception as e:
             self.log_info(f"随机WASD移动过程中出错: {str(e)}", notify=False)
-        finally:
-            self.log_info(f"随机WASD移动完成，共执行{move_count}次移动", notify=False)
-        
     
     def _send_key_multiple_times(self, key, count, direction, delay):
         """多次发送指定按键
@@ -267,10 +258,11 @@ class MyOneTimeTask(MyBaseTask):
             delay: 每次发送之间的延迟时间(秒)
         """
         self.log_info(f"开始{direction}{count}次螺旋飞跃", notify=False)
-        for i in range(count):
-            self.send_key(key)
-            self.log_info(f"{direction}第{i+1}次发送按键{key}", notify=False)
-            self.sleep(delay)
+        macro = self.macro(f'{direction}螺旋飞跃')
+        for _ in range(count):
+            macro.key(key).wait(delay)
+        report = self.play_macro(macro)
+        self.log_info(f"{direction}发送按键{key}共{count}次，时间误差p95: {report['error_ms']['p95']}ms", notify=False)
     
     def _handle_retry_and_continue(self, delay):
         """处理再次尝试并继续挑战的逻辑
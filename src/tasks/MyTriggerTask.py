@@ -1,17 +1,46 @@
 from ok import TriggerTask
 
+from src.utils.trigger_scheduler import TriggerScheduler
+
 
 class MyTriggerTask(TriggerTask):
+    """触发器宿主
+
+    ok会不断调用run，这里把每帧交给TriggerScheduler，只有依赖区域变化过的触发器才执行。
+    新的触发器在on_create/__init__中用add_trigger注册即可，不需要各自成为一个TriggerTask。
+    """
+
+    REPORT_INTERVAL = 100  # 每多少帧更新一次触发器耗时信息
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.name = "触发器会不断调用run方法"
         self.description = "一般根据frame来判断是否需要运行"
         self.trigger_count = 0
+        self.scheduler = TriggerScheduler()
+        self.add_trigger('示例触发器', self.example_trigger, regions=[(0, 0, 1, 1)], min_interval=1.0)
 
-    def run(self):
-        self.trigger_count += 1
-        self.log_debug(f'MyTriggerTask run {self.trigger_count}')
+    def add_trigger(self, name, check, **kwargs):
+        """注册触发器
 
+        Args:
+            name: 名称
+            check: 检查函数(frame)，返回True表示触发并执行了操作
+            **kwargs: regions, priority, min_interval, budget, max_interval，见Trigger
 
+        Returns:
+            Trigger: 注册的触发器
+        """
+        return self.scheduler.add(name, check, **kwargs)
 
+    def example_trigger(self, frame):
+        self.trigger_count += 1
+        self.log_debug(f'MyTriggerTask run {self.trigger_count}')
+        return False
+
+    def run(self):
+        ran = self.scheduler.tick(self.frame)
+        if ran or self.scheduler.ticks % self.REPORT_INTERVAL == 0:
+            report = self.scheduler.report()
+            self.info_set('触发器耗时', {name: trigger['total_ms'] for name, trigger in report['triggers'].items()})
+            self.info_set('区域比较耗时', report['gate_ms'])
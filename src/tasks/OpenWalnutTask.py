@@ -1,5 +1,8 @@
+import os
+
 from src.tasks.MyBaseTask import MyBaseTask
-import time
+from src.utils.poll_schedule import PollSchedule
+from src.utils.round_metrics import RoundMetrics
 
 
 class OpenWalnutTask(MyBaseTask):
@@ -10,6 +13,32 @@ class OpenWalnutTask(MyBaseTask):
     DEFAULT_CHECK_INTERVAL = 1.0  # 默认检测间隔（秒）
     DEFAULT_WAIT_TIMEOUT = 30  # 默认等待超时时间（秒）
     MAX_REWARD_TIMEOUT = 130  # 最大密函报酬选择等待时间（秒）
+    REWARD_RECHECK_INTERVAL = 5  # 画面无变化时兜底检测密函报酬选择的间隔（秒）
+    
+    # 界面名（assets/screens 下的参考截图目录名），没有参考截图的界面由OCR确认
+    SCREEN_REWARD_SELECTION = "reward_selection"
+    SCREEN_CHALLENGE_CHOICE = "challenge_choice"
+    
+    # 每轮阶段耗时统计，每轮结束后追加CSV并刷新Prometheus textfile
+    # 开核桃模式下战斗时间包含在reward_wait中，普通模式下记为in_combat
+    METRICS_PHASES = ("in_combat", "reward_wait", "confirm_click", "challenge_choice",
+                      "walnut_selection", "manual_selection")
+    METRICS_WINDOW = 50  # 滚动统计的轮数
+    METRICS_CSV = os.path.join("metrics", "open_walnut_rounds.csv")
+    METRICS_PROM = os.path.join("metrics", "open_walnut.prom")
+    
+    # 按历史阶段耗时调整检测间隔：离典型结束时间远时稀疏检测，接近时密集检测
+    POLL_SCHEDULE_FILE = os.path.join("configs", "poll_schedule", "OpenWalnutTask.json")
+    POLL_PHASES = ("reward_wait", "challenge_choice", "in_combat")  # 由PollSchedule调整间隔的等待阶段
+    
+    # 全屏OCR时学习并复用识别区域的文本，学习到区域后ocr_fixed只识别该区域
+    OCR_ROI_MATCHES = (
+        "密函报酬选择",
+        "撤离",
+        ["继续挑战", "○继续挑战"],
+        "确认选择",
+        "开始挑战",
+    )
     
     # 角色特征映射
     ROLE_FEATURE_MAP = {
@@ -72,6 +101,8 @@ class OpenWalnutTask(MyBaseTask):
         
         # 初始化循环计数器
         self.loop_count = 0
+        self.metrics = RoundMetrics(self.METRICS_PHASES, self.METRICS_WINDOW, clock=self.now)
+        self.poll_schedule = PollSchedule(self.POLL_SCHEDULE_FILE)
 
     def run(self):
         """主运行方法 - 循环检测并处理密函报酬选择界面
@@ -104,6 +135,7 @@ class OpenWalnutTask(MyBaseTask):
         )
         
         self.log_info(f"{'开核桃模式' if open_walnut else '普通循环模式'}已启动", notify=False)
+        self.metrics.start()
         
         try:
             # 主循环
@@ -113,38 +145,47 @@ class OpenWalnutTask(MyBaseTask):
                     self.log_info(f"已达到最大轮次 {max_rounds}，退出循环", notify=True)
                     break
                 
+                # 按当前界面决定本轮从哪一步开始，没有参考截图时为None
+                screen = self.current_screen()
+                
                 # 开核桃流程
                 if open_walnut:
-                    # 检测"密函报酬选择"界面
-                    if self._check_and_handle_reward_selection(action_delay):
-                        self.loop_count += 1
-                        self.log_info(f"成功处理第 {self.loop_count} 次密函报酬选择", notify=False)
-                        
-                        # 处理后续流程
-                        auto_continue = max_rounds == 0 or self.loop_count < max_rounds
-                        result = self._handle_challenge_choice(
-                            auto_continue, action_delay, role_walnut_selection, open_walnut
-                        )
-                        
-                        # 处理结果逻辑
-                        if result is False:
-                            self.log_info("处理挑战选择失败，退出循环", notify=True)
-                            break
-                        elif result is None:
-                            self.log_info("已选择撤离，退出任务", notify=True)
-                            break
-                        # result is True 表示成功处理，继续循环
-                    else:
-                        # 未找到界面，等待后继续检测
-                        self.sleep(check_interval)
+                    # 已在挑战选择界面时（如中途启动任务）跳过密函报酬选择
+                    if screen != self.SCREEN_CHALLENGE_CHOICE:
+                        if not self._check_and_handle_reward_selection(action_delay):
+                            # 未找到界面，放弃本轮统计，等待后继续检测
+                            self.metrics.abort_round()
+                            self.sleep(check_interval)
+                            continue
+                        self.log_info(f"成功处理第 {self.loop_count + 1} 次密函报酬选择", notify=False)
+                    self.loop_count += 1
+                    
+                    # 处理后续流程
+                    auto_continue = max_rounds == 0 or self.loop_count < max_rounds
+                    result = self._handle_challenge_choice(
+                        auto_continue, action_delay, role_walnut_selection, open_walnut
+                    )
+                    
+                    # 处理结果逻辑
+                    if result is False:
+                        self.log_info("处理挑战选择失败，退出循环", notify=True)
+                        break
+                    elif result is None:
+                        self.log_info("已选择撤离，退出任务", notify=True)
+                        break
+                    # result is True 表示成功处理，继续循环
+                    self._report_round()
                 else:
                     # 不开核桃流程
                     self.loop_count += 1
                     auto_continue = max_rounds == 0 or self.loop_count < max_rounds
                     if auto_continue:
-                        self._handle_challenge_choice(
+                        if self._handle_challenge_choice(
                             True, action_delay, role_walnut_selection, open_walnut
-                        )
+                        ):
+                            self._report_round()
+                        else:
+                            self.metrics.abort_round()
 
         except KeyboardInterrupt:
             self.log_info("用户中断任务", notify=True)
@@ -153,6 +194,29 @@ class OpenWalnutTask(MyBaseTask):
             self.log_info(f"错误类型: {type(e).__name__}", notify=False)
         finally:
             self.log_info(f"开核桃任务运行完成! 共处理 {self.loop_count} 轮", notify=True)
+            self.log_debug(f"检测缓存统计: {self.detection_cache.stats()}")
+            self.log_debug(f"共享资源统计: {self.resources.stats()}")
+            self.log_debug(f"派生图像统计: {self.derived_frames.stats()}")
+            self.stop_recording()
+            self.log_debug(f"耗时统计: {self.tracer.summary()}")
+            self.export_trace()
+
+    def _report_round(self):
+        """结束一轮的阶段统计，写入CSV和Prometheus textfile"""
+        row = self.metrics.end_round()
+        for phase in self.POLL_PHASES:
+            if row.get(phase) is not None:
+                self.poll_schedule.record(phase, row[phase])
+        rounds_per_hour = self.metrics.rounds_per_hour()
+        self.info_set("每小时轮数", round(rounds_per_hour, 1))
+        self.log_debug(f"第 {self.loop_count} 轮耗时 {row['round']:.1f}秒, 每小时 {rounds_per_hour:.1f} 轮, "
+                       f"阶段统计: {self.metrics.summary()}")
+        try:
+            self.metrics.append_csv(self.METRICS_CSV, row)
+            self.metrics.write_prometheus(self.METRICS_PROM, type(self).__name__)
+            self.poll_schedule.save()
+        except OSError as e:
+            self.log_debug(f"写入轮次统计失败: {e}")
 
     def _check_and_handle_reward_selection(self, delay):
         """检测并处理"密函报酬选择"界面
@@ -165,23 +229,15 @@ class OpenWalnutTask(MyBaseTask):
         """
         self.log_info("开始检测密函报酬选择界面...", notify=False)
         
-        # 等待并检测密函报酬选择界面
-        start_time = time.time()
-        reward_text = None
-        check_count = 0
-        
-        while time.time() - start_time < self.MAX_REWARD_TIMEOUT:
-            check_count += 1
-            reward_text = self.ocr(match="密函报酬选择", log=False)
-            if reward_text:
-                break
-            
-            # 每10次检查输出一次日志
-            if check_count % 10 == 0:
-                elapsed_time = int(time.time() - start_time)
-                self.log_info(f"已等待{elapsed_time}秒，继续检测密函报酬选择界面...", notify=False)
-                
-            self.sleep(5)  # 间隔检测
+        # 等待画面变化并稳定后检测密函报酬选择界面，画面不变时每REWARD_RECHECK_INTERVAL秒兜底检测
+        # 界面分类器确认不在该界面（如战斗中）时跳过OCR
+        with self.metrics.phase("reward_wait"):
+            reward_text = self.wait_for_change_then(
+                lambda: self.maybe_on_screen(self.SCREEN_REWARD_SELECTION) and self.ocr_fixed("密函报酬选择"),
+                time_out=self.MAX_REWARD_TIMEOUT,
+                box=self.learned_box("密函报酬选择"),
+                max_interval=self.poll_schedule.poller("reward_wait", self.REWARD_RECHECK_INTERVAL),
+            )
         
         if not reward_text:
             self.log_info(f"超时：未在{self.MAX_REWARD_TIMEOUT}秒内找到密函报酬选择界面", notify=False)
@@ -191,17 +247,18 @@ class OpenWalnutTask(MyBaseTask):
         
         try:
             # 等待并点击"确认选择"按钮
-            click_result = self.wait_click_ocr(
-                match="确认选择",
-                log=True,
-                time_out=self.DEFAULT_WAIT_TIMEOUT
-            )
-            
-            if not click_result:
-                self.log_info("未找到确认选择按钮", notify=False)
-                return False
-            
-            self.sleep(delay)
+            with self.metrics.phase("confirm_click"):
+                click_result = self.wait_click_fixed(
+                    "确认选择",
+                    time_out=self.DEFAULT_WAIT_TIMEOUT,
+                    key="奖励/确认选择",
+                )
+                
+                if not click_result:
+                    self.log_info("未找到确认选择按钮", notify=False)
+                    return False
+                
+                self.sleep(delay)
             return True
             
         except Exception as e:
@@ -227,18 +284,26 @@ class OpenWalnutTask(MyBaseTask):
         
         try:
             # 检测"撤离"和"继续挑战"按钮
-            exit_button = None
-            continue_button = None
+            def find_choice_buttons():
+                if not self.maybe_on_screen(self.SCREEN_CHALLENGE_CHOICE):
+                    return None
+                exit_found = self.ocr_fixed("撤离")
+                continue_found = self.ocr_fixed(["继续挑战", "○继续挑战"])
+                if exit_found or continue_found:
+                    return exit_found, continue_found
+                return None
             
-            # 等待界面加载完成
-            start_time = time.time()
-            while (exit_button is None or continue_button is None) and time.time() - start_time < self.MAX_REWARD_TIMEOUT:
-                exit_button = self.ocr(match="撤离", log=True)
-                continue_button = self.ocr(match=["继续挑战", "○继续挑战"], log=True)
-                
-                if not exit_button and not continue_button:
-                    sleep_time = 1 if open_walnut else 5
-                    self.sleep(sleep_time)
+            # 等待界面加载完成，画面变化并稳定后立即检测
+            # 普通模式下这段等待就是战斗时间
+            phase = "challenge_choice" if open_walnut else "in_combat"
+            with self.metrics.phase(phase):
+                buttons = self.wait_for_change_then(
+                    find_choice_buttons,
+                    time_out=self.MAX_REWARD_TIMEOUT,
+                    box=self.learned_box("撤离", ["继续挑战", "○继续挑战"]),
+                    max_interval=self.poll_schedule.poller(phase, 1 if open_walnut else 5),
+                )
+            exit_button, continue_button = buttons or (None, None)
             
             # 验证按钮是否存在
             if not exit_button and not continue_button:
@@ -292,11 +357,13 @@ class OpenWalnutTask(MyBaseTask):
             if open_walnut:
                 # 开核桃流程
                 self.log_info("进入密函选择流程", notify=False)
-                return self._handle_walnut_selection(role_walnut_selection, delay)
+                with self.metrics.phase("walnut_selection"):
+                    return self._handle_walnut_selection(role_walnut_selection, delay)
             else:
                 # 不开核桃，处理手册选择
                 self.log_info("进入手册选择流程", notify=False)
-                return self._handle_manual_selection(delay)
+                with self.metrics.phase("manual_selection"):
+                    return self._handle_manual_selection(delay)
         
         except Exception as e:
             self.log_info(f"处理继续挑战时出错: {str(e)}", notify=False)
@@ -349,15 +416,14 @@ class OpenWalnutTask(MyBaseTask):
         
         try:
             # 查找并点击对应手册特征
-            manual_feature = self.find_feature(feature_name, horizontal_variance=9999, vertical_variance=9999)
+            manual_feature = self._find_manual(feature_name)
             if manual_feature:
-                self.click_box(manual_feature[0], relative_x=0.1, relative_y=0.1)
+                self.click_box(manual_feature, relative_x=0.1, relative_y=0.1)
                 self.sleep(delay)
             
             # 等待并点击开始挑战
-            click_result = self.wait_click_ocr(
-                match=["开始挑战"],
-                log=True,
+            click_result = self.wait_click_fixed(
+                ["开始挑战"],
                 time_out=self.DEFAULT_WAIT_TIMEOUT
             )
             
@@ -367,6 +433,30 @@ class OpenWalnutTask(MyBaseTask):
             self.log_info(f"处理手册选择时出错: {str(e)}", notify=False)
             return False
 
+    def _find_manual(self, feature_name):
+        """在手册选择界面查找指定手册
+        
+        各手册图标相似，单独全屏查找时会匹配到相邻的手册，
+        因此同时匹配所有手册，目标位置被其他手册以更高置信度匹配时视为误匹配。
+        
+        Args:
+            feature_name: 手册特征名
+            
+        Returns:
+            Box: 手册位置，未找到返回None
+        """
+        matches = self.find_best_of(list(self.MANUAL_FEATURE_MAP.values()))
+        for index, box in enumerate(matches):
+            if box.name != feature_name:
+                continue
+            center_x, center_y = box.center()
+            if not any(other.name != feature_name
+                       and other.x <= center_x <= other.x + other.width
+                       and other.y <= center_y <= other.y + other.height
+                       for other in matches[:index]):
+                return box
+        return None
+
     def _handle_walnut_selection(self, role_walnut_selection, delay):
         """处理密函选择界面
         
@@ -416,10 +506,10 @@ class OpenWalnutTask(MyBaseTask):
             
             # 点击确认选择按钮
             self.log_info("等待确认选择按钮", notify=False)
-            confirm_click_result = self.wait_click_ocr(
-                match="确认选择",
-                log=True,
-                time_out=self.DEFAULT_WAIT_TIMEOUT
+            confirm_click_result = self.wait_click_fixed(
+                "确认选择",
+                time_out=self.DEFAULT_WAIT_TIMEOUT,
+                key="密函/确认选择",
             )
             
             if not confirm_click_result:
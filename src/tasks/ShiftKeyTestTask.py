@@ -8,15 +8,24 @@ Shift键测试任务 - 前台pynput解决方案
 import time
 import win32gui
 from src.tasks.MyBaseTask import MyBaseTask
+from src.utils.precise_timer import PreciseTimer
 
-# 尝试导入pynput，如果失败则设为None
-try:
-    from pynput.keyboard import Controller, Key
-    PYNPUT_AVAILABLE = True
-except ImportError:
-    Controller = None
-    Key = None
-    PYNPUT_AVAILABLE = False
+# pynput在第一次使用时才导入，避免启动时加载任务列表变慢
+Controller = None
+Key = None
+PYNPUT_AVAILABLE = None  # None表示还未尝试导入
+
+
+def _load_pynput():
+    """导入pynput，返回是否可用"""
+    global Controller, Key, PYNPUT_AVAILABLE
+    if PYNPUT_AVAILABLE is None:
+        try:
+            from pynput.keyboard import Controller, Key
+            PYNPUT_AVAILABLE = True
+        except ImportError:
+            PYNPUT_AVAILABLE = False
+    return PYNPUT_AVAILABLE
 
 
 class ShiftKeyTestTask(MyBaseTask):
@@ -35,14 +44,25 @@ class ShiftKeyTestTask(MyBaseTask):
         self.name = "Shift键测试任务（前台模式）"
         self.description = "使用前台pynput方法测试shift键，确保游戏窗口在前台"
         self.game_hwnd = None
-        self.keyboard = None
-        
-        # 初始化pynput键盘控制器
-        self._init_keyboard()
-    
+        self._keyboard = None
+        self._keyboard_ready = False
+
+    @property
+    def keyboard(self):
+        """pynput键盘控制器，第一次发送按键时才创建"""
+        if not self._keyboard_ready:
+            self._keyboard_ready = True
+            self._init_keyboard()
+        return self._keyboard
+
+    @keyboard.setter
+    def keyboard(self, value):
+        self._keyboard = value
+        self._keyboard_ready = True
+
     def _init_keyboard(self):
         """初始化pynput键盘控制器"""
-        if PYNPUT_AVAILABLE:
+        if _load_pynput():
             try:
                 self.keyboard = Controller()
                 self.log_info("✓ pynput键盘控制器初始化成功", notify=False)
@@ -168,6 +188,7 @@ class ShiftKeyTestTask(MyBaseTask):
         self.sleep(self.TEST_INTERVAL)
         
         self.log_info("✓ shift键测试完成", notify=False)
+        self.log_info(f"按键保持时间精度: {PreciseTimer.shared().stats()}", notify=False)
     
     def check_foreground(self):
         """检查窗口是否在前台
@@ -211,7 +232,7 @@ class ShiftKeyTestTask(MyBaseTask):
             down_time (float): 按键按下时间（秒）
         """
         self.do_send_key_down('SHIFT')
-        time.sleep(down_time)
+        self.precise_sleep(down_time, 'shift_hold')
         self.do_send_key_up('SHIFT')
     
     def _send_shift_with_pynput(self, down_time):
@@ -228,7 +249,7 @@ class ShiftKeyTestTask(MyBaseTask):
         
         try:
             self.keyboard.press(Key.shift)
-            time.sleep(down_time)
+            self.precise_sleep(down_time, 'shift_hold_pynput')
             self.keyboard.release(Key.shift)
             self.log_info("✓ pynput发送shift键成功", notify=False)
             return True
@@ -0,0 +1,115 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'OKAB'
+VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct('<4sII')  # magic, version, header长度
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_bundle(path, arrays, meta=None):
+    """把多个数组写成一个资源包文件
+
+    文件结构: 魔数、版本、索引头长度、JSON索引头，之后是按64字节对齐的原始像素数据。
+
+    Args:
+        path: 资源包路径
+        arrays: 名称 -> np.ndarray
+        meta: 额外保存在索引头中的信息，需可JSON序列化
+    """
+    entries = []
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        entries.append({
+            'name': name,
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset,
+            'nbytes': array.nbytes,
+        })
+        offset = _align(offset + array.nbytes)
+    header = json.dumps({'meta': meta or {}, 'entries': entries}, ensure_ascii=False).encode('utf-8')
+    data_start = _align(_PREAMBLE.size + len(header))
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for entry, array in zip(entries, arrays.values()):
+            f.seek(data_start + entry['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+class AssetBundle:
+    """内存映射的资源包
+
+    打开时只读取索引头，所有数组都是映射文件上的只读零拷贝视图，
+    启动耗时和常驻内存基本与资源数量无关，只有实际访问的像素会被读入。
+    文件映射由np.memmap持有，每个视图都引用它，最后一个视图释放后映射才关闭，
+    所以close()之后已获取的视图仍然可用；映射未关闭时Windows上不能替换该文件。
+    """
+
+    def __init__(self, path):
+        """打开资源包
+
+        Args:
+            path: 资源包路径
+
+        Raises:
+            ValueError: 文件不是资源包或版本不支持
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, header_length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f'unsupported asset bundle: {path}')
+            header = json.loads(f.read(header_length).decode('utf-8'))
+        self.meta = header['meta']
+        self._entries = {entry['name']: entry for entry in header['entries']}
+        self._data_start = _align(_PREAMBLE.size + header_length)
+        self._mmap = np.memmap(path, dtype=np.uint8, mode='r') if self._entries else None
+        self._views = {}
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def names(self):
+        """所有数组名称"""
+        return list(self._entries)
+
+    def get(self, name):
+        """获取数组的零拷贝视图
+
+        Returns:
+            np.ndarray: 只读视图，不存在返回None
+        """
+        view = self._views.get(name)
+        if view is None:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            start = self._data_start + entry['offset']
+            view = np.ndarray(entry['shape'], dtype=np.dtype(entry['dtype']), buffer=self._mmap, offset=start)
+            self._views[name] = view
+        return view
+
+    def close(self):
+        """释放资源包对文件映射的引用，映射在已获取的视图都释放后关闭"""
+        self._views = {}
+        self._mmap = None
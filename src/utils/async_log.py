@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import deque
+
+
+class _SiteLimit:
+    """单个日志位置的令牌桶"""
+
+    __slots__ = ('tokens', 'updated', 'suppressed')
+
+    def __init__(self, burst, now):
+        self.tokens = burst
+        self.updated = now
+        self.suppressed = 0
+
+
+class AsyncLog:
+    """热循环用的异步日志
+
+    调用方只把 (时间, 级别, 限速省略数, 模板, 参数) 追加到环形缓冲区（deque的append是原子操作，不加锁），
+    格式化和输出由后台线程完成。每个日志位置有令牌桶限速，超出的记录只计数；
+    连续重复的相同消息合并为一条，如 "随机移动 ×52"。
+    缓冲区满时丢弃最旧的记录并计数，日志量再大也不会阻塞任务线程。
+    """
+
+    def __init__(self, sink, capacity=4096, flush_interval=0.5, rate=5.0, burst=20, coalesce_window=30.0,
+                 clock=time.time):
+        """初始化异步日志
+
+        Args:
+            sink: 输出函数 (级别, 消息)，在后台线程中调用
+            capacity: 环形缓冲区容量
+            flush_interval: 后台线程输出间隔(秒)
+            rate: 每个位置每秒允许的记录数
+            burst: 每个位置允许的突发记录数
+            coalesce_window: 重复消息最长合并多久后输出一次计数(秒)
+            clock: 时钟
+        """
+        self.sink = sink
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.rate = rate
+        self.burst = burst
+        self.coalesce_window = coalesce_window
+        self.clock = clock
+        self.dropped = 0
+        self.suppressed = 0
+        self._buffer = deque(maxlen=capacity)
+        self._limits = {}
+        self._repeat = None  # [级别, 消息, 重复次数, 第一次出现的时间]
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='async_log', daemon=True)
+        self._thread.start()
+
+    def log(self, level, template, *args, site=None):
+        """记录一条日志，格式化推迟到后台线程
+
+        Args:
+            level: 日志级别，如 'info'、'debug'
+            template: str.format模板
+            *args: 模板参数
+            site: 限速的位置，默认为模板本身
+
+        Returns:
+            bool: 是否记录（被限速时为False）
+        """
+        now = self.clock()
+        site = template if site is None else site
+        limit = self._limits.get(site)
+        if limit is None:
+            limit = self._limits[site] = _SiteLimit(self.burst, now)
+        limit.tokens = min(self.burst, limit.tokens + (now - limit.updated) * self.rate)
+        limit.updated = now
+        if limit.tokens < 1:
+            limit.suppressed += 1
+            self.suppressed += 1
+            return False
+        limit.tokens -= 1
+        suppressed, limit.suppressed = limit.suppressed, 0
+        if len(self._buffer) >= self.capacity:
+            self.dropped += 1
+        self._buffer.append((now, level, suppressed, template, args))
+        return True
+
+    def info(self, template, *args, site=None):
+        return self.log('info', template, *args, site=site)
+
+    def debug(self, template, *args, site=None):
+        return self.log('debug', template, *args, site=site)
+
+    def flush(self):
+        """立即输出缓冲区中的记录和未输出的重复计数"""
+        self._drain(final=True)
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=2)
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._drain()
+
+    def _drain(self, final=False):
+        with self._flush_lock:
+            while self._buffer:
+                try:
+                    now, level, suppressed, template, args = self._buffer.popleft()
+                except IndexError:
+                    break
+                message = self._format(template, args)
+                if suppressed:
+                    message = f'{message} (限速省略{suppressed}条)'
+                self._emit(level, message, now)
+            repeat = self._repeat
+            if repeat is not None and (final or self.clock() - repeat[3] >= self.coalesce_window):
+                self._emit_repeat()
+
+    @staticmethod
+    def _format(template, args):
+        if not args:
+            return template
+        try:
+            return template.format(*args)
+        except (IndexError, KeyError, ValueError) as e:
+            return f'{template} {args} (格式错误: {e})'
+
+    def _emit(self, level, message, now):
+        repeat = self._repeat
+        if repeat is not None and repeat[0] == level and repeat[1] == message:
+            repeat[2] += 1
+            return
+        if repeat is not None:
+            self._emit_repeat()
+        self.sink(level, message)
+        self._repeat = [level, message, 0, now]
+
+    def _emit_repeat(self):
+        level, message, count, _ = self._repeat
+        if count:
+            self.sink(level, f'{message} ×{count}')
+        self._repeat = None
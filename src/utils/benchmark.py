@@ -0,0 +1,110 @@
+import json
+import time
+
+from src.utils.stats import summarize
+
+
+class BenchmarkSuite:
+    """微基准测试集
+
+    每个用例先预热若干次，再计时重复运行，结果按用例名汇总为百分位耗时，
+    可保存为JSON基线，之后的运行与基线比较找出变慢的用例。
+    """
+
+    def __init__(self, repeat=20, warmup=2):
+        """初始化测试集
+
+        Args:
+            repeat: 每个用例计时的次数
+            warmup: 每个用例计时前预热的次数
+        """
+        self.repeat = repeat
+        self.warmup = warmup
+        self.cases = {}
+        self.errors = {}
+
+    def add(self, name, func):
+        """添加用例，func无参数"""
+        self.cases[name] = func
+
+    def run(self, log=print):
+        """运行所有用例
+
+        Args:
+            log: 输出每个用例结果的函数，None表示不输出
+
+        Returns:
+            dict: {用例名: summarize结果}，出错的用例记录在errors中
+        """
+        results = {}
+        for name, func in self.cases.items():
+            try:
+                for _ in range(self.warmup):
+                    func()
+                samples = []
+                for _ in range(self.repeat):
+                    start = time.perf_counter()
+                    func()
+                    samples.append((time.perf_counter() - start) * 1000)
+            except Exception as e:
+                self.errors[name] = f'{type(e).__name__}: {e}'
+                if log:
+                    log(f'{name:<60} error: {self.errors[name]}')
+                continue
+            results[name] = summarize(samples)
+            if log:
+                summary = results[name]
+                log(f"{name:<60} p50={summary['p50']:>9.2f}ms p95={summary['p95']:>9.2f}ms "
+                    f"p99={summary['p99']:>9.2f}ms")
+        return results
+
+
+def compare(results, baseline, metric='p95', tolerance=0.2, min_delta=1.0):
+    """与基线比较找出变慢的用例
+
+    Args:
+        results: 本次结果 {用例名: summary}
+        baseline: 基线结果
+        metric: 比较的指标
+        tolerance: 允许变慢的比例
+        min_delta: 允许变慢的绝对值(毫秒)，避免极短用例的抖动误报
+
+    Returns:
+        list: [(用例名, 基线值, 本次值)]，本次值超过基线的(1+tolerance)倍且差值大于min_delta
+    """
+    regressions = []
+    for name, summary in results.items():
+        base = baseline.get(name)
+        if not base or base.get(metric) is None or summary.get(metric) is None:
+            continue
+        current, previous = summary[metric], base[metric]
+        if current > previous * (1 + tolerance) and current - previous > min_delta:
+            regressions.append((name, previous, current))
+    return regressions
+
+
+def missing_cases(results, baseline):
+    """基线中有但本次没有结果的用例，如出错或依赖未安装而没有运行的用例
+
+    Returns:
+        list: 排序后的用例名
+    """
+    return sorted(set(baseline) - set(results))
+
+
+def load_results(path):
+    """读取保存的结果JSON，返回其中的results"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def save_results(path, results, meta=None):
+    """保存结果JSON
+
+    Args:
+        path: 文件路径
+        results: {用例名: summary}
+        meta: 运行环境等附加信息
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta or {}, 'results': results}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,157 @@
+import threading
+
+import cv2
+
+
+class DerivedFrame:
+    """一帧截图及其派生图像
+
+    灰度图、缩小图、HSV、二值图等在第一次使用时计算并记住，
+    同一帧上的多次ocr/find_feature共用，每种转换每帧只做一次。
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.hits = 0
+        self.misses = 0
+        self._images = {}
+        self._lock = threading.RLock()
+
+    def get(self, key, compute):
+        """获取派生图像，没有时调用compute()计算并记住
+
+        Args:
+            key: 派生图像的键
+            compute: 无参数的计算函数
+
+        Returns:
+            派生图像
+        """
+        with self._lock:
+            image = self._images.get(key)
+            if image is None:
+                self.misses += 1
+                image = compute()
+                self._images[key] = image
+            else:
+                self.hits += 1
+            return image
+
+    @property
+    def gray(self):
+        """灰度图"""
+        if self.frame.ndim == 2:
+            return self.frame
+        return self.get('gray', lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def hsv(self):
+        """HSV图"""
+        return self.get('hsv', lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV))
+
+    def image(self, gray=False):
+        return self.gray if gray else self.frame
+
+    def scaled(self, factor, gray=False):
+        """按比例缩小的图像（INTER_AREA）
+
+        1/4等更小的比例从2倍大的缩小图继续缩小，不再从原图计算。
+
+        Args:
+            factor: 缩放比例，如0.5、0.25
+            gray: 是否使用灰度图
+
+        Returns:
+            np.ndarray: 缩小后的图像
+        """
+        if factor >= 1.0:
+            return self.image(gray)
+        return self.get(('scaled', factor, gray), lambda: self._scale(factor, gray))
+
+    def _scale(self, factor, gray):
+        base = self.image(gray)
+        width = max(1, int(round(base.shape[1] * factor)))
+        height = max(1, int(round(base.shape[0] * factor)))
+        if factor * 2 < 1.0:
+            base = self.scaled(factor * 2, gray)
+        return cv2.resize(base, (width, height), interpolation=cv2.INTER_AREA)
+
+    @property
+    def half(self):
+        return self.scaled(0.5)
+
+    @property
+    def quarter(self):
+        return self.scaled(0.25)
+
+    def binary(self, threshold=127, inverse=False):
+        """灰度图按阈值二值化
+
+        Args:
+            threshold: 阈值，小于0时使用Otsu自动阈值
+            inverse: 是否反相（暗色文字变为白色）
+
+        Returns:
+            np.ndarray: 0/255二值图
+        """
+        def compute():
+            mode = cv2.THRESH_BINARY_INV if inverse else cv2.THRESH_BINARY
+            if threshold < 0:
+                mode |= cv2.THRESH_OTSU
+            return cv2.threshold(self.gray, max(0, threshold), 255, mode)[1]
+
+        return self.get(('binary', threshold, inverse), compute)
+
+
+class DerivedFrameCache:
+    """只保留最新一帧的派生图像，新的一帧到来时释放上一帧的"""
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self.frames = 0
+        self.hits = 0
+        self.misses = 0
+        self._current = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """所有任务共享的缓存，帧来自同一个执行器"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def of(self, frame):
+        """获取帧对应的DerivedFrame，按对象identity判断是否同一帧
+
+        Args:
+            frame: 图像帧
+
+        Returns:
+            DerivedFrame: 派生图像
+        """
+        with self._lock:
+            current = self._current
+            if current is None or current.frame is not frame:
+                if current is not None:
+                    self.hits += current.hits
+                    self.misses += current.misses
+                current = DerivedFrame(frame)
+                self._current = current
+                self.frames += 1
+            return current
+
+    def stats(self):
+        """派生图像复用统计
+
+        Returns:
+            dict: 帧数、复用次数、计算次数
+        """
+        with self._lock:
+            current = self._current
+            hits = self.hits + (current.hits if current else 0)
+            misses = self.misses + (current.misses if current else 0)
+            return {'frames': self.frames, 'hits': hits, 'misses': misses}
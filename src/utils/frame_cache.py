@@ -0,0 +1,121 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import cv2
+
+
+class FrameResultCache:
+    """检测结果缓存
+
+    以 (查找区域的感知哈希, 查询参数) 为键缓存ocr/find_feature的结果，
+    画面未变化时直接返回上次结果而不再推理。使用LRU淘汰，并统计命中率。
+    """
+
+    def __init__(self, max_size=256, downscale=2, levels=32):
+        """初始化缓存
+
+        Args:
+            max_size: 最多缓存的结果数，0表示关闭缓存
+            downscale: 计算哈希时区域缩小的倍数，倍数小才能保留小字的笔画差异
+            levels: 灰度量化等级，越小越能容忍画面噪声
+        """
+        self.max_size = max_size
+        self.downscale = max(1, downscale)
+        self.quantize_shift = max(0, 8 - (max(2, levels) - 1).bit_length())
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self._hash_frame = None
+        self._hashes = {}
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def region_hash(self, frame, region=None):
+        """计算帧中区域的感知哈希，同一帧的同一区域只计算一次
+
+        Args:
+            frame: 图像帧
+            region: (x, y, width, height)，None表示整帧
+
+        Returns:
+            bytes: 区域哈希
+        """
+        with self._lock:
+            if frame is not self._hash_frame:
+                self._hash_frame = frame
+                self._hashes = {}
+            # 取出当前帧的哈希表，其它线程换帧后写入的也仍是本帧的表
+            hashes = self._hashes
+        digest = hashes.get(region)
+        if digest is None:
+            digest = self._compute_hash(frame, region)
+            hashes[region] = digest
+        return digest
+
+    def _compute_hash(self, frame, region):
+        if region is not None:
+            frame_height, frame_width = frame.shape[:2]
+            x, y, width, height = region
+            x, y = max(0, x), max(0, y)
+            frame = frame[y:min(frame_height, y + height), x:min(frame_width, x + width)]
+        if frame.size == 0:
+            return b''
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = frame.shape[:2]
+        size = (max(1, width // self.downscale), max(1, height // self.downscale))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA) if size != (width, height) else frame.copy()
+        small >>= self.quantize_shift
+        return hashlib.blake2b(small.tobytes(), digest_size=16).digest()
+
+    def get(self, key):
+        """查询缓存
+
+        Returns:
+            tuple: (是否命中, 结果)
+        """
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return True, self._results[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, result):
+        """写入缓存，超出容量时淘汰最久未使用的结果"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        """清空缓存和统计"""
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+        self._hash_frame = None
+        self._hashes = {}
+
+    def stats(self):
+        """获取命中统计
+
+        Returns:
+            dict: hits, misses, size, hit_rate
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._results),
+                'hit_rate': self.hits / total if total else 0.0,
+            }
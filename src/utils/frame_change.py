@@ -0,0 +1,90 @@
+import cv2
+import numpy as np
+
+
+class FrameChangeGate:
+    """画面变化门控
+
+    用缩略图灰度差的高百分位数判断画面是否变化，按钮等小面积的变化不会被整帧平均稀释；
+    画面变化并稳定settle_time秒后才允许执行一次昂贵的检测，长时间无变化时每max_interval秒兜底检测一次。
+    """
+
+    def __init__(self, change_threshold=10.0, settle_time=0.2, max_interval=5.0, thumb_width=96, thumb_height=54,
+                 percentile=99.0):
+        """初始化变化门控
+
+        Args:
+            change_threshold: 判定为变化的灰度差（0~255）
+            settle_time: 变化后需要保持稳定的时间（秒）
+            max_interval: 无变化时兜底检测的间隔（秒），0表示不兜底
+            thumb_width: 缩略图宽度
+            thumb_height: 缩略图高度
+            percentile: 取缩略图逐像素灰度差的百分位数，100为最大值，None为平均值
+        """
+        self.change_threshold = change_threshold
+        self.percentile = percentile
+        self.settle_time = settle_time
+        self.max_interval = max_interval
+        self.thumb_size = (thumb_width, thumb_height)
+        self.previous = None
+        self.pending = False
+        self.last_change = 0.0
+        self.last_check = 0.0
+
+    def reset(self, now):
+        """重置状态，now视为刚检测过的时间"""
+        self.previous = None
+        self.pending = False
+        self.last_change = now
+        self.last_check = now
+
+    def thumbnail(self, frame, region=None):
+        """计算区域的灰度缩略图
+
+        Args:
+            frame: 图像帧
+            region: (x, y, width, height)，None表示整帧
+
+        Returns:
+            np.ndarray: float32灰度缩略图
+        """
+        if region is not None:
+            x, y, width, height = region
+            frame = frame[max(0, y):y + height, max(0, x):x + width]
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def diff(self, frame, region=None):
+        """计算与上一帧的灰度差（按percentile统计），第一帧返回0"""
+        thumb = self.thumbnail(frame, region)
+        previous, self.previous = self.previous, thumb
+        if previous is None:
+            return 0.0
+        diff = cv2.absdiff(thumb, previous)
+        if self.percentile is None:
+            return float(diff.mean())
+        return float(np.percentile(diff, self.percentile))
+
+    def update(self, frame, now, region=None):
+        """输入新的一帧
+
+        Args:
+            frame: 图像帧
+            now: 当前时间（秒）
+            region: 关注的区域
+
+        Returns:
+            bool: 是否应该执行检测
+        """
+        if self.diff(frame, region) > self.change_threshold:
+            self.pending = True
+            self.last_change = now
+        elif self.pending and now - self.last_change >= self.settle_time:
+            self.pending = False
+            self.last_check = now
+            return True
+        if self.max_interval > 0 and now - self.last_check >= self.max_interval:
+            self.last_check = now
+            return True
+        return False
@@ -0,0 +1,207 @@
+import threading
+import time
+
+import cv2
+
+
+class Stage:
+    """截图处理阶段
+
+    几何参数（像素坐标、切片、输出缓冲区）按输入分辨率第一次遇到时计算并缓存，
+    之后每帧只做原地修改或取视图。
+    """
+
+    name = 'stage'
+
+    def __init__(self):
+        self._prepared = {}
+
+    def prepared(self, frame):
+        key = (frame.shape, frame.dtype)
+        prepared = self._prepared.get(key)
+        if prepared is None:
+            prepared = self.prepare(frame)
+            self._prepared[key] = prepared
+        return prepared
+
+    def prepare(self, frame):
+        """计算该分辨率下的参数，返回值在process时传入"""
+        return None
+
+    def process(self, frame, prepared):
+        raise NotImplementedError
+
+    def __call__(self, frame):
+        return self.process(frame, self.prepared(frame))
+
+
+def _ratio_slices(frame, box):
+    height, width = frame.shape[:2]
+    x, y, to_x, to_y = box
+    return (slice(round(y * height), round(to_y * height)), slice(round(x * width), round(to_x * width)))
+
+
+def _edge_anchored_slices(frame, box):
+    """贴着右/下边缘的区域按宽高比例取整后从边缘量起，其余边与_ratio_slices相同
+
+    与 width - int(0.13 * width) 这样按固定比例尺寸遮挡角落的写法逐像素一致。
+    """
+    height, width = frame.shape[:2]
+    x, y, to_x, to_y = box
+    start_y = height - int((to_y - y) * height) if to_y == 1 else round(y * height)
+    start_x = width - int((to_x - x) * width) if to_x == 1 else round(x * width)
+    return slice(start_y, round(to_y * height)), slice(start_x, round(to_x * width))
+
+
+class Mask(Stage):
+    """把若干区域原地填充为固定颜色（如遮挡UID、水印）
+
+    贴着右/下边缘的区域按宽高比例截断取整后从边缘量起，角落的遮挡尺寸不随起点的舍入变化。
+    """
+
+    name = 'mask'
+
+    def __init__(self, boxes, value=0):
+        """初始化遮挡阶段
+
+        Args:
+            boxes: [(x, y, to_x, to_y)]，屏幕比例坐标
+            value: 填充值
+        """
+        super().__init__()
+        self.boxes = list(boxes)
+        self.value = value
+
+    def prepare(self, frame):
+        return [_edge_anchored_slices(frame, box) for box in self.boxes]
+
+    def process(self, frame, prepared):
+        for rows, cols in prepared:
+            frame[rows, cols] = self.value
+        return frame
+
+
+class Crop(Stage):
+    """裁剪到屏幕比例区域，返回视图不复制"""
+
+    name = 'crop'
+
+    def __init__(self, x=0, y=0, to_x=1, to_y=1):
+        super().__init__()
+        self.box = (x, y, to_x, to_y)
+
+    def prepare(self, frame):
+        return _ratio_slices(frame, self.box)
+
+    def process(self, frame, prepared):
+        rows, cols = prepared
+        return frame[rows, cols]
+
+
+class _BufferedStage(Stage):
+    """输出写入预先分配的环形缓冲区的阶段
+
+    缓冲区轮流使用，同一块内存在buffers帧之后会被覆盖；
+    需要长期保存某一帧时由使用者复制（如会话录制器）。
+    每帧返回缓冲区上新的视图对象（不复制像素），按对象identity区分帧的缓存
+    （DerivedFrameCache、FrameResultCache）不会把覆盖后的缓冲区当成之前的同一帧。
+    """
+
+    def __init__(self, buffers=3):
+        super().__init__()
+        self.buffers = max(2, buffers)
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def allocate(self, output):
+        """按第一次的输出结果分配环形缓冲区"""
+        return [output] + [output.copy() for _ in range(self.buffers - 1)]
+
+    def next_buffer(self, ring):
+        with self._lock:
+            self._next = (self._next + 1) % len(ring)
+            return ring[self._next]
+
+    @staticmethod
+    def output(buffer):
+        """把写好的缓冲区包装成本帧的输出"""
+        return buffer.view()
+
+
+class Downscale(_BufferedStage):
+    """缩小到固定比例或尺寸"""
+
+    name = 'downscale'
+
+    def __init__(self, scale=0.5, size=None, interpolation=cv2.INTER_AREA, buffers=3):
+        """初始化缩放阶段
+
+        Args:
+            scale: 缩放比例，size为None时使用
+            size: 输出 (宽, 高)
+            interpolation: cv2插值方式
+            buffers: 输出缓冲区个数
+        """
+        super().__init__(buffers)
+        self.scale = scale
+        self.size = size
+        self.interpolation = interpolation
+
+    def prepare(self, frame):
+        height, width = frame.shape[:2]
+        size = self.size or (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+        return size, self.allocate(cv2.resize(frame, size, interpolation=self.interpolation))
+
+    def process(self, frame, prepared):
+        size, ring = prepared
+        return self.output(cv2.resize(frame, size, dst=self.next_buffer(ring), interpolation=self.interpolation))
+
+
+class ColorConvert(_BufferedStage):
+    """颜色空间转换，如 cv2.COLOR_BGRA2BGR、cv2.COLOR_BGR2GRAY"""
+
+    name = 'color'
+
+    def __init__(self, code, buffers=3):
+        super().__init__(buffers)
+        self.code = code
+
+    def prepare(self, frame):
+        return self.allocate(cv2.cvtColor(frame, self.code))
+
+    def process(self, frame, prepared):
+        return self.output(cv2.cvtColor(frame, self.code, dst=self.next_buffer(prepared)))
+
+
+class FramePipeline:
+    """由多个阶段组成的截图处理器，可直接作为config['screenshot_processor']
+
+    依次执行各阶段，并统计每个阶段的调用次数、总耗时和最大耗时。
+    """
+
+    def __init__(self, *stages):
+        self.stages = list(stages)
+        self._timings = [[0, 0.0, 0.0] for _ in self.stages]  # [次数, 总耗时, 最大耗时]
+
+    def __call__(self, frame):
+        if frame is None:
+            return frame
+        for stage, timing in zip(self.stages, self._timings):
+            start = time.perf_counter()
+            frame = stage(frame)
+            elapsed = time.perf_counter() - start
+            timing[0] += 1
+            timing[1] += elapsed
+            if elapsed > timing[2]:
+                timing[2] = elapsed
+        return frame
+
+    def stats(self):
+        """每个阶段的耗时统计
+
+        Returns:
+            list: [{'stage', 'count', 'mean_ms', 'max_ms'}]
+        """
+        return [{'stage': stage.name, 'count': count, 'mean_ms': round(total / count * 1000, 3) if count else 0,
+                 'max_ms': round(longest * 1000, 3)}
+                for stage, (count, total, longest) in zip(self.stages, self._timings)]
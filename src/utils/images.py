@@ -0,0 +1,26 @@
+import cv2
+import numpy as np
+
+
+def read_image(path, flags=cv2.IMREAD_COLOR):
+    """读取图片，支持中文路径
+
+    Args:
+        path: 图片路径
+        flags: cv2.imdecode的读取标志
+
+    Returns:
+        np.ndarray: 图片，读取失败返回None
+    """
+    data = np.fromfile(path, dtype=np.uint8)
+    if data.size == 0:
+        return None
+    return cv2.imdecode(data, flags)
+
+
+def resize_to(image, width, height):
+    """缩放图片到指定尺寸，缩小用区域插值，放大用三次插值"""
+    if image.shape[1] == width and image.shape[0] == height:
+        return image
+    interpolation = cv2.INTER_AREA if width < image.shape[1] else cv2.INTER_CUBIC
+    return cv2.resize(image, (width, height), interpolation=interpolation)
@@ -0,0 +1,217 @@
+import queue
+import threading
+from collections import namedtuple
+
+from src.utils.stats import summarize
+from src.utils.precise_timer import PreciseTimer
+
+# 时间线上的一个输入事件，t为相对宏开始的秒数，action为key_down/key_up/mouse_down/mouse_up
+MacroEvent = namedtuple('MacroEvent', ('t', 'action', 'key'))
+
+RELEASE_ACTIONS = {'key_down': 'key_up', 'mouse_down': 'mouse_up'}
+# 宏事件对应的交互操作名，回放时与单独调用的按键操作对比
+INTERACTION_ACTIONS = {'key_down': 'send_key_down', 'key_up': 'send_key_up',
+                       'mouse_down': 'mouse_down', 'mouse_up': 'mouse_up'}
+
+
+class Macro:
+    """输入宏，把按键/鼠标序列编译为带时间戳的事件时间线
+
+    按顺序调用key/mouse/wait，每个操作从当前游标开始，
+    操作结束后游标后移；也可以用at()指定时间点叠加同时按下的键。
+
+    Example:
+        Macro('闪避').key('w', hold=0.5).key('shift', hold=0.05, after=0.1).key('space')
+    """
+
+    def __init__(self, name='macro'):
+        self.name = name
+        self.cursor = 0.0
+        self._end = 0.0
+        self._events = []
+
+    def at(self, t):
+        """把游标移到时间点t(秒)"""
+        self.cursor = max(0.0, t)
+        return self
+
+    def wait(self, seconds):
+        """游标后移seconds秒"""
+        self.cursor += max(0.0, seconds)
+        self._end = max(self._end, self.cursor)
+        return self
+
+    def key_down(self, key):
+        self._events.append(MacroEvent(self.cursor, 'key_down', key))
+        return self
+
+    def key_up(self, key):
+        self._events.append(MacroEvent(self.cursor, 'key_up', key))
+        return self
+
+    def mouse_down(self, key='left'):
+        self._events.append(MacroEvent(self.cursor, 'mouse_down', key))
+        return self
+
+    def mouse_up(self, key='left'):
+        self._events.append(MacroEvent(self.cursor, 'mouse_up', key))
+        return self
+
+    def key(self, key, hold=0.02, after=0.0):
+        """按下key保持hold秒后释放，再等待after秒"""
+        self.key_down(key).wait(hold).key_up(key)
+        return self.wait(after)
+
+    def mouse(self, key='left', hold=0.02, after=0.0):
+        """按下鼠标键保持hold秒后释放，再等待after秒"""
+        self.mouse_down(key).wait(hold).mouse_up(key)
+        return self.wait(after)
+
+    @property
+    def duration(self):
+        """时间线总长度(秒)，包括最后的等待"""
+        return self._end
+
+    def compile(self):
+        """按时间排序的事件列表，同一时间点保持添加顺序
+
+        Returns:
+            list: [MacroEvent]
+        """
+        return sorted(self._events, key=lambda event: event.t)
+
+
+class MacroPlayback:
+    """一次宏回放，可等待结果或取消"""
+
+    def __init__(self, macro, handlers):
+        self.macro = macro
+        self.events = macro.compile()
+        self.handlers = handlers
+        self.report = None
+        self.error = None
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+
+    def cancel(self):
+        """取消回放，已按下未释放的键会被释放"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """等待回放结束
+
+        Returns:
+            bool: 是否已结束
+        """
+        return self._done.wait(timeout)
+
+    def result(self, timeout=None):
+        """等待回放结束并返回计时报告，回放出错时抛出异常"""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f'macro {self.macro.name} still playing')
+        if self.error is not None:
+            raise self.error
+        return self.report
+
+
+class MacroPlayer:
+    """在专用线程中按时间线回放输入宏
+
+    每个事件的目标时间都相对宏开始的时间计算，某个事件晚了不会推迟后面的事件（漂移补偿）；
+    等待使用PreciseTimer（sleep后忙等到目标时间）。
+    回放结束后报告实际发送时间与计划时间的误差和按键保持时间的误差。
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, timer=None):
+        """初始化回放器
+
+        Args:
+            timer: PreciseTimer，默认使用共享的计时器
+        """
+        self.timer = timer or PreciseTimer.shared()
+        self.clock = self.timer.clock
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name='input_macro', daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def shared(cls):
+        """共享的回放器，所有宏在同一线程中依次回放"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def play(self, macro, handlers):
+        """提交宏回放
+
+        Args:
+            macro: Macro
+            handlers: action -> 处理函数(key)，如 {'key_down': interaction.do_send_key_down, ...}
+
+        Returns:
+            MacroPlayback: 回放对象
+        """
+        playback = MacroPlayback(macro, handlers)
+        self._queue.put(playback)
+        return playback
+
+    def _loop(self):
+        while True:
+            playback = self._queue.get()
+            try:
+                playback.report = self._play(playback)
+            except Exception as e:
+                playback.error = e
+            finally:
+                playback._done.set()
+
+    def _play(self, playback):
+        held = {}
+        errors = []
+        holds = []
+        start = self.clock()
+        try:
+            for event in playback.events:
+                self.timer.wait_until(start + event.t, 'macro', playback._cancelled)
+                if playback.cancelled:
+                    break
+                fired = self.clock() - start
+                playback.handlers[event.action](event.key)
+                errors.append((fired - event.t) * 1000)
+                if event.action in RELEASE_ACTIONS:
+                    held[(event.action, event.key)] = (event.t, fired)
+                else:
+                    down = held.pop((self._press_of(event.action), event.key), None)
+                    if down is not None:
+                        holds.append(((fired - down[1]) - (event.t - down[0])) * 1000)
+        finally:
+            # 取消或出错时释放还按着的键
+            for action, key in held:
+                playback.handlers[RELEASE_ACTIONS[action]](key)
+        return {
+            'macro': playback.macro.name,
+            'events': len(errors),
+            'planned': round(playback.macro.duration, 3),
+            'elapsed': round(self.clock() - start, 3),
+            'cancelled': playback.cancelled,
+            'error_ms': summarize(errors),
+            'hold_error_ms': summarize(holds),
+        }
+
+    @staticmethod
+    def _press_of(release):
+        for press, expected in RELEASE_ACTIONS.items():
+            if expected == release:
+                return press
+        return None
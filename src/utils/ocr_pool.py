@@ -0,0 +1,69 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class OcrPool:
+    """OCR工作线程池
+
+    onnxruntime/OpenVINO推理时释放GIL，任务线程提交OCR后立即返回Future，
+    可以在推理的同时截取和预处理下一帧。等待中的请求数有上限，
+    队列满时submit阻塞任务线程，避免积压过时的帧。
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, workers=2, max_pending=4, serialize=False):
+        """初始化线程池
+
+        Args:
+            workers: 工作线程数
+            max_pending: 最多同时提交（排队和执行中）的请求数
+            serialize: 是否一次只执行一个请求；OCR库不支持多线程同时推理时开启
+                （如OpenVINO编译模型的默认推理请求），此时仍可与截图、预处理并行
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.submitted = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ocr')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._run_lock = threading.Lock() if serialize else None
+
+    @classmethod
+    def shared(cls, workers=2, max_pending=4, serialize=False):
+        """获取相同配置共享的线程池"""
+        key = (workers, max_pending, serialize)
+        with cls._shared_lock:
+            pool = cls._shared.get(key)
+            if pool is None:
+                pool = cls(workers, max_pending, serialize)
+                cls._shared[key] = pool
+            return pool
+
+    def submit(self, func, *args, **kwargs):
+        """提交OCR请求，等待中的请求已达上限时阻塞
+
+        Returns:
+            concurrent.futures.Future: OCR结果
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._run, func, args, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        self.submitted += 1
+        future.add_done_callback(self._release)
+        return future
+
+    def _run(self, func, args, kwargs):
+        if self._run_lock is None:
+            return func(*args, **kwargs)
+        with self._run_lock:
+            return func(*args, **kwargs)
+
+    def _release(self, future):
+        self._slots.release()
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
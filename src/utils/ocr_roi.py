@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+
+
+class OcrRoiRegistry:
+    """OCR区域学习表
+
+    记录每个match文本全屏命中时的位置（按分辨率归一化到0~1），
+    之后同一文本的全屏OCR只需在该区域加上边距的范围内识别。
+    每次命中替换原区域，命中分散在大范围内时不学习，区域不会被个别异常命中撑大。
+    """
+
+    VERSION = 1
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path, margin=0.05, max_span=0.3):
+        """初始化区域学习表
+
+        Args:
+            path: 持久化文件路径
+            margin: 查找时在学习区域四周扩展的边距（相对屏幕宽高的比例）
+            max_span: 一次命中的外接框宽或高超过该屏幕比例时不学习
+        """
+        self.path = path
+        self.margin = margin
+        self.max_span = max_span
+        self.regions = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def shared(cls, path, margin=0.05, max_span=0.3):
+        """获取指定路径共享的区域学习表，同一文件只加载一次"""
+        with cls._shared_lock:
+            registry = cls._shared.get(path)
+            if registry is None:
+                registry = cls(path, margin, max_span)
+                cls._shared[path] = registry
+            return registry
+
+    @staticmethod
+    def key_of(match):
+        """将match参数转换为表中的键
+
+        Args:
+            match: ocr的match参数
+
+        Returns:
+            str: 字符串或字符串列表对应的键，正则等无法学习的返回None
+        """
+        if isinstance(match, str):
+            return match
+        if isinstance(match, (list, tuple)) and match and all(isinstance(m, str) for m in match):
+            return '|'.join(match)
+        return None
+
+    def load(self):
+        """从文件加载已学习的区域，文件不存在或版本不符时为空表"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != self.VERSION:
+            return
+        self.regions = {key: tuple(region) for key, region in data.get('regions', {}).items()}
+
+    def save(self):
+        """保存已学习的区域"""
+        with self._lock:
+            data = {
+                'version': self.VERSION,
+                'regions': {key: list(region) for key, region in self.regions.items()},
+            }
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key):
+        """获取加上边距后的查找区域
+
+        Args:
+            key: 表中的键
+
+        Returns:
+            tuple: 归一化的 (x, y, to_x, to_y)，未学习过返回None
+        """
+        region = self.regions.get(key)
+        if region is None:
+            return None
+        x, y, to_x, to_y = region
+        return (max(0.0, x - self.margin), max(0.0, y - self.margin),
+                min(1.0, to_x + self.margin), min(1.0, to_y + self.margin))
+
+    def record(self, key, boxes, width, height):
+        """记录一次全屏命中的位置并保存，替换原区域
+
+        Args:
+            key: 表中的键
+            boxes: 命中的Box列表
+            width: 帧宽度
+            height: 帧高度
+        """
+        if not boxes or width <= 0 or height <= 0:
+            return
+        x = min(box.x for box in boxes) / width
+        y = min(box.y for box in boxes) / height
+        to_x = max(box.x + box.width for box in boxes) / width
+        to_y = max(box.y + box.height for box in boxes) / height
+        if to_x - x > self.max_span or to_y - y > self.max_span:
+            return
+        region = (round(x, 4), round(y, 4), round(min(to_x, 1.0), 4), round(min(to_y, 1.0), 4))
+        with self._lock:
+            if self.regions.get(key) == region:
+                return
+            self.regions[key] = region
+        self.save()
+
+    def forget(self, key):
+        """删除已学习的区域"""
+        with self._lock:
+            if self.regions.pop(key, None) is None:
+                return
+        self.save()
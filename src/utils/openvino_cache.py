@@ -0,0 +1,146 @@
+import hashlib
+import inspect
+import os
+import platform
+import threading
+
+import cv2
+import numpy as np
+
+_install_lock = threading.Lock()
+_core_lock = threading.Lock()
+_installed_root = None
+_cached_dirs = []  # 本进程中设置了CACHE_DIR的模型缓存目录
+
+
+def cpu_key():
+    """CPU和OpenVINO版本的标识，编译结果只能在相同的CPU和版本上复用"""
+    try:
+        import openvino
+        version = openvino.__version__
+    except (ImportError, AttributeError):
+        version = 'unknown'
+    identity = f'{platform.processor() or platform.machine()}|{os.cpu_count()}|{version}'
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()[:12]
+
+
+def model_hash(model_path):
+    """模型文件内容的哈希"""
+    digest = hashlib.sha1()
+    with open(model_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def cache_dir(cache_root, model_path):
+    """模型编译缓存目录，按模型哈希和CPU区分"""
+    return os.path.join(cache_root, f'{model_hash(model_path)}_{cpu_key()}')
+
+
+def _core_with_cache(core_class, model_path, cache_root):
+    """创建编译结果缓存到该模型缓存目录的Core"""
+    folder = cache_dir(cache_root, model_path)
+    os.makedirs(folder, exist_ok=True)
+    if folder not in _cached_dirs:
+        _cached_dirs.append(folder)
+    core = core_class()
+    core.set_property({'CACHE_DIR': folder})
+    return core
+
+
+def compile_model(model_path, cache_root, device='CPU'):
+    """编译OpenVINO模型，编译结果缓存到磁盘，之后启动直接加载不再重新编译
+
+    Args:
+        model_path: onnx模型路径
+        cache_root: 缓存根目录
+        device: 推理设备
+
+    Returns:
+        openvino.CompiledModel: 编译好的模型
+    """
+    import openvino as ov
+    return _core_with_cache(ov.Core, model_path, cache_root).compile_model(model_path, device)
+
+
+def install(cache_root):
+    """让onnxocr使用OpenVINO时启用编译结果的磁盘缓存
+
+    模型仍由onnxocr原来的PredictBase.__init__加载和编译，只在其执行期间让openvino.Core()
+    创建的Core设置CACHE_DIR，不重复实现onnxocr的初始化逻辑。
+    需要在OCR库初始化之前调用，重复调用只生效一次。
+
+    Returns:
+        bool: onnxocr可用并已启用缓存
+    """
+    global _installed_root
+    with _install_lock:
+        if _installed_root is not None:
+            return True
+        try:
+            from onnxocr.predict_base import PredictBase
+        except ImportError:
+            return False
+        original_init = PredictBase.__init__
+        signature = inspect.signature(original_init)
+
+        def init_with_cache(self, *args, **kwargs):
+            arguments = signature.bind(self, *args, **kwargs)
+            arguments.apply_defaults()
+            if not arguments.arguments.get('use_openvino'):
+                return original_init(self, *args, **kwargs)
+            import openvino as ov
+            core_class = ov.Core
+            model_path = arguments.arguments['model_dir']
+            # Core是模块属性，替换期间其他线程创建的Core也会带上缓存目录，加锁串行初始化
+            with _core_lock:
+                ov.Core = lambda: _core_with_cache(core_class, model_path, cache_root)
+                try:
+                    return original_init(self, *args, **kwargs)
+                finally:
+                    ov.Core = core_class
+
+        PredictBase.__init__ = init_with_cache
+        _installed_root = cache_root
+        return True
+
+
+def check():
+    """在OCR预热之后检查OpenVINO模型是否使用了编译缓存
+
+    install晚于OCR库创建时模型已经按原来的方式编译，不会有模型经过缓存目录；
+    经过了缓存目录但没有编译结果文件时，OpenVINO没有写入缓存（如设备不支持）。
+
+    Returns:
+        str: 问题描述，正常时返回None
+    """
+    if _installed_root is None:
+        return 'install() was not called or onnxocr is not available'
+    if not _cached_dirs:
+        return 'OCR models were compiled before install(), compiled models are not cached'
+    empty = [folder for folder in _cached_dirs
+             if not any(name.endswith('.blob') for name in os.listdir(folder))]
+    if empty:
+        return f'no compiled blobs written to {empty}'
+    return None
+
+
+def warm_up_image(width=640, height=96):
+    """生成预热用的合成图片，含有文字使检测和识别模型都会执行"""
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    cv2.putText(image, 'ok-dna 0123', (10, height * 2 // 3), cv2.FONT_HERSHEY_SIMPLEX, height / 60, (0, 0, 0), 2)
+    return image
+
+
+def warm_up(ocr_lib, image=None):
+    """用合成图片执行一次OCR，完成首次推理的初始化
+
+    Args:
+        ocr_lib: OCR库，需要有ocr(image)方法
+        image: 预热图片，默认为warm_up_image()
+
+    Returns:
+        识别结果
+    """
+    return ocr_lib.ocr(warm_up_image() if image is None else image)
@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+
+from src.utils.stats import percentile
+
+
+class PollSchedule:
+    """根据历史阶段耗时自适应的检测间隔
+
+    记录每个阶段最近window轮的耗时，阶段开始后离最早的典型结束时间还远时稀疏检测，
+    接近典型结束时间时密集检测，超过典型的最长耗时后回退到默认间隔。
+    历史数据按任务保存，重启后继续使用。
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, window=50, min_samples=3, dense_interval=0.2, sparse_interval=5.0, lead=0.8,
+                 overdue=1.2):
+        """初始化检测间隔表
+
+        Args:
+            path: 持久化文件路径
+            window: 每个阶段保留的历史轮数
+            min_samples: 历史轮数少于该值时使用默认间隔
+            dense_interval: 接近典型结束时间时的检测间隔(秒)
+            sparse_interval: 远离典型结束时间时的最大检测间隔(秒)
+            lead: 从最早典型结束时间(p10)的多少倍开始密集检测
+            overdue: 超过典型最长耗时(p95)的多少倍后回退到默认间隔
+        """
+        self.path = path
+        self.window = window
+        self.min_samples = min_samples
+        self.dense_interval = dense_interval
+        self.sparse_interval = sparse_interval
+        self.lead = lead
+        self.overdue = overdue
+        self.durations = {}
+        self._bounds = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """读取历史耗时，文件不存在或格式不符时从空白开始"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == self.VERSION:
+            self.durations = {phase: list(values)[-self.window:] for phase, values in data['phases'].items()}
+            self._bounds = {}
+
+    def save(self):
+        """保存历史耗时（先写临时文件再替换）"""
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._lock:
+            data = {'version': self.VERSION, 'phases': self.durations}
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+
+    def record(self, phase, duration):
+        """记录一轮中某阶段的耗时(秒)"""
+        with self._lock:
+            values = self.durations.setdefault(phase, [])
+            values.append(round(duration, 3))
+            del values[:-self.window]
+            self._bounds.pop(phase, None)
+
+    def bounds(self, phase):
+        """阶段开始密集检测和回退默认间隔的时间点
+
+        Returns:
+            tuple: (开始密集检测, 回退默认间隔)，历史不足时返回None
+        """
+        bounds = self._bounds.get(phase)
+        if bounds is None:
+            values = sorted(self.durations.get(phase, ()))
+            if len(values) < self.min_samples:
+                return None
+            bounds = (percentile(values, 10) * self.lead, percentile(values, 95) * self.overdue)
+            self._bounds[phase] = bounds
+        return bounds
+
+    def interval(self, phase, elapsed, default):
+        """阶段开始elapsed秒后应使用的检测间隔
+
+        Args:
+            phase: 阶段名
+            elapsed: 阶段已进行的时间(秒)
+            default: 历史不足或超过典型耗时后使用的间隔
+
+        Returns:
+            float: 检测间隔(秒)
+        """
+        bounds = self.bounds(phase)
+        if bounds is None:
+            return default
+        dense_from, overdue_at = bounds
+        if elapsed < dense_from:
+            # 间隔不超过剩余时间的一半，越接近典型结束时间检测越密
+            return min(self.sparse_interval, max(self.dense_interval, (dense_from - elapsed) / 2))
+        if elapsed <= overdue_at:
+            return self.dense_interval
+        return default
+
+    def poller(self, phase, default):
+        """返回 elapsed -> 检测间隔 的函数，供wait_for_change_then的max_interval使用
+
+        elapsed和record的耗时都应来自任务时钟（MyBaseTask.now），回放时才与虚拟时间一致。
+        """
+        return lambda elapsed: self.interval(phase, elapsed, default)
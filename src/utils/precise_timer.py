@@ -0,0 +1,138 @@
+import bisect
+import threading
+import time
+
+
+class OvershootHistogram:
+    """等待结束时间超过目标时间的分布(微秒)"""
+
+    EDGES_US = (10, 50, 100, 250, 500, 1000, 2000, 5000, 16000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.EDGES_US) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, overshoot_us):
+        self.counts[bisect.bisect_left(self.EDGES_US, overshoot_us)] += 1
+        self.count += 1
+        self.total += overshoot_us
+        if overshoot_us > self.max:
+            self.max = overshoot_us
+
+    def summary(self):
+        """汇总
+
+        Returns:
+            dict: n, 平均和最大超出(微秒)，以及各区间的次数，如 '<=100us'
+        """
+        buckets = {f'<={edge}us': count for edge, count in zip(self.EDGES_US, self.counts) if count}
+        if self.counts[-1]:
+            buckets[f'>{self.EDGES_US[-1]}us'] = self.counts[-1]
+        return {'n': self.count, 'mean_us': round(self.total / self.count, 1) if self.count else None,
+                'max_us': round(self.max, 1), 'buckets': buckets}
+
+
+class PreciseTimer:
+    """sleep与忙等结合的高精度等待
+
+    先用系统sleep等到目标时间前spin秒，剩下的时间忙等，精度不受系统定时器分辨率影响。
+    spin越大越准但占用CPU越多；spin为None时根据最近系统sleep的超出时间自动调整。
+    每次等待的超出时间按tag记录到直方图中。
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, spin=None, min_spin=0.0005, max_spin=0.02, yield_spin=True, clock=time.perf_counter):
+        """初始化计时器
+
+        Args:
+            spin: 目标时间前开始忙等的秒数，None表示自动调整
+            min_spin: 自动调整时的最小忙等时间
+            max_spin: 自动调整时的最大忙等时间
+            yield_spin: 忙等时是否让出时间片（sleep(0)），降低CPU占用，精度略差
+            clock: 高精度时钟
+        """
+        self.spin = spin
+        self.min_spin = min_spin
+        self.max_spin = max_spin
+        self.yield_spin = yield_spin
+        self.clock = clock
+        self.histograms = {}
+        self._coarse_overshoot = 0.002  # 系统sleep超出时间的滑动平均
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """共享的计时器"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @property
+    def spin_time(self):
+        """当前使用的忙等时间(秒)"""
+        if self.spin is not None:
+            return self.spin
+        return min(self.max_spin, max(self.min_spin, self._coarse_overshoot * 1.5))
+
+    def sleep(self, seconds, tag='sleep', cancelled=None):
+        """等待seconds秒
+
+        Returns:
+            float: 实际超出目标时间的秒数
+        """
+        return self.wait_until(self.clock() + seconds, tag, cancelled)
+
+    def wait_until(self, target, tag='sleep', cancelled=None):
+        """等待到时钟到达target
+
+        Args:
+            target: 目标时间（clock的读数）
+            tag: 记录超出时间的直方图名
+            cancelled: threading.Event，被设置时提前返回
+
+        Returns:
+            float: 实际超出目标时间的秒数，提前返回时为负数
+        """
+        spin = self.spin_time
+        coarse = target - spin - self.clock()
+        if coarse > 0:
+            coarse_target = target - spin
+            if cancelled is not None:
+                if cancelled.wait(coarse):
+                    return self.clock() - target
+            else:
+                time.sleep(coarse)
+            self._learn(self.clock() - coarse_target)
+        while True:
+            now = self.clock()
+            if now >= target:
+                break
+            if cancelled is not None and cancelled.is_set():
+                return now - target
+            if self.yield_spin:
+                time.sleep(0)
+        overshoot = now - target
+        self._record(tag, overshoot)
+        return overshoot
+
+    def _learn(self, coarse_overshoot):
+        if coarse_overshoot > 0:
+            self._coarse_overshoot += (coarse_overshoot - self._coarse_overshoot) * 0.1
+
+    def _record(self, tag, overshoot):
+        with self._lock:
+            histogram = self.histograms.get(tag)
+            if histogram is None:
+                histogram = self.histograms[tag] = OvershootHistogram()
+            histogram.add(overshoot * 1e6)
+
+    def stats(self):
+        """各tag的超出时间统计和当前忙等时间"""
+        with self._lock:
+            return {'spin_ms': round(self.spin_time * 1000, 3),
+                    'overshoot': {tag: histogram.summary() for tag, histogram in self.histograms.items()}}
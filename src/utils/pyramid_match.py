@@ -0,0 +1,235 @@
+import threading
+
+import cv2
+import numpy as np
+
+
+def _downscale(image, factor):
+    width = max(1, int(round(image.shape[1] * factor)))
+    height = max(1, int(round(image.shape[0] * factor)))
+    return cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def coarse_factor(template_shape, scales=(0.125, 0.25, 0.5), min_template_side=12):
+    """选择粗匹配的缩放比例，保证缩放后的模板边长不小于min_template_side
+
+    Returns:
+        float: 缩放比例，模板太小时返回1表示不使用金字塔
+    """
+    side = min(template_shape[:2])
+    for factor in scales:
+        if side * factor >= min_template_side:
+            return factor
+    return 1.0
+
+
+def _top_peaks(result, count, suppress_width, suppress_height):
+    """取相关图中前count个峰值，每取一个就抑制其邻域"""
+    result = result.copy()
+    peaks = []
+    for _ in range(count):
+        _, score, _, (x, y) = cv2.minMaxLoc(result)
+        if not np.isfinite(score) or score <= -1:
+            break
+        peaks.append((x, y, score))
+        result[max(0, y - suppress_height):y + suppress_height + 1,
+               max(0, x - suppress_width):x + suppress_width + 1] = -1
+    return peaks
+
+
+def pyramid_match(image, template, threshold, top_k=5, coarse_slack=0.25, refine_margin=2,
+                  method=cv2.TM_CCOEFF_NORMED, scaled=None):
+    """金字塔模板匹配
+
+    先在缩小的图像上做全图匹配，再只在前top_k个候选位置附近做原分辨率精匹配，
+    结果的置信度与阈值含义和原分辨率全图匹配相同。
+
+    Args:
+        image: 搜索图像
+        template: 模板图像，与image通道数相同
+        threshold: 原分辨率匹配阈值
+        top_k: 精匹配的候选数量
+        coarse_slack: 粗匹配阈值比threshold放宽的量
+        refine_margin: 精匹配窗口在候选位置四周扩展的像素（按缩放比例换算到原分辨率后再加）
+        method: 匹配方法，需为归一化的相关方法
+        scaled: 缩放比例 -> image缩小图 的函数，用于复用同一帧已计算的缩小图（如DerivedFrame.scaled）
+
+    Returns:
+        list: [(x, y, width, height, confidence)]，按置信度从高到低排序
+    """
+    template_height, template_width = template.shape[:2]
+    image_height, image_width = image.shape[:2]
+    if template_height > image_height or template_width > image_width:
+        return []
+
+    factor = coarse_factor(template.shape)
+    if factor >= 1.0:
+        candidates = [(x, y) for x, y, _ in _top_peaks(cv2.matchTemplate(image, template, method), top_k,
+                                                          template_width // 2, template_height // 2)]
+        window = 0
+    else:
+        small_image = _downscale(image, factor) if scaled is None else scaled(factor)
+        small_template = _downscale(template, factor)
+        if small_template.shape[0] > small_image.shape[0] or small_template.shape[1] > small_image.shape[1]:
+            return []
+        coarse = cv2.matchTemplate(small_image, small_template, method)
+        peaks = _top_peaks(coarse, top_k, small_template.shape[1] // 2, small_template.shape[0] // 2)
+        candidates = [(int(round(x / factor)), int(round(y / factor)))
+                      for x, y, score in peaks if score >= threshold - coarse_slack]
+        window = int(round(1 / factor)) + refine_margin
+
+    matches = []
+    for x, y in candidates:
+        left, top = max(0, x - window), max(0, y - window)
+        right = min(image_width, x + template_width + window)
+        bottom = min(image_height, y + template_height + window)
+        result = cv2.matchTemplate(image[top:bottom, left:right], template, method)
+        _, score, _, (best_x, best_y) = cv2.minMaxLoc(result)
+        if score >= threshold:
+            matches.append((left + best_x, top + best_y, template_width, template_height, float(score)))
+
+    matches.sort(key=lambda match: match[4], reverse=True)
+    unique = []
+    for match in matches:
+        if all(abs(match[0] - other[0]) >= template_width // 2 or abs(match[1] - other[1]) >= template_height // 2
+               for other in unique):
+            unique.append(match)
+    return unique
+
+
+class BatchTemplateMatcher:
+    """同一画面上的多模板批量匹配
+
+    灰度转换、各级缩小图、缩小图的FFT和积分图每帧只计算一次，
+    所有模板共享；粗匹配用FFT互相关计算与TM_CCOEFF_NORMED相同的归一化相关系数，
+    再对每个模板的候选位置做原分辨率精匹配。
+    """
+
+    def __init__(self, image, scaled=None):
+        """初始化批量匹配器
+
+        Args:
+            image: 搜索图像
+            scaled: 缩放比例 -> image缩小图 的函数，用于复用同一帧已计算的缩小图
+        """
+        self.image = image
+        self._scaled = scaled
+        self._levels = {}
+        self._lock = threading.Lock()
+
+    def _level(self, factor):
+        """获取缩放比例对应的缩小图、各通道频谱和积分图"""
+        with self._lock:
+            level = self._levels.get(factor)
+            if level is None:
+                level = self._compute_level(factor)
+                self._levels[factor] = level
+            return level
+
+    def _compute_level(self, factor):
+        if factor >= 1.0:
+            small = self.image
+        else:
+            small = _downscale(self.image, factor) if self._scaled is None else self._scaled(factor)
+        height, width = small.shape[:2]
+        dft_size = (cv2.getOptimalDFTSize(height), cv2.getOptimalDFTSize(width))
+        spectra = [self._spectrum(channel, dft_size) for channel in cv2.split(small)]
+        integral, squared = cv2.integral2(small, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+        if integral.ndim == 2:
+            integral, squared = integral[:, :, np.newaxis], squared[:, :, np.newaxis]
+        return small, dft_size, spectra, integral, squared
+
+    @staticmethod
+    def _spectrum(channel, dft_size):
+        padded = np.zeros(dft_size, dtype=np.float32)
+        padded[:channel.shape[0], :channel.shape[1]] = channel
+        return cv2.dft(padded, flags=cv2.DFT_COMPLEX_OUTPUT)
+
+    @staticmethod
+    def _window_sum(integral, height, width):
+        return (integral[height:, width:] - integral[:-height, width:]
+                - integral[height:, :-width] + integral[:-height, :-width])
+
+    def correlate(self, template, factor):
+        """在缩放比例为factor的缩小图上计算归一化相关系数图
+
+        结果与对缩小图和缩小模板做cv2.TM_CCOEFF_NORMED匹配相同。
+
+        Args:
+            template: 原分辨率模板
+            factor: 缩放比例
+
+        Returns:
+            tuple: (相关系数图, 缩小后的模板)，模板大于图像时相关系数图为None
+        """
+        small, dft_size, spectra, integral, squared = self._level(factor)
+        small_template = template if factor >= 1.0 else _downscale(template, factor)
+        template_height, template_width = small_template.shape[:2]
+        image_height, image_width = small.shape[:2]
+        if template_height > image_height or template_width > image_width:
+            return None, small_template
+        count = template_height * template_width
+
+        accumulated = None
+        template_norm = 0.0
+        for spectrum, channel in zip(spectra, cv2.split(small_template)):
+            channel = channel.astype(np.float32)
+            channel -= channel.mean()
+            template_norm += float((channel * channel).sum())
+            product = cv2.mulSpectrums(spectrum, self._spectrum(channel, dft_size), 0, conjB=True)
+            accumulated = product if accumulated is None else accumulated + product
+        template_norm = np.sqrt(template_norm)
+        correlation = cv2.idft(accumulated, flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)
+        correlation = correlation[:image_height - template_height + 1, :image_width - template_width + 1]
+
+        window_sum = self._window_sum(integral, template_height, template_width)
+        window_squared = self._window_sum(squared, template_height, template_width)
+        variance = np.maximum((window_squared - window_sum ** 2 / count).sum(axis=2), 0)
+        denominator = np.sqrt(variance) * template_norm
+        result = np.zeros(correlation.shape, dtype=np.float32)
+        valid = denominator > 1e-6 * max(1.0, template_norm)
+        result[valid] = correlation[valid] / denominator[valid]
+        return result, small_template
+
+    def match(self, templates, threshold, top_k=3, coarse_slack=0.25, refine_margin=2):
+        """批量匹配多个模板
+
+        Args:
+            templates: 名称 -> 原分辨率模板
+            threshold: 原分辨率匹配阈值
+            top_k: 每个模板精匹配的候选数量
+            coarse_slack: 粗匹配阈值比threshold放宽的量
+            refine_margin: 精匹配窗口额外扩展的像素
+
+        Returns:
+            list: [(名称, x, y, 宽, 高, 置信度)]，所有模板的结果按置信度从高到低排序
+        """
+        image_height, image_width = self.image.shape[:2]
+        matches = []
+        for name, template in templates.items():
+            template_height, template_width = template.shape[:2]
+            factor = coarse_factor(template.shape)
+            coarse, small_template = self.correlate(template, factor)
+            if coarse is None:
+                continue
+            peaks = _top_peaks(coarse, top_k, small_template.shape[1] // 2, small_template.shape[0] // 2)
+            window = 0 if factor >= 1.0 else int(round(1 / factor)) + refine_margin
+            found = []
+            for x, y, score in peaks:
+                if score < threshold - (coarse_slack if factor < 1.0 else 0):
+                    continue
+                x, y = int(round(x / factor)), int(round(y / factor))
+                left, top = max(0, x - window), max(0, y - window)
+                right = min(image_width, x + template_width + window)
+                bottom = min(image_height, y + template_height + window)
+                result = cv2.matchTemplate(self.image[top:bottom, left:right], template, cv2.TM_CCOEFF_NORMED)
+                _, score, _, (best_x, best_y) = cv2.minMaxLoc(result)
+                if score < threshold:
+                    continue
+                x, y = left + best_x, top + best_y
+                if all(abs(x - other[1]) >= template_width // 2 or abs(y - other[2]) >= template_height // 2
+                       for other in found):
+                    found.append((name, x, y, template_width, template_height, float(score)))
+            matches.extend(found)
+        matches.sort(key=lambda match: match[5], reverse=True)
+        return matches
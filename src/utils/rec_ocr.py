@@ -0,0 +1,45 @@
+import re
+import unicodedata
+
+# 识别结果中常混入的按钮图标（○常被识别为〇）、标点和空白
+_NOISE = re.compile(r'[\W_〇]+')
+
+
+def normalize_text(text):
+    """归一化OCR文本：全半角统一、去掉空白标点和图标字符、小写"""
+    return _NOISE.sub('', unicodedata.normalize('NFKC', text)).lower()
+
+
+def text_matches(text, match):
+    """归一化后比较识别文本与期望文本
+
+    Args:
+        text: 识别出的文本
+        match: 期望文本或文本列表
+
+    Returns:
+        bool: 是否与任一期望文本相同
+    """
+    if isinstance(match, str):
+        match = (match,)
+    normalized = normalize_text(text)
+    return any(normalized == normalize_text(expected) for expected in match)
+
+
+def supports_recognition(lib):
+    """OCR库是否可以跳过文本检测直接识别（onnxocr的ocr(det=False)）"""
+    return callable(getattr(lib, 'ocr', None)) and hasattr(lib, 'text_recognizer')
+
+
+def recognize(lib, images):
+    """跳过文本检测，把每张图片当作一行文字直接识别
+
+    Args:
+        lib: onnxocr的ONNXPaddleOcr
+        images: 裁剪好的BGR图片列表，批量识别
+
+    Returns:
+        list: [(文本, 置信度)]，与images一一对应
+    """
+    results = lib.ocr(list(images), det=False, rec=True, cls=False)[0]
+    return [(text, float(score)) for text, score in results]
@@ -0,0 +1,265 @@
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+def estimate_size(obj, _seen=None, _depth=0):
+    """估算对象占用的内存(字节)
+
+    numpy数组按nbytes计算（视图和内存映射不计），容器和对象属性递归累加，
+    同一对象只计算一次。
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen or _depth > 8:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        # 视图和内存映射不占用额外内存，由拥有数据的数组计算
+        return obj.nbytes if obj.base is None else 0
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return sys.getsizeof(obj)
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += estimate_size(key, _seen, _depth + 1) + estimate_size(value, _seen, _depth + 1)
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        for item in obj:
+            size += estimate_size(item, _seen, _depth + 1)
+    elif hasattr(obj, '__dict__'):
+        size += estimate_size(vars(obj), _seen, _depth + 1)
+    return size
+
+
+class _Entry:
+    __slots__ = ('name', 'factory', 'sizer', 'dispose', 'value', 'loaded', 'size', 'refs', 'hits', 'loads',
+                 'load_time', 'lock')
+
+    def __init__(self, name, factory, sizer, dispose):
+        self.name = name
+        self.factory = factory
+        self.sizer = sizer
+        self.dispose = dispose
+        self.value = None
+        self.loaded = False
+        self.size = 0
+        self.refs = 0
+        self.hits = 0
+        self.loads = 0
+        self.load_time = 0.0
+        self.lock = threading.Lock()
+
+
+class ResourceRegistry:
+    """任务间共享的惰性资源表
+
+    资源（模型、模板、分类器等）注册时只记录创建函数，第一次acquire时才加载，
+    之后所有任务共享同一份。acquire/release维护引用计数，加载后记录大小，
+    总大小超过内存上限时按最久未使用的顺序释放没有被引用的资源，下次acquire时重新加载。
+    由其他模块持有的进程级单例（模板缓存、派生图像缓存、追踪器等）通过track登记，
+    不会被释放，但大小计入总大小，内存上限同时覆盖它们。
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        """初始化资源表
+
+        Args:
+            max_bytes: 内存上限(字节)，0表示不限制
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
+        self._entries = {}
+        self._lru = OrderedDict()  # 已加载的资源，最近使用的在最后
+        self._tracked = {}  # track登记的常驻资源
+        self._lock = threading.RLock()
+
+    def register(self, name, factory, size=None, dispose=None):
+        """注册资源，已注册时保留原来的创建函数
+
+        Args:
+            name: 资源名
+            factory: 无参数的创建函数
+            size: 返回资源大小(字节)的函数，默认为estimate_size
+            dispose: 资源被释放时调用的函数（如关闭文件）
+
+        Returns:
+            bool: 是否为新注册
+        """
+        with self._lock:
+            if name in self._entries:
+                return False
+            self._entries[name] = _Entry(name, factory, size or estimate_size, dispose)
+            return True
+
+    def track(self, name, value, size=None):
+        """登记由其他模块创建和持有的常驻资源，已登记时直接返回
+
+        资源不会被释放，大小在加载新资源、修改上限和查看统计时重新估算，
+        超过内存上限时先释放其他没有被引用的资源。
+
+        Args:
+            name: 资源名
+            value: 资源对象
+            size: 返回资源大小(字节)的函数，默认为estimate_size
+
+        Returns:
+            value
+        """
+        if name in self._entries:
+            return value
+        with self._lock:
+            if name not in self._entries:
+                entry = _Entry(name, None, size or estimate_size, None)
+                entry.value = value
+                entry.loaded = True
+                entry.loads = 1
+                entry.refs = 1  # 始终被持有者引用
+                self._entries[name] = entry
+                self._tracked[name] = entry
+                self._measure(entry)
+                self._evict()
+        return value
+
+    def _measure(self, entry):
+        size = entry.sizer(entry.value)
+        self.total_bytes += size - entry.size
+        entry.size = size
+
+    def acquire(self, name, factory=None, size=None, dispose=None):
+        """获取资源并增加引用计数，未加载时加载
+
+        Args:
+            name: 资源名
+            factory: 未注册时使用的创建函数
+            size: 未注册时使用的大小函数
+            dispose: 未注册时使用的释放函数
+
+        Returns:
+            资源对象
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                if factory is None:
+                    raise KeyError(f'resource not registered: {name}')
+                self.register(name, factory, size, dispose)
+                entry = self._entries[name]
+            entry.refs += 1
+        try:
+            # 加载在全局锁外进行，同一资源只加载一次
+            with entry.lock:
+                if not entry.loaded:
+                    self._load(entry)
+                else:
+                    entry.hits += 1
+                value = entry.value
+        except BaseException:
+            with self._lock:
+                entry.refs -= 1
+            raise
+        with self._lock:
+            if name in self._lru:
+                self._lru.move_to_end(name)
+            self._evict()
+        return value
+
+    def _load(self, entry):
+        start = time.time()
+        value = entry.factory()
+        size = entry.sizer(value)
+        with self._lock:
+            entry.value = value
+            entry.size = size
+            entry.loaded = True
+            entry.loads += 1
+            entry.load_time += time.time() - start
+            self.total_bytes += size
+            self._lru[entry.name] = entry
+            for tracked in self._tracked.values():
+                self._measure(tracked)
+
+    def release(self, name):
+        """减少引用计数，超过内存上限时释放不再被引用的资源"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.refs <= 0:
+                return
+            entry.refs -= 1
+            self._evict()
+
+    @contextmanager
+    def use(self, name, factory=None, size=None, dispose=None):
+        """在with块内持有资源"""
+        value = self.acquire(name, factory, size, dispose)
+        try:
+            yield value
+        finally:
+            self.release(name)
+
+    def set_max_bytes(self, max_bytes):
+        """修改内存上限，立即按新上限释放资源"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            for entry in self._tracked.values():
+                self._measure(entry)
+            self._evict()
+
+    def evict(self, name):
+        """释放指定资源，仍被引用时不释放
+
+        Returns:
+            bool: 是否释放
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or not entry.loaded or entry.refs > 0 or name in self._tracked:
+                return False
+            self._unload(entry)
+            return True
+
+    def _evict(self):
+        if not self.max_bytes:
+            return
+        for name in list(self._lru):
+            if self.total_bytes <= self.max_bytes:
+                break
+            entry = self._lru[name]
+            if entry.refs == 0:
+                self._unload(entry)
+
+    def _unload(self, entry):
+        value = entry.value
+        del self._lru[entry.name]
+        self.total_bytes -= entry.size
+        entry.value = None
+        entry.size = 0
+        entry.loaded = False
+        self.evictions += 1
+        if entry.dispose is not None:
+            entry.dispose(value)
+
+    def stats(self):
+        """资源使用统计
+
+        Returns:
+            dict: 总大小、上限、释放次数和每个资源的大小/引用数/命中/加载次数，tracked表示是否为track登记的常驻资源
+        """
+        with self._lock:
+            for entry in self._tracked.values():
+                self._measure(entry)
+            return {
+                'total_mb': round(self.total_bytes / 1048576, 2),
+                'max_mb': round(self.max_bytes / 1048576, 2),
+                'evictions': self.evictions,
+                'resources': {
+                    name: {'loaded': entry.loaded, 'mb': round(entry.size / 1048576, 2), 'refs': entry.refs,
+                           'hits': entry.hits, 'loads': entry.loads, 'load_time': round(entry.load_time, 3),
+                           'tracked': name in self._tracked}
+                    for name, entry in self._entries.items()
+                },
+            }
@@ -0,0 +1,153 @@
+import csv
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from src.utils.stats import percentile
+
+
+class RoundMetrics:
+    """按轮次统计各阶段耗时
+
+    每个阶段保留最近window轮的耗时，计算滚动p50/p95；
+    根据最近window轮的结束时间计算每小时轮数。
+    每轮结束时可追加写入CSV，并覆盖写入Prometheus textfile。
+    """
+
+    def __init__(self, phases, window=50, clock=time.time):
+        """初始化统计
+
+        Args:
+            phases: 阶段名列表，决定CSV列和输出顺序
+            window: 滚动统计的轮数
+            clock: 时间函数
+        """
+        self.phases = list(phases)
+        self.window = window
+        self.clock = clock
+        self.durations = {phase: deque(maxlen=window) for phase in self.phases}
+        self.current = {}
+        self.round_ends = deque(maxlen=window + 1)
+        self.rounds = 0
+        self.round_start = None
+
+    def start(self):
+        """开始统计，之后的第一轮从此刻计时"""
+        self.round_start = self.clock()
+        self.round_ends.clear()
+        self.round_ends.append(self.round_start)
+
+    @contextmanager
+    def phase(self, name):
+        """统计一个阶段的耗时，同一轮内同名阶段的耗时累加"""
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.add(name, self.clock() - start)
+
+    def add(self, name, duration):
+        """记录本轮某阶段的耗时(秒)"""
+        if name not in self.durations:
+            self.phases.append(name)
+            self.durations[name] = deque(maxlen=self.window)
+        self.current[name] = self.current.get(name, 0.0) + duration
+
+    def end_round(self):
+        """结束本轮
+
+        Returns:
+            dict: 本轮各阶段耗时和总耗时
+        """
+        now = self.clock()
+        if self.round_start is None:
+            self.start()
+        row = {phase: self.current.get(phase) for phase in self.phases}
+        row['round'] = now - self.round_start
+        for phase, duration in self.current.items():
+            self.durations[phase].append(duration)
+        self.current = {}
+        self.rounds += 1
+        self.round_start = now
+        self.round_ends.append(now)
+        return row
+
+    def abort_round(self):
+        """放弃本轮：丢弃已累计的阶段耗时，下一轮从此刻重新计时，失败尝试的耗时不计入下一轮"""
+        self.current = {}
+        self.round_start = self.clock()
+
+    def rounds_per_hour(self):
+        """最近window轮的每小时轮数，还没有完成的轮次时返回0"""
+        if len(self.round_ends) < 2:
+            return 0.0
+        elapsed = self.round_ends[-1] - self.round_ends[0]
+        return (len(self.round_ends) - 1) * 3600 / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        """各阶段的滚动统计
+
+        Returns:
+            dict: {阶段名: {'count', 'p50', 'p95', 'last'}}，单位秒
+        """
+        result = {}
+        for phase in self.phases:
+            ordered = sorted(self.durations[phase])
+            result[phase] = {
+                'count': len(ordered),
+                'p50': percentile(ordered, 50),
+                'p95': percentile(ordered, 95),
+                'last': self.durations[phase][-1] if ordered else None,
+            }
+        return result
+
+    def append_csv(self, path, row):
+        """把end_round返回的一轮数据追加到CSV，文件不存在时写入表头"""
+        _ensure_folder(path)
+        new_file = not os.path.exists(path)
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(['time', 'round_index', 'round'] + self.phases)
+            values = [_seconds(row.get(phase)) for phase in self.phases]
+            writer.writerow([time.strftime('%Y-%m-%d %H:%M:%S'), self.rounds, _seconds(row['round'])] + values)
+
+    def write_prometheus(self, path, task):
+        """写入Prometheus textfile（先写临时文件再替换，避免读到一半的文件）
+
+        Args:
+            path: 文件路径，一般以.prom结尾，供node_exporter textfile collector读取
+            task: 任务名，作为task标签
+        """
+        _ensure_folder(path)
+        lines = [
+            '# HELP ok_dna_rounds_total Completed rounds.',
+            '# TYPE ok_dna_rounds_total counter',
+            f'ok_dna_rounds_total{{task="{task}"}} {self.rounds}',
+            '# HELP ok_dna_rounds_per_hour Rounds per hour over the rolling window.',
+            '# TYPE ok_dna_rounds_per_hour gauge',
+            f'ok_dna_rounds_per_hour{{task="{task}"}} {self.rounds_per_hour():.3f}',
+            '# HELP ok_dna_phase_seconds Rolling phase duration quantiles.',
+            '# TYPE ok_dna_phase_seconds summary',
+        ]
+        for phase, stats in self.summary().items():
+            for quantile in ('p50', 'p95'):
+                if stats[quantile] is not None:
+                    lines.append(f'ok_dna_phase_seconds{{task="{task}",phase="{phase}",'
+                                 f'quantile="0.{quantile[1:]}"}} {stats[quantile]:.3f}')
+            lines.append(f'ok_dna_phase_seconds_count{{task="{task}",phase="{phase}"}} {stats["count"]}')
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, path)
+
+
+def _ensure_folder(path):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+
+def _seconds(value):
+    return '' if value is None else f'{value:.3f}'
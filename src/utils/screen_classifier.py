@@ -0,0 +1,117 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from src.utils.images import read_image
+
+
+class ScreenClassifier:
+    """界面分类器
+
+    参考截图按 `<folder>/<界面名>/*.png` 存放，每张截图缩成小尺寸缩略图并归一化，
+    分类时与所有参考缩略图计算相关系数，取最相似的界面。
+    增加界面只需放入一张对应目录下的截图。
+    """
+
+    IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, folder=None, thumb_width=32, thumb_height=18, min_score=0.9):
+        """初始化界面分类器
+
+        Args:
+            folder: 参考截图目录，None表示不加载
+            thumb_width: 缩略图宽度
+            thumb_height: 缩略图高度
+            min_score: 判定为某界面需要的最低相关系数(-1~1)
+        """
+        self.thumb_size = (thumb_width, thumb_height)
+        self.min_score = min_score
+        self.labels = []
+        self._references = np.zeros((0, thumb_width * thumb_height * 3), dtype=np.float32)
+        if folder:
+            self.load(folder)
+
+    @classmethod
+    def shared(cls, folder, **kwargs):
+        """获取指定目录共享的分类器，同一目录只加载一次"""
+        with cls._shared_lock:
+            classifier = cls._shared.get(folder)
+            if classifier is None:
+                classifier = cls(folder, **kwargs)
+                cls._shared[folder] = classifier
+            return classifier
+
+    @property
+    def states(self):
+        """已加载的界面名列表"""
+        return sorted(set(self.labels))
+
+    def load(self, folder):
+        """加载目录下所有参考截图
+
+        Args:
+            folder: 参考截图目录
+        """
+        if not os.path.isdir(folder):
+            return
+        for state in sorted(os.listdir(folder)):
+            state_folder = os.path.join(folder, state)
+            if not os.path.isdir(state_folder):
+                continue
+            for file_name in sorted(os.listdir(state_folder)):
+                if not file_name.lower().endswith(self.IMAGE_EXTENSIONS):
+                    continue
+                image = read_image(os.path.join(state_folder, file_name))
+                if image is not None:
+                    self.add(state, image)
+
+    def add(self, state, frame):
+        """添加一张参考截图
+
+        Args:
+            state: 界面名
+            frame: 截图
+        """
+        feature = self.feature(frame)
+        self._references = np.vstack([self._references, feature[np.newaxis, :]])
+        self.labels.append(state)
+
+    def feature(self, frame):
+        """计算归一化的缩略图特征向量
+
+        先按步长抽样再缩放，避免对整张高分辨率截图做区域插值。
+        """
+        height, width = frame.shape[:2]
+        step = max(1, min(width // (self.thumb_size[0] * 4), height // (self.thumb_size[1] * 4)))
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        sampled = np.ascontiguousarray(frame[::step, ::step, :3])
+        thumb = cv2.resize(sampled, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+        thumb -= thumb.mean()
+        norm = np.linalg.norm(thumb)
+        if norm > 0:
+            thumb /= norm
+        return thumb
+
+    def classify(self, frame):
+        """识别当前界面
+
+        Args:
+            frame: 当前帧
+
+        Returns:
+            tuple: (界面名, 相关系数)，没有足够相似的界面时界面名为None
+        """
+        if not self.labels:
+            return None, 0.0
+        similarities = self._references @ self.feature(frame)
+        index = int(np.argmax(similarities))
+        score = float(similarities[index])
+        if score < self.min_score:
+            return None, score
+        return self.labels[index], score
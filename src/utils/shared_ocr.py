@@ -0,0 +1,250 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from src.utils.stats import summarize
+
+
+class BatchQueue:
+    """把多个线程同时提交的请求合并为一次批量调用
+
+    工作线程取到第一个请求后，在max_wait内继续收集排队的请求，
+    凑够max_batch个或凑够clients个（每个客户端最多同时等一个请求）就立即执行，
+    只有一个客户端时不等待，不增加延迟。
+    """
+
+    def __init__(self, batch_fn, max_batch=16, max_wait=0.005, workers=1, name='batch', clock=time.perf_counter):
+        """初始化批处理队列
+
+        Args:
+            batch_fn: 批量处理函数，输入请求列表，返回等长的结果列表
+            max_batch: 每批最多请求数
+            max_wait: 收集同一批请求最多等待的秒数
+            workers: 工作线程数
+            name: 线程名
+            clock: 时钟
+        """
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.clock = clock
+        self.clients = 1
+        self.requests = 0
+        self.batches = 0
+        self.busy = 0.0
+        self.largest = 0
+        self._waits = deque(maxlen=10000)
+        self._stats_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._loop, name=f'{name}_{index}', daemon=True)
+                         for index in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, item):
+        """提交请求
+
+        Returns:
+            concurrent.futures.Future: 请求的结果
+        """
+        if self._closed:
+            raise RuntimeError('batch queue closed')
+        future = Future()
+        self._queue.put((item, future, self.clock()))
+        return future
+
+    def call(self, item):
+        """提交请求并等待结果"""
+        return self.submit(item).result()
+
+    def _collect(self):
+        # 关闭标记(None)取到后放回队列，让其他工作线程也能退出
+        first = self._queue.get()
+        if first is None:
+            self._queue.put(None)
+            return None
+        batch = [first]
+        deadline = self.clock() + self.max_wait
+        limit = min(self.max_batch, max(1, self.clients))
+        while len(batch) < limit:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            start = self.clock()
+            try:
+                results = self.batch_fn([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError(f'batch_fn returned {len(results)} results for {len(batch)} requests')
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            with self._stats_lock:
+                self.requests += len(batch)
+                self.batches += 1
+                self.busy += self.clock() - start
+                self.largest = max(self.largest, len(batch))
+                self._waits.extend((start - submitted) * 1000 for _, _, submitted in batch)
+
+    def stats(self):
+        """批处理统计
+
+        Returns:
+            dict: 请求数、批次数、平均批大小、执行耗时和最近请求排队等待时间(毫秒)的分布
+        """
+        with self._stats_lock:
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'mean_batch': round(self.requests / self.batches, 2) if self.batches else None,
+                'max_batch': self.largest,
+                'busy_ms': round(self.busy * 1000, 1),
+                'queue_ms': summarize(self._waits),
+            }
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=2)
+
+
+class SharedOcrEngine:
+    """多个会话共享的OCR引擎
+
+    只加载一份模型，各会话同时提交的OCR请求动态合并：整图OCR逐张检测文字框后，
+    所有图片的文字框一起送入识别模型；跳过检测的识别请求（rec_ocr.recognize）直接合并为一次识别。
+    可作为HeadlessExecutor的ocr_engine（调用返回 [(文本, (x, y, 宽, 高), 置信度)]），
+    也可作为ocr_lib返回给任务（ocr方法与onnxocr的ONNXPaddleOcr.ocr相同）。
+    """
+
+    def __init__(self, lib=None, params=None, max_batch=16, max_wait=0.005, workers=1):
+        """初始化共享引擎
+
+        Args:
+            lib: 已加载的OCR库（ONNXPaddleOcr或有相同ocr方法的对象），None时第一次使用时按params加载onnxocr
+            params: ONNXPaddleOcr的参数，src.config中config['ocr']['params']
+            max_batch: 每批最多请求数
+            max_wait: 收集同一批请求最多等待的秒数
+            workers: 批处理线程数
+        """
+        self.params = params or {}
+        self._lib = lib
+        self._load_lock = threading.Lock()
+        self._ocr_queue = BatchQueue(self._ocr_batch, max_batch, max_wait, workers, name='shared_ocr')
+        self._rec_queue = BatchQueue(self._rec_batch, max_batch, max_wait, workers, name='shared_rec')
+        self.sessions = 0
+
+    @property
+    def model(self):
+        """共享的OCR库，所有会话只加载一次"""
+        if self._lib is None:
+            with self._load_lock:
+                if self._lib is None:
+                    from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+                    self._lib = ONNXPaddleOcr(**self.params)
+        return self._lib
+
+    def attach(self):
+        """登记一个使用引擎的会话，用于判断每批最多能凑到多少请求"""
+        self.sessions += 1
+        self._ocr_queue.clients = self._rec_queue.clients = self.sessions
+        return self
+
+    @property
+    def text_recognizer(self):
+        return getattr(self.model, 'text_recognizer', None)
+
+    def __call__(self, image):
+        """整图OCR
+
+        Returns:
+            list: [(文本, (x, y, 宽, 高), 置信度)]
+        """
+        results = []
+        for points, (text, score) in self._ocr_queue.call(image):
+            xs = [point[0] for point in points]
+            ys = [point[1] for point in points]
+            results.append((text, (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)), score))
+        return results
+
+    def ocr(self, img, det=True, rec=True, cls=True):
+        """与ONNXPaddleOcr.ocr相同的接口，检测+识别和只识别的请求合并处理，其他情况直接调用模型"""
+        if det and rec:
+            return [self._ocr_queue.call(img)]
+        if rec and not det:
+            images = img if isinstance(img, list) else [img]
+            if not cls or not getattr(self.model, 'use_angle_cls', False):
+                return [self._rec_queue.call(images)]
+        return self.model.ocr(img, det=det, rec=rec, cls=cls)
+
+    def _rec_batch(self, requests):
+        images = [image for request in requests for image in request]
+        results = self.model.ocr(images, det=False, rec=True, cls=False)[0]
+        split = []
+        start = 0
+        for request in requests:
+            split.append(list(results[start:start + len(request)]))
+            start += len(request)
+        return split
+
+    def _ocr_batch(self, images):
+        lib = self.model
+        if not hasattr(lib, 'text_detector') or not hasattr(lib, 'text_recognizer'):
+            return [lib.ocr(image)[0] or [] for image in images]
+        from onnxocr.predict_system import sorted_boxes
+        from onnxocr.utils import get_minarea_rect_crop, get_rotate_crop_image
+
+        crop = get_rotate_crop_image if lib.args.det_box_type == 'quad' else get_minarea_rect_crop
+        boxes = []
+        crops = []
+        for image in images:
+            detected = lib.text_detector(image)
+            if detected is None or isinstance(detected, tuple) or not len(detected):
+                detected = []
+            else:
+                detected = sorted_boxes(detected)
+            boxes.append(detected)
+            crops.extend(crop(image, box.copy()) for box in detected)
+        if crops and lib.use_angle_cls:
+            crops, _ = lib.text_classifier(crops)
+        recognized = lib.text_recognizer(crops) if crops else []
+        results = []
+        start = 0
+        for detected in boxes:
+            results.append([[box.tolist(), (text, score)]
+                            for box, (text, score) in zip(detected, recognized[start:start + len(detected)])
+                            if score >= lib.drop_score])
+            start += len(detected)
+        return results
+
+    def stats(self):
+        """整图OCR和只识别请求的批处理统计"""
+        return {'sessions': self.sessions, 'ocr': self._ocr_queue.stats(), 'rec': self._rec_queue.stats()}
+
+    def close(self):
+        self._ocr_queue.close()
+        self._rec_queue.close()
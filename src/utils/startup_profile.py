@@ -0,0 +1,80 @@
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+# 导入时间输出中前置代码结束的标记，之前的导入不计入被测模块
+PRELUDE_END = 'startup_profile: prelude done'
+# 启动过程中的时间点，第一个为进程启动（导入本模块）时
+_marks = {'process_start': time.time()}
+
+
+def mark(name):
+    """记录启动过程中的一个时间点，同名只记录第一次"""
+    _marks.setdefault(name, time.time())
+
+
+def marks():
+    """各时间点距进程启动的秒数，按时间排序"""
+    start = _marks['process_start']
+    return {name: round(at - start, 3) for name, at in sorted(_marks.items(), key=lambda item: item[1])}
+
+
+def parse_importtime(text):
+    """解析 python -X importtime 的输出
+
+    Returns:
+        dict: 模块名 -> (自身耗时ms, 含依赖的累计耗时ms)
+    """
+    times = {}
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        times.setdefault(name, (int(parts[0]) / 1000, int(parts[1]) / 1000))
+    return times
+
+
+def import_times(module, prelude=''):
+    """在新进程中导入模块，测量该模块及其依赖的导入耗时
+
+    Args:
+        module: 模块名
+        prelude: 导入前执行的代码（如替换ok模块），其中导入的模块不计入结果
+
+    Returns:
+        dict: 模块名 -> (自身耗时ms, 累计耗时ms)
+    """
+    code = f'{prelude}\nimport sys\nprint({PRELUDE_END!r}, file=sys.stderr, flush=True)\nimport {module}'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            cwd=os.getcwd())
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else module)
+    return parse_importtime(result.stderr.split(PRELUDE_END, 1)[-1])
+
+
+def project_modules(times, package='src'):
+    """导入耗时中属于本项目的模块，用于检查任务模块导入时带入了哪些工具模块
+
+    Returns:
+        list: [(模块名, 自身耗时ms)]，按模块名排序
+    """
+    return sorted((name, self_ms) for name, (self_ms, _) in times.items()
+                  if name == package or name.startswith(package + '.'))
+
+
+def task_init_time(module, class_name, *args, **kwargs):
+    """导入任务类并创建一次实例，分别计时
+
+    Returns:
+        tuple: (导入耗时ms, 初始化耗时ms, 任务对象)
+    """
+    start = time.perf_counter()
+    task_class = getattr(importlib.import_module(module), class_name)
+    imported = time.perf_counter()
+    task = task_class(*args, **kwargs)
+    return (imported - start) * 1000, (time.perf_counter() - imported) * 1000, task
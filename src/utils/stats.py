@@ -0,0 +1,38 @@
+import math
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_samples, percent):
+    """计算已排序样本的百分位数（线性插值）
+
+    Args:
+        sorted_samples: 升序排列的样本
+        percent: 百分位 0~100
+
+    Returns:
+        float: 百分位数，样本为空返回None
+    """
+    if not sorted_samples:
+        return None
+    position = (len(sorted_samples) - 1) * percent / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+
+def summarize(samples):
+    """汇总耗时样本(毫秒)
+
+    Returns:
+        dict: n, mean, min, max 和 p50/p95/p99
+    """
+    ordered = sorted(samples)
+    summary = {'n': len(ordered),
+               'mean': round(sum(ordered) / len(ordered), 3) if ordered else None,
+               'min': round(ordered[0], 3) if ordered else None,
+               'max': round(ordered[-1], 3) if ordered else None}
+    for percent in PERCENTILES:
+        value = percentile(ordered, percent)
+        summary[f'p{percent}'] = round(value, 3) if value is not None else None
+    return summary
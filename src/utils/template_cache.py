@@ -0,0 +1,284 @@
+import hashlib
+import json
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from src.utils.asset_bundle import AssetBundle, write_bundle
+from src.utils.images import read_image, resize_to
+
+
+def source_hash(coco_json):
+    """计算coco标注文件及其引用的所有图片的哈希
+
+    Args:
+        coco_json: coco格式标注文件路径
+
+    Returns:
+        str: 十六进制哈希
+    """
+    folder = os.path.dirname(coco_json)
+    with open(coco_json, 'rb') as f:
+        data = f.read()
+    digest = hashlib.blake2b(data, digest_size=16)
+    for image in sorted(json.loads(data)['images'], key=lambda item: item['id']):
+        digest.update(image['file_name'].encode('utf-8'))
+        with open(os.path.join(folder, image['file_name']), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def source_stamp(coco_json):
+    """获取coco标注文件及其引用图片的大小和修改时间，用于快速判断源文件是否变化
+
+    只读取文件属性不读取图片内容，启动耗时不随模板图片大小增长。
+    修改时间变化而内容不变（同步、checkout）时由load比较内容哈希后更新记录。
+
+    Returns:
+        list: [[文件名, 大小, 修改时间]]，源文件缺失时返回None
+    """
+    folder = os.path.dirname(coco_json)
+    try:
+        with open(coco_json, 'r', encoding='utf-8') as f:
+            file_names = [image['file_name'] for image in sorted(json.load(f)['images'], key=lambda item: item['id'])]
+        stamp = []
+        for file_name in [os.path.basename(coco_json)] + file_names:
+            stat = os.stat(os.path.join(folder, file_name))
+            stamp.append([file_name, stat.st_size, stat.st_mtime_ns])
+        return stamp
+    except OSError:
+        return None
+
+
+def load_coco_templates(coco_json):
+    """按coco标注从原图中裁剪模板
+
+    Args:
+        coco_json: coco格式标注文件路径
+
+    Returns:
+        dict: 特征名 -> (模板BGR图, (x, y, 原图宽, 原图高))，同名特征只取第一个标注
+    """
+    folder = os.path.dirname(coco_json)
+    with open(coco_json, 'r', encoding='utf-8') as f:
+        coco = json.load(f)
+    images = {image['id']: image for image in coco['images']}
+    categories = {category['id']: category['name'] for category in coco['categories']}
+    loaded = {}
+    templates = {}
+    for annotation in coco['annotations']:
+        name = categories[annotation['category_id']]
+        if name in templates:
+            continue
+        image_info = images[annotation['image_id']]
+        image = loaded.get(image_info['id'])
+        if image is None:
+            image = read_image(os.path.join(folder, image_info['file_name']))
+            loaded[image_info['id']] = image
+        x, y, width, height = (int(round(value)) for value in annotation['bbox'])
+        # 标注坐标相对于images中记录的原图尺寸，图片文件可能已被裁剪压缩
+        source_width = image_info.get('width') or image.shape[1]
+        source_height = image_info.get('height') or image.shape[0]
+        mat = np.ascontiguousarray(image[y:y + height, x:x + width])
+        templates[name] = (mat, (x, y, source_width, source_height))
+    return templates
+
+
+class TemplateCache:
+    """按分辨率预计算的模板缓存
+
+    把coco标注中的每个模板按所有支持的分辨率、匹配使用的颜色空间预先缩放，
+    编译成一个带版本和源文件哈希的资源包；启动时内存映射读取，无需解码和缩放，
+    模板都是映射文件上的零拷贝视图。源文件变化时自动重建，遇到未预计算的分辨率时现算并记住。
+    资源包只供本项目的模板匹配（金字塔匹配、find_best_of、回放）使用，ok框架的feature_set仍按coco标注自行加载。
+    """
+
+    VERSION = 2
+    COLOR_SPACES = ('bgr', 'gray')
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, coco_json, path, resolutions):
+        """初始化模板缓存
+
+        Args:
+            coco_json: coco格式标注文件路径
+            path: 资源包路径
+            resolutions: 需要预计算的分辨率列表 [(宽, 高)]
+        """
+        self.coco_json = coco_json
+        self.path = path
+        self.resolutions = [tuple(resolution) for resolution in resolutions]
+        self.source_hash = None
+        self.source_stamp = None
+        self.sources = {}
+        self.boxes = {}
+        self.templates = {}
+        self.bundle = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, coco_json, path, resolutions):
+        """获取共享的模板缓存，首次获取时加载或重建"""
+        with cls._shared_lock:
+            cache = cls._shared.get(path)
+            if cache is None:
+                cache = cls(coco_json, path, resolutions)
+                cache.load_or_build()
+                cls._shared[path] = cache
+            return cache
+
+    @staticmethod
+    def key(name, resolution, color_space):
+        return f'{name}@{resolution[0]}x{resolution[1]}:{color_space}'
+
+    @staticmethod
+    def source_key(name):
+        return f'{name}@source'
+
+    def load_or_build(self):
+        """读取资源包，不存在、版本不符或源文件已变化时重建并保存
+
+        Returns:
+            bool: 是否从资源包读取
+        """
+        if self.load():
+            return True
+        self.build()
+        self.save()
+        return False
+
+    def load(self):
+        """内存映射读取资源包
+
+        源文件的大小和修改时间与编译时相同时直接使用；不同时再比较内容哈希，
+        一致则在取出模板视图之前重写资源包的记录；源文件缺失时信任资源包。
+
+        Returns:
+            bool: 是否读取成功
+        """
+        try:
+            bundle = AssetBundle(self.path)
+        except (OSError, ValueError):
+            return False
+        meta = bundle.meta
+        stamp = source_stamp(self.coco_json)
+        valid = meta.get('version') == self.VERSION
+        restamp = valid and stamp is not None and stamp != meta.get('source_stamp')
+        if restamp:
+            valid = source_hash(self.coco_json) == meta.get('source_hash')
+        if not valid:
+            bundle.close()
+            return False
+        if restamp:
+            bundle = self._restamp(bundle, stamp)
+        self.bundle = bundle
+        self.source_hash = meta.get('source_hash')
+        self.source_stamp = stamp
+        self.boxes = {name: tuple(box) for name, box in meta['boxes'].items()}
+        self.sources = {name: bundle.get(self.source_key(name)) for name in self.boxes}
+        self.templates = {key: bundle.get(key) for key in bundle.names() if not key.endswith('@source')}
+        return True
+
+    def _restamp(self, bundle, stamp):
+        """更新资源包中记录的源文件属性并重新打开
+
+        在取出任何视图之前复制数据并释放映射，Windows上才能替换该文件。
+        """
+        arrays = {name: np.array(bundle.get(name)) for name in bundle.names()}
+        meta = dict(bundle.meta, source_stamp=stamp)
+        bundle.close()
+        write_bundle(self.path, arrays, meta)
+        return AssetBundle(self.path)
+
+    def build(self):
+        """编译coco标注：裁剪模板并计算所有分辨率、颜色空间的缩放结果"""
+        templates = load_coco_templates(self.coco_json)
+        self.source_hash = source_hash(self.coco_json)
+        self.source_stamp = source_stamp(self.coco_json)
+        self.sources = {name: mat for name, (mat, _) in templates.items()}
+        self.boxes = {name: box for name, (_, box) in templates.items()}
+        self.templates = {}
+        for resolution in self.resolutions:
+            for name in self.sources:
+                self._compute(name, resolution)
+
+    def save(self):
+        """保存为资源包
+
+        已从资源包读取时先把模板复制到内存再释放映射；调用方仍持有的旧视图会让映射保持打开，
+        此时Windows上替换文件会失败。
+        """
+        meta = {
+            'version': self.VERSION,
+            'source_hash': self.source_hash,
+            'source_stamp': self.source_stamp,
+            'resolutions': self.resolutions,
+            'boxes': self.boxes,
+        }
+        arrays = {self.source_key(name): mat for name, mat in self.sources.items()}
+        arrays.update(self.templates)
+        if self.bundle is not None:
+            self.sources = {name: np.array(mat) for name, mat in self.sources.items()}
+            self.templates = {key: np.array(mat) for key, mat in self.templates.items()}
+            arrays = {key: np.array(mat) for key, mat in arrays.items()}
+            self.bundle.close()
+            self.bundle = None
+        write_bundle(self.path, arrays, meta)
+
+    def _compute(self, name, resolution):
+        """计算指定分辨率下所有颜色空间的模板"""
+        x, y, source_width, source_height = self.boxes[name]
+        source = self.sources[name]
+        width = max(1, int(round(source.shape[1] * resolution[0] / source_width)))
+        height = max(1, int(round(source.shape[0] * resolution[1] / source_height)))
+        scaled = np.ascontiguousarray(resize_to(source, width, height))
+        self.templates[self.key(name, resolution, 'bgr')] = scaled
+        self.templates[self.key(name, resolution, 'gray')] = cv2.cvtColor(scaled, cv2.COLOR_BGR2GRAY)
+
+    def get(self, name, resolution, color_space='bgr'):
+        """获取指定分辨率和颜色空间的模板
+
+        Args:
+            name: 特征名
+            resolution: (宽, 高)
+            color_space: 'bgr' 或 'gray'
+
+        Returns:
+            np.ndarray: 模板，特征不存在返回None
+        """
+        key = self.key(name, resolution, color_space)
+        template = self.templates.get(key)
+        if template is None and name in self.sources:
+            with self._lock:
+                if key not in self.templates:
+                    self._compute(name, tuple(resolution))
+                template = self.templates[key]
+        return template
+
+    def box(self, name, resolution):
+        """获取特征在指定分辨率下的标注位置
+
+        Returns:
+            tuple: (x, y, 宽, 高)，特征不存在返回None
+        """
+        if name not in self.boxes:
+            return None
+        x, y, source_width, source_height = self.boxes[name]
+        template = self.get(name, resolution)
+        return (int(round(x * resolution[0] / source_width)), int(round(y * resolution[1] / source_height)),
+                template.shape[1], template.shape[0])
+
+
+if __name__ == "__main__":
+    from src.config import config
+
+    cache_config = config['template_matching']
+    cache = TemplateCache(cache_config['coco_feature_json'], cache_config['template_cache'],
+                          config['supported_resolution']['resize_to'])
+    cache.build()
+    cache.save()
+    print(f'built {len(cache.templates)} templates for {len(cache.sources)} features -> {cache.path}')
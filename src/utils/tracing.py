@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class Span:
+    """一段计时区间，作为上下文管理器使用，退出时写入Tracer"""
+
+    __slots__ = ('tracer', 'name', 'category', 'tags', 'start')
+
+    def __init__(self, tracer, name, category, tags):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.tags = tags
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.tags['error'] = exc_type.__name__
+        self.tracer.add(self.name, self.category, self.start, end - self.start, self.tags)
+        return False
+
+    def tag(self, key, value):
+        """设置标签，如命中结果"""
+        self.tags[key] = value
+
+
+class Tracer:
+    """低开销的区间追踪
+
+    区间记录在固定容量的环形缓冲区中，写满后丢弃最早的记录，
+    可导出为Chrome trace-event JSON，在 chrome://tracing 或 Perfetto 中查看。
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, capacity=20000, enabled=True):
+        """初始化追踪器
+
+        Args:
+            capacity: 最多保留的区间数量
+            enabled: 是否记录
+        """
+        self.enabled = enabled
+        self.spans = deque(maxlen=capacity)
+        self.origin = time.perf_counter_ns()
+        self.origin_wall = time.time()
+
+    @classmethod
+    def shared(cls, capacity=20000, enabled=True):
+        """获取进程内共享的追踪器，参数只在首次创建时使用"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(capacity, enabled)
+            return cls._shared
+
+    def span(self, name, category='task', **tags):
+        """创建区间
+
+        Args:
+            name: 区间名，如 ocr、sleep
+            category: 分类
+            **tags: 标签
+
+        Returns:
+            Span: 上下文管理器
+        """
+        return Span(self, name, category, tags)
+
+    def add(self, name, category, start, duration, tags):
+        """记录一个已结束的区间，start和duration为纳秒"""
+        if self.enabled:
+            self.spans.append((name, category, start, duration, threading.get_ident(), tags))
+
+    def clear(self):
+        self.spans.clear()
+
+    def chrome_trace(self):
+        """转换为Chrome trace-event格式
+
+        Returns:
+            dict: {'traceEvents': [...]}，时间单位为微秒
+        """
+        pid = os.getpid()
+        events = []
+        for name, category, start, duration, thread, tags in list(self.spans):
+            events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': thread,
+                           'ts': (start - self.origin) / 1000, 'dur': duration / 1000,
+                           'args': {key: _jsonable(value) for key, value in tags.items()}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'start_time': self.origin_wall}}
+
+    def export_chrome_trace(self, path):
+        """保存为Chrome trace-event JSON文件"""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+    def summary(self):
+        """按区间名汇总次数和总耗时(秒)"""
+        totals = {}
+        for name, _, _, duration, _, _ in list(self.spans):
+            count, total = totals.get(name, (0, 0))
+            totals[name] = (count + 1, total + duration)
+        return {name: {'count': count, 'total': round(total / 1e9, 3)} for name, (count, total) in totals.items()}
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return str(value)
@@ -0,0 +1,214 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from src.utils.derived_frame import DerivedFrameCache
+
+
+class Trigger:
+    """调度器中的一个触发器"""
+
+    def __init__(self, name, check, regions=None, priority=0, min_interval=0.0, budget=0.05, max_interval=0.0):
+        """初始化触发器
+
+        Args:
+            name: 名称
+            check: 检查函数(frame)，返回True表示触发并执行了操作
+            regions: 依赖的区域列表 [(x, y, to_x, to_y)]，按屏幕比例，None表示整帧
+            priority: 优先级，越大越先执行
+            min_interval: 两次执行的最小间隔(秒)
+            budget: 允许占用的CPU比例，如0.05表示平均每秒最多执行50毫秒
+            max_interval: 画面不变时最长多久也执行一次(秒)，0表示不强制执行
+        """
+        self.name = name
+        self.check = check
+        self.regions = [tuple(region) for region in regions] if regions else [None]
+        self.priority = priority
+        self.min_interval = min_interval
+        self.budget = budget
+        self.max_interval = max_interval
+        self.dirty = True
+        self.last_run = None
+        self.next_allowed = 0.0
+        self.runs = 0
+        self.fired = 0
+        self.errors = 0
+        self.total_cost = 0.0
+        self.max_cost = 0.0
+        self.skipped_unchanged = 0
+        self.skipped_interval = 0
+        self.skipped_budget = 0
+
+    def report(self):
+        """累计耗时统计"""
+        return {
+            'priority': self.priority,
+            'runs': self.runs,
+            'fired': self.fired,
+            'errors': self.errors,
+            'total_ms': round(self.total_cost * 1000, 3),
+            'mean_ms': round(self.total_cost * 1000 / self.runs, 3) if self.runs else None,
+            'max_ms': round(self.max_cost * 1000, 3),
+            'skipped_unchanged': self.skipped_unchanged,
+            'skipped_interval': self.skipped_interval,
+            'skipped_budget': self.skipped_budget,
+        }
+
+
+class TriggerScheduler:
+    """按画面变化调度触发器
+
+    触发器声明依赖的屏幕区域，每帧先对所有区域各算一次灰度缩略图差值（共享灰度图，
+    在1/4缩小图上计算，多个触发器声明同一区域时只算一次），只有依赖的区域变化过的触发器才会执行。
+    画面不动时每帧只有缩略图比较的开销，触发器再多也几乎不占CPU。
+
+    执行顺序按优先级从高到低；每个触发器执行后根据耗时和budget推迟下次允许执行的时间
+    （耗时/budget），保证平均CPU占用不超过budget；frame_budget限制每帧所有触发器的总耗时，
+    超出时剩下的触发器保留变化标记，下一帧再执行。
+    """
+
+    def __init__(self, change_threshold=4.0, frame_budget=0.05, thumb_width=32, thumb_height=18, gate_scale=0.25,
+                 clock=time.perf_counter, derived_frames=None):
+        """初始化调度器
+
+        Args:
+            change_threshold: 区域缩略图平均灰度差超过该值视为变化
+            frame_budget: 每帧所有触发器的总耗时上限(秒)，0表示不限制
+            thumb_width: 缩略图宽度
+            thumb_height: 缩略图高度
+            gate_scale: 区域比较使用的缩小灰度图比例，与其他检测共享同一张缩小图
+            clock: 时钟
+            derived_frames: DerivedFrameCache，默认使用共享的缓存
+        """
+        self.change_threshold = change_threshold
+        self.frame_budget = frame_budget
+        self.thumb_size = (thumb_width, thumb_height)
+        self.gate_scale = gate_scale
+        self.clock = clock
+        self.derived_frames = derived_frames or DerivedFrameCache.shared()
+        self.triggers = []
+        self.ticks = 0
+        self.gate_cost = 0.0
+        self._thumbs = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, check, **kwargs):
+        """添加触发器，参数见Trigger
+
+        Returns:
+            Trigger: 添加的触发器
+        """
+        trigger = Trigger(name, check, **kwargs)
+        with self._lock:
+            self.triggers.append(trigger)
+            self.triggers.sort(key=lambda t: -t.priority)
+        return trigger
+
+    def remove(self, name):
+        with self._lock:
+            self.triggers = [trigger for trigger in self.triggers if trigger.name != name]
+
+    def mark_dirty(self, name=None):
+        """强制触发器下一帧执行，None表示所有触发器"""
+        for trigger in self.triggers:
+            if name is None or trigger.name == name:
+                trigger.dirty = True
+
+    def changed_regions(self, frame):
+        """计算各区域相对上一帧是否变化
+
+        Args:
+            frame: 图像帧
+
+        Returns:
+            set: 变化的区域，第一帧时所有区域都视为变化
+        """
+        gray = self.derived_frames.of(frame).scaled(self.gate_scale, gray=True)
+        height, width = gray.shape[:2]
+        changed = set()
+        regions = {region for trigger in self.triggers for region in trigger.regions}
+        for region in regions:
+            if region is None:
+                crop = gray
+            else:
+                x, y, to_x, to_y = region
+                crop = gray[int(y * height):max(int(to_y * height), int(y * height) + 1),
+                            int(x * width):max(int(to_x * width), int(x * width) + 1)]
+            thumb = cv2.resize(crop, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.float32)
+            previous = self._thumbs.get(region)
+            self._thumbs[region] = thumb
+            if previous is None or float(cv2.absdiff(thumb, previous).mean()) > self.change_threshold:
+                changed.add(region)
+        return changed
+
+    def tick(self, frame, now=None):
+        """处理一帧，执行需要执行的触发器
+
+        Args:
+            frame: 图像帧，None时不做任何事
+            now: 当前时间，默认为clock()
+
+        Returns:
+            list: 本帧执行的触发器名称
+        """
+        if frame is None:
+            return []
+        start = self.clock()
+        now = start if now is None else now
+        with self._lock:
+            triggers = list(self.triggers)
+            changed = self.changed_regions(frame)
+        self.ticks += 1
+        self.gate_cost += self.clock() - start
+        ran = []
+        spent = 0.0
+        for trigger in triggers:
+            if not trigger.dirty and any(region in changed for region in trigger.regions):
+                trigger.dirty = True
+            due = (trigger.max_interval > 0 and trigger.last_run is not None
+                   and now - trigger.last_run >= trigger.max_interval)
+            if not trigger.dirty and not due:
+                trigger.skipped_unchanged += 1
+                continue
+            if trigger.last_run is not None and now - trigger.last_run < trigger.min_interval:
+                trigger.skipped_interval += 1
+                continue
+            if now < trigger.next_allowed or (0 < self.frame_budget <= spent):
+                trigger.skipped_budget += 1
+                continue
+            spent += self._run(trigger, frame, now)
+            ran.append(trigger.name)
+        return ran
+
+    def _run(self, trigger, frame, now):
+        trigger.dirty = False
+        trigger.last_run = now
+        start = self.clock()
+        try:
+            if trigger.check(frame):
+                trigger.fired += 1
+        except Exception:
+            trigger.errors += 1
+            raise
+        finally:
+            cost = self.clock() - start
+            trigger.runs += 1
+            trigger.total_cost += cost
+            trigger.max_cost = max(trigger.max_cost, cost)
+            if trigger.budget > 0:
+                trigger.next_allowed = now + cost / trigger.budget
+        return cost
+
+    def report(self):
+        """各触发器的累计耗时和区域比较的开销
+
+        Returns:
+            dict: ticks, gate_ms（区域比较总耗时）, triggers（名称 -> Trigger.report()）
+        """
+        return {
+            'ticks': self.ticks,
+            'gate_ms': round(self.gate_cost * 1000, 3),
+            'triggers': {trigger.name: trigger.report() for trigger in self.triggers},
+        }
@@ -0,0 +1,77 @@
+"""启动耗时分析
+
+对config中的每个任务:
+    在新进程中测量导入任务模块的累计耗时，其中自身耗时最多的依赖模块，以及随之导入的本项目模块
+    创建一次任务实例，测量__init__耗时（使用无界面的执行器，不需要游戏窗口）
+用于跟踪启动到界面可用的时间，找出导入或初始化过慢的任务。
+
+用法:
+    python startup_profile.py
+    python startup_profile.py --top 10 --json startup_profile.json
+"""
+import argparse
+import importlib.util
+import json
+import sys
+
+from src.replay import headless
+
+HEADLESS_PRELUDE = 'import sys; from src.replay import headless; sys.modules["ok"] = headless'
+# 真实的ok库可用时按真实环境测量导入耗时
+REAL_OK = importlib.util.find_spec('ok') is not None
+
+sys.modules['ok'] = headless
+
+from src.config import config  # noqa: E402
+from src.utils.startup_profile import import_times, project_modules, task_init_time  # noqa: E402
+
+
+def task_entries():
+    """config中的任务 (模块, 类名)，跳过ok自带的任务"""
+    return [(module, class_name) for module, class_name in config['onetime_tasks'] + config['trigger_tasks']
+            if module != 'ok']
+
+
+def profile_task(module, class_name, top):
+    row = {'task': f'{module}:{class_name}'}
+    try:
+        times = import_times(module, '' if REAL_OK else HEADLESS_PRELUDE)
+        row['import_ms'] = times.get(module, (0, 0))[1]
+        heaviest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        row['heaviest_imports'] = [(name, self_ms) for name, (self_ms, _) in heaviest]
+        row['project_modules'] = project_modules(times)
+    except ImportError as e:
+        row['import_error'] = str(e)
+    try:
+        executor = headless.HeadlessExecutor(config, ocr_engine=lambda image: [])
+        _, init_ms, _ = task_init_time(module, class_name, executor=executor)
+        row['init_ms'] = round(init_ms, 2)
+    except Exception as e:
+        row['init_error'] = f'{type(e).__name__}: {e}'
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Task import and init time report')
+    parser.add_argument('--top', type=int, default=5, help='每个任务列出自身导入耗时最多的模块数')
+    parser.add_argument('--json', help='保存结果的路径')
+    args = parser.parse_args()
+
+    rows = [profile_task(module, class_name, args.top) for module, class_name in task_entries()]
+    for row in rows:
+        import_ms = f"{row['import_ms']:.1f}ms" if 'import_ms' in row else row['import_error']
+        init_ms = f"{row['init_ms']:.1f}ms" if 'init_ms' in row else row['init_error']
+        print(f"{row['task']}: 导入 {import_ms}, 初始化 {init_ms}")
+        if 'project_modules' in row:
+            modules = row['project_modules']
+            print(f"    项目模块 {len(modules)}个 {sum(self_ms for _, self_ms in modules):.1f}ms: "
+                  f"{', '.join(name for name, _ in modules)}")
+        for name, self_ms in row.get('heaviest_imports', ()):
+            print(f'    {self_ms:8.1f}ms  {name}')
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'real_ok': REAL_OK, 'tasks': rows}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
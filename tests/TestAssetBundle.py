@@ -0,0 +1,55 @@
+# Test case
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.utils.asset_bundle import AssetBundle, write_bundle
+
+
+class TestAssetBundle(unittest.TestCase):
+
+    def test_round_trip_zero_copy(self):
+        arrays = {
+            'lizibeier@source': np.random.randint(0, 255, (70, 81, 3), dtype=np.uint8),
+            'lizibeier@1920x1080:gray': np.random.randint(0, 255, (70, 81), dtype=np.uint8),
+            'empty': np.zeros((0,), dtype=np.uint8),
+        }
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'templates.bundle')
+            write_bundle(path, arrays, {'version': 2})
+            bundle = AssetBundle(path)
+            try:
+                self.assertEqual({'version': 2}, bundle.meta)
+                self.assertEqual(list(arrays), bundle.names())
+                for name, array in arrays.items():
+                    view = bundle.get(name)
+                    np.testing.assert_array_equal(array, view)
+                    self.assertFalse(view.flags.owndata)
+                    self.assertFalse(view.flags.writeable)
+                self.assertIsNone(bundle.get('missing'))
+            finally:
+                bundle.close()
+
+    def test_views_outlive_close(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'templates.bundle')
+            write_bundle(path, {'a': np.arange(10, dtype=np.uint8)})
+            bundle = AssetBundle(path)
+            view = bundle.get('a')
+            bundle.close()
+            self.assertEqual(9, int(view[-1]))
+            del view
+
+    def test_rejects_other_files(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'result.json')
+            with open(path, 'wb') as f:
+                f.write(b'{"images": [], "annotations": []}')
+            with self.assertRaises(ValueError):
+                AssetBundle(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
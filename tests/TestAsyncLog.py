@@ -0,0 +1,46 @@
+# Test case
+import unittest
+
+from src.utils.async_log import AsyncLog
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAsyncLog(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = []
+        self.clock = FakeClock()
+        self.log = AsyncLog(lambda level, message: self.lines.append((level, message)), flush_interval=60,
+                            rate=1, burst=3, clock=self.clock)
+
+    def tearDown(self):
+        self.log.close()
+
+    def test_deferred_format_and_coalesce(self):
+        for _ in range(3):
+            self.log.info('随机移动: {}', 'w')
+        self.assertEqual(self.lines, [])
+        self.log.debug('完成 {} 次', 3)
+        self.log.flush()
+        self.assertEqual(self.lines, [('info', '随机移动: w'), ('info', '随机移动: w ×2'), ('debug', '完成 3 次')])
+
+    def test_rate_limit_per_site(self):
+        results = [self.log.info('检测 {}', i) for i in range(10)]
+        self.assertEqual(results.count(True), 3)
+        self.assertTrue(self.log.info('其它位置'))
+        self.clock.now = 1.0
+        self.log.info('检测 {}', 10)
+        self.log.flush()
+        self.assertEqual(self.lines[-2:], [('info', '其它位置'), ('info', '检测 10 (限速省略7条)')])
+        self.assertEqual(self.log.suppressed, 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
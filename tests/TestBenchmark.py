@@ -0,0 +1,38 @@
+# Test case
+import unittest
+
+from src.utils.benchmark import BenchmarkSuite, compare, missing_cases
+from src.utils.stats import percentile, summarize
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_percentiles(self):
+        samples = list(range(1, 101))
+        self.assertAlmostEqual(50.5, percentile(samples, 50))
+        self.assertAlmostEqual(99.01, percentile(samples, 99))
+        summary = summarize(reversed(samples))
+        self.assertEqual(100, summary['n'])
+        self.assertEqual(1, summary['min'])
+        self.assertAlmostEqual(95.05, summary['p95'])
+
+    def test_compare_with_baseline(self):
+        baseline = {'ocr/full': {'p95': 100.0}, 'find_feature/a': {'p95': 0.5}, 'removed': {'p95': 1.0}}
+        results = {'ocr/full': {'p95': 130.0}, 'find_feature/a': {'p95': 1.2}, 'new': {'p95': 50.0}}
+        # find_feature/a 变慢超过比例但绝对值小于min_delta，不算变慢
+        self.assertEqual([('ocr/full', 100.0, 130.0)], compare(results, baseline))
+        self.assertEqual([], compare(results, baseline, tolerance=0.5))
+        self.assertEqual(['removed'], missing_cases(results, baseline))
+
+    def test_suite_records_errors(self):
+        suite = BenchmarkSuite(repeat=3, warmup=1)
+        suite.add('ok', lambda: None)
+        suite.add('broken', lambda: 1 / 0)
+        results = suite.run(log=None)
+        self.assertEqual(['ok'], list(results))
+        self.assertEqual(3, results['ok']['n'])
+        self.assertIn('ZeroDivisionError', suite.errors['broken'])
+
+
+if __name__ == '__main__':
+    unittest.main()
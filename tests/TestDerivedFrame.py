@@ -0,0 +1,36 @@
+# Test case
+import unittest
+
+import cv2
+import numpy as np
+
+from src.utils.derived_frame import DerivedFrameCache
+
+
+class TestDerivedFrame(unittest.TestCase):
+
+    def test_derived_images_computed_once_per_frame(self):
+        cache = DerivedFrameCache()
+        frame = np.random.randint(0, 255, (72, 128, 3), dtype=np.uint8)
+        derived = cache.of(frame)
+        self.assertIs(cache.of(frame), derived)
+        gray = derived.gray
+        self.assertIs(derived.gray, gray)
+        self.assertTrue(np.array_equal(gray, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)))
+        self.assertEqual(derived.quarter.shape, (18, 32, 3))
+        self.assertIs(derived.scaled(0.5), derived.half)
+        self.assertEqual(derived.hsv.shape, frame.shape)
+        self.assertEqual(set(np.unique(derived.binary(-1))) - {0, 255}, set())
+        self.assertEqual(cache.stats(), {'frames': 1, 'hits': 4, 'misses': 5})
+
+    def test_new_frame_releases_previous(self):
+        cache = DerivedFrameCache()
+        first = cache.of(np.zeros((8, 8, 3), dtype=np.uint8))
+        first.gray
+        second = cache.of(np.zeros((8, 8, 3), dtype=np.uint8))
+        self.assertIsNot(first, second)
+        self.assertEqual(cache.stats()['frames'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# Test case
+import unittest
+
+import numpy as np
+
+from src.utils.frame_change import FrameChangeGate
+
+
+class TestFrameChangeGate(unittest.TestCase):
+
+    def setUp(self):
+        self.static = np.zeros((720, 1280, 3), dtype=np.uint8)
+        self.changed = self.static.copy()
+        self.changed[200:500, 300:900] = 200
+
+    def test_check_after_change_settles(self):
+        gate = FrameChangeGate(settle_time=0.2, max_interval=0)
+        gate.reset(0)
+        self.assertFalse(gate.update(self.static, 0.0))
+        self.assertFalse(gate.update(self.static, 0.1))
+        self.assertFalse(gate.update(self.changed, 0.2))
+        self.assertFalse(gate.update(self.changed, 0.3))
+        self.assertTrue(gate.update(self.changed, 0.45))
+        self.assertFalse(gate.update(self.changed, 0.5))
+
+    def test_fallback_interval(self):
+        gate = FrameChangeGate(max_interval=5)
+        gate.reset(0)
+        self.assertFalse(gate.update(self.static, 1))
+        self.assertTrue(gate.update(self.static, 5))
+        self.assertFalse(gate.update(self.static, 6))
+
+    def test_small_change_not_averaged_away(self):
+        gate = FrameChangeGate(change_threshold=10, max_interval=0)
+        gate.reset(0)
+        button = self.static.copy()
+        button[600:680, 1000:1200] = 200
+        gate.update(self.static, 0)
+        # 整帧平均差不到4，逐像素差的99百分位仍能发现变化
+        self.assertGreater(gate.diff(button), 10)
+        # 按钮更小时只关注按钮所在区域
+        small = self.static.copy()
+        small[700:720, 1200:1260] = 200
+        gate.update(self.static, 0)
+        self.assertLess(gate.diff(small), 10)
+        region = (1100, 660, 180, 60)
+        gate.update(self.static, 0, region)
+        self.assertGreater(gate.diff(small, region), 10)
+
+    def test_region_ignores_outside_change(self):
+        gate = FrameChangeGate(max_interval=0)
+        gate.reset(0)
+        region = (1000, 600, 280, 120)
+        gate.update(self.static, 0, region)
+        self.assertEqual(0.0, gate.diff(self.changed, region))
+
+
+if __name__ == '__main__':
+    unittest.main()
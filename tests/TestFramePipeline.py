@@ -0,0 +1,56 @@
+# Test case
+import unittest
+
+import cv2
+import numpy as np
+
+from src.utils.derived_frame import DerivedFrameCache
+from src.utils.frame_cache import FrameResultCache
+from src.utils.frame_pipeline import ColorConvert, Crop, Downscale, FramePipeline, Mask
+
+
+class TestFramePipeline(unittest.TestCase):
+
+    def test_mask_and_crop_do_not_copy(self):
+        frame = np.full((100, 200, 3), 255, dtype=np.uint8)
+        pipeline = FramePipeline(Mask([(0.5, 0.9, 1, 1)]), Crop(0, 0.5, 1, 1))
+        result = pipeline(frame)
+        self.assertTrue(np.shares_memory(result, frame))
+        self.assertEqual(result.shape, (50, 200, 3))
+        self.assertEqual(frame[95, 150].tolist(), [0, 0, 0])
+        self.assertEqual(frame[95, 50].tolist(), [255, 255, 255])
+
+    def test_corner_mask_matches_fixed_size_slice(self):
+        mask = Mask([(0.87, 0.975, 1, 1)], value=0)
+        for width, height in ((1920, 1080), (1280, 720), (1600, 900), (2560, 1440), (1366, 768)):
+            frame = np.full((height, width, 3), 255, dtype=np.uint8)
+            expected = frame.copy()
+            expected[height - int(0.025 * height):, width - int(0.13 * width):] = 0
+            self.assertTrue(np.array_equal(expected, mask(frame)), (width, height))
+
+    def test_buffered_stages_reuse_output(self):
+        pipeline = FramePipeline(Downscale(0.5, buffers=2), ColorConvert(cv2.COLOR_BGR2GRAY, buffers=2))
+        frames = [np.random.randint(0, 255, (64, 128, 3), dtype=np.uint8) for _ in range(3)]
+        outputs = [pipeline(frame) for frame in frames]
+        self.assertEqual(outputs[0].shape, (32, 64))
+        self.assertFalse(np.shares_memory(outputs[0], outputs[1]))
+        self.assertTrue(np.shares_memory(outputs[0], outputs[2]))
+        expected = cv2.cvtColor(cv2.resize(frames[2], (64, 32), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        self.assertTrue(np.array_equal(outputs[2], expected))
+        self.assertEqual([stat['count'] for stat in pipeline.stats()], [3, 3])
+
+    def test_reused_buffer_is_new_frame_for_caches(self):
+        # 复用的缓冲区每帧是新的数组对象，按identity缓存的派生图像和区域哈希不会误用上一轮的结果
+        pipeline = FramePipeline(Downscale(0.5, buffers=2))
+        derived_frames = DerivedFrameCache()
+        results = FrameResultCache()
+        for value in (10, 120, 240):
+            output = pipeline(np.full((64, 128, 3), value, dtype=np.uint8))
+            if value == 120:
+                continue  # 任务没有取到的帧，之后的帧与第一帧使用同一块缓冲区
+            self.assertEqual(derived_frames.of(output).gray[0, 0], value)
+            self.assertEqual(results.region_hash(output), FrameResultCache().region_hash(output.copy()))
+
+
+if __name__ == '__main__':
+    unittest.main()
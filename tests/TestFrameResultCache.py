@@ -0,0 +1,56 @@
+# Test case
+import unittest
+
+import numpy as np
+
+from src.utils.frame_cache import FrameResultCache
+
+
+class TestFrameResultCache(unittest.TestCase):
+
+    def test_same_region_same_hash(self):
+        cache = FrameResultCache()
+        frame = np.random.randint(0, 255, (1440, 2560, 3), dtype=np.uint8)
+        self.assertEqual(cache.region_hash(frame), cache.region_hash(frame.copy()))
+
+    def test_changed_region_changes_hash(self):
+        cache = FrameResultCache()
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        changed = frame.copy()
+        changed[900:1000, 1500:1800] = 255
+        self.assertNotEqual(cache.region_hash(frame), cache.region_hash(changed))
+        region = (0, 0, 960, 540)
+        self.assertEqual(cache.region_hash(frame, region), cache.region_hash(changed, region))
+
+    def test_small_text_changes_hash(self):
+        cache = FrameResultCache()
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        frame[1000:1020, 1700:1780] = 200
+        changed = frame.copy()
+        # 按钮文字中一个笔画的差异
+        changed[1005:1015, 1740:1742] = 0
+        self.assertNotEqual(cache.region_hash(frame), cache.region_hash(changed))
+        self.assertNotEqual(cache.region_hash(frame, (1600, 980, 300, 60)),
+                            cache.region_hash(changed, (1600, 980, 300, 60)))
+
+    def test_lru_eviction_and_stats(self):
+        cache = FrameResultCache(max_size=2)
+        cache.put('a', [1])
+        cache.put('b', [2])
+        self.assertEqual((True, [1]), cache.get('a'))
+        cache.put('c', [3])
+        self.assertEqual((False, None), cache.get('b'))
+        self.assertEqual((True, [3]), cache.get('c'))
+        stats = cache.stats()
+        self.assertEqual(2, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(2, stats['size'])
+
+    def test_disabled(self):
+        cache = FrameResultCache(max_size=0)
+        cache.put('a', [1])
+        self.assertEqual((False, None), cache.get('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
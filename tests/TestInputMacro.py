@@ -0,0 +1,52 @@
+# Test case
+import threading
+import time
+import unittest
+
+from src.utils.input_macro import Macro, MacroPlayer
+
+
+class TestInputMacro(unittest.TestCase):
+
+    def test_compile_timeline(self):
+        macro = Macro('dodge').key('w', hold=0.5).key('shift', hold=0.05, after=0.1)
+        macro.at(0.2).mouse('right', hold=0.1)
+        events = [(round(t, 3), action, key) for t, action, key in macro.compile()]
+        self.assertEqual(events, [(0.0, 'key_down', 'w'), (0.2, 'mouse_down', 'right'), (0.3, 'mouse_up', 'right'),
+                                  (0.5, 'key_up', 'w'), (0.5, 'key_down', 'shift'), (0.55, 'key_up', 'shift')])
+        self.assertAlmostEqual(macro.duration, 0.65)
+
+    def test_playback_on_schedule(self):
+        fired = []
+        handlers = {action: (lambda key, action=action: fired.append((time.perf_counter(), action, key)))
+                    for action in ('key_down', 'key_up', 'mouse_down', 'mouse_up')}
+        macro = Macro()
+        for _ in range(5):
+            macro.key('4', hold=0.02, after=0.03)
+        report = MacroPlayer().play(macro, handlers).result(5)
+        self.assertEqual(report['events'], 10)
+        self.assertFalse(report['cancelled'])
+        self.assertLess(report['error_ms']['max'], 20)
+        self.assertEqual(report['hold_error_ms']['n'], 5)
+        start = fired[0][0]
+        self.assertAlmostEqual(fired[-1][0] - start, 0.22, delta=0.02)
+
+    def test_cancel_releases_held_keys(self):
+        fired = []
+        pressed = threading.Event()
+
+        def key_down(key):
+            fired.append(('down', key))
+            pressed.set()
+
+        handlers = {'key_down': key_down, 'key_up': lambda key: fired.append(('up', key))}
+        playback = MacroPlayer().play(Macro().key('w', hold=10), handlers)
+        pressed.wait(5)
+        playback.cancel()
+        report = playback.result(5)
+        self.assertTrue(report['cancelled'])
+        self.assertEqual(fired, [('down', 'w'), ('up', 'w')])
+
+
+if __name__ == '__main__':
+    unittest.main()
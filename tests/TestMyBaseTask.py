@@ -0,0 +1,184 @@
+# Test case
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from src.replay import headless
+
+sys.modules['ok'] = headless
+
+from src.config import config, trace_option  # noqa: E402
+from src.tasks.MyBaseTask import MyBaseTask  # noqa: E402
+from src.utils.ocr_pool import OcrPool  # noqa: E402
+from src.utils.ocr_roi import OcrRoiRegistry  # noqa: E402
+
+
+class ButtonOcr:
+    """亮色矩形当作按钮文字的OCR库，支持整图识别和跳过检测直接识别"""
+
+    text_recognizer = None
+
+    def __init__(self):
+        self.full = 0
+        self.rec = 0
+
+    def __call__(self, image):
+        self.full += 1
+        ys, xs = np.nonzero(image[:, :, 0] > 100)
+        if not len(xs):
+            return []
+        return [('确认选择', (int(xs.min()), int(ys.min()), int(np.ptp(xs)) + 1, int(np.ptp(ys)) + 1), 0.99)]
+
+    def ocr(self, images, det=True, rec=True, cls=True):
+        self.rec += 1
+        return [[('确认选择', 0.99) if (image[:, :, 0] > 100).mean() > 0.2 else ('', 0.0) for image in images]]
+
+
+def button_frame(x, y):
+    frame = np.zeros((360, 640, 3), dtype=np.uint8)
+    if x is not None:
+        frame[y:y + 20, x:x + 80] = 200
+    return frame
+
+
+class TestMyBaseTask(unittest.TestCase):
+
+    def setUp(self):
+        self.threads = []
+        self.recorded = []
+
+        def engine(image):
+            self.threads.append(threading.current_thread().name)
+            return [('确认选择', (10, 10, 80, 20), 0.99)]
+
+        self.executor = headless.HeadlessExecutor(config, ocr_engine=engine,
+                                                  image=np.zeros((360, 640, 3), dtype=np.uint8))
+        self.executor.ocr_pool = OcrPool(workers=2, max_pending=4)
+        self.task = self.executor.create_task(MyBaseTask)
+        self.task.detection_cache.max_size = 0
+        record_frame = self.task._record_frame
+
+        def record(frame):
+            self.recorded.append(threading.current_thread().name)
+            record_frame(frame)
+
+        self.task._record_frame = record
+
+    def tearDown(self):
+        self.executor.ocr_pool.shutdown()
+
+    def test_pipeline_only_with_explicit_zero_settle_time(self):
+        self.assertTrue(self.task.wait_ocr(match='确认选择', time_out=1))
+        self.assertEqual([threading.current_thread().name], list(set(self.threads)))
+
+        self.threads.clear()
+        self.recorded.clear()
+        self.assertTrue(self.task.wait_ocr(match='确认选择', time_out=1, settle_time=0))
+        self.assertTrue(all(name.startswith('ocr') for name in self.threads))
+        # 线程池只执行检测，录制等任务状态在任务线程读写
+        self.assertTrue(self.recorded)
+        self.assertEqual([threading.current_thread().name], list(set(self.recorded)))
+
+    def test_detect_region_from_ratios(self):
+        self.assertIsNone(self.task._detect_region({}))
+        self.assertEqual((320, 180, 320, 180), self.task._detect_region({'x': 0.5, 'y': 0.5}))
+        self.assertEqual((64, 36, 128, 72), self.task._detect_region({'x': 0.1, 'y': 0.1, 'to_x': 0.3, 'to_y': 0.3}))
+        self.assertEqual((64, 36, 64, 36), self.task._detect_region({'x': 0.1, 'y': 0.1, 'width': 0.1, 'height': 0.1}))
+        box = headless.Box(1, 2, 3, 4)
+        self.assertEqual((1, 2, 3, 4), self.task._detect_region({'x': 0.5, 'box': box}))
+
+    def test_current_screen_without_references(self):
+        self.task.SCREEN_FOLDER = os.path.join(tempfile.gettempdir(), 'no_screens')
+        self.assertIsNone(self.task.current_screen())
+        self.assertTrue(self.task.maybe_on_screen('reward_selection'))
+        # 没有参考截图时不截图也不分类
+        self.assertEqual([], self.recorded)
+
+    def test_shared_singletons_count_towards_cap(self):
+        self.task.precise_sleep(0)
+        resources = self.task.resources.stats()['resources']
+        for name in (f'ocr_roi:{MyBaseTask.OCR_ROI_FILE}', 'tracer', 'precise_timer'):
+            self.assertTrue(resources[name]['tracked'], name)
+
+    def test_macro_recorded_once_on_task_thread(self):
+        actions = []
+        self.task._record_action = lambda action, **fields: actions.append(
+            (action, threading.current_thread().name, fields))
+        report = self.task.play_macro(self.task.macro('jump').key('space').mouse('left'))
+
+        self.assertEqual(4, report['events'])
+        self.assertEqual(1, len(actions))
+        action, thread, fields = actions[0]
+        self.assertEqual(('macro', threading.current_thread().name, 'jump'), (action, thread, fields['name']))
+        self.assertEqual(['key_down', 'key_up', 'mouse_down', 'mouse_up'], [event[1] for event in fields['events']])
+        self.assertEqual(['send_key_down', 'send_key_up', 'mouse_down', 'mouse_up'],
+                         [step['action'] for step in self.executor.steps])
+
+    def test_tracer_records_only_when_export_enabled(self):
+        self.task.tracer.clear()
+        self.task.ocr(match='确认选择')
+        self.assertEqual(0, len(self.task.tracer.spans))
+
+        self.task.get_global_config(trace_option)['Export Trace'] = True
+        self.task.ocr(match='确认选择')
+        self.assertEqual(['ocr'], [span[0] for span in self.task.tracer.spans])
+        self.assertEqual(self.task.TRACE_CAPACITY, self.task.tracer.spans.maxlen)
+
+
+class TestOcrFixed(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.lib = ButtonOcr()
+        self.executor = headless.HeadlessExecutor(config, ocr_engine=self.lib, image=button_frame(100, 100))
+        self.task = self.executor.create_task(MyBaseTask)
+        self.task.detection_cache.max_size = 0
+        self.task.ocr_roi = OcrRoiRegistry(os.path.join(self.folder.name, 'ocr_roi.json'), margin=0)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_relearn_and_forget(self):
+        key = '奖励/确认选择'
+        self.assertTrue(self.task.ocr_fixed('确认选择', key=key))
+        learned = self.task.ocr_roi.regions[key]
+        full = self.lib.full
+        self.assertTrue(self.task.ocr_fixed('确认选择', key=key))
+        self.assertEqual(full, self.lib.full)
+
+        # 按钮换了位置，记住的位置未命中时回退全屏识别并重新学习
+        self.executor.image = button_frame(400, 250)
+        result = self.task.ocr_fixed('确认选择', key=key)
+        self.assertEqual((400, 250), (result[0].x, result[0].y))
+        self.assertNotEqual(learned, self.task.ocr_roi.regions[key])
+        self.assertIsNone(self.task.ocr_roi.regions.get('确认选择'))
+
+        self.executor.image = button_frame(None, None)
+        for _ in range(self.task.OCR_ROI_FORGET_MISSES - 1):
+            self.assertFalse(self.task.ocr_fixed('确认选择', key=key))
+        self.assertIn(key, self.task.ocr_roi.regions)
+        self.assertFalse(self.task.ocr_fixed('确认选择', key=key))
+        self.assertNotIn(key, self.task.ocr_roi.regions)
+
+    def test_learned_box(self):
+        self.assertIsNone(self.task.learned_box('确认选择'))
+        self.task.ocr_fixed('确认选择')
+        box = self.task.learned_box('确认选择')
+        self.assertEqual((100, 100, 80, 20), (box.x, box.y, box.width, box.height))
+
+    def test_ocr_forgets_roi_after_repeated_misses(self):
+        self.task._ocr_roi_keys = {'确认选择'}
+        self.assertTrue(self.task.ocr(match='确认选择'))
+        self.assertIn('确认选择', self.task.ocr_roi.regions)
+        self.executor.image = button_frame(None, None)
+        for _ in range(self.task.OCR_ROI_FORGET_MISSES):
+            self.assertFalse(self.task.ocr(match='确认选择'))
+        self.assertNotIn('确认选择', self.task.ocr_roi.regions)
+
+
+if __name__ == '__main__':
+    unittest.main()
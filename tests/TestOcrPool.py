@@ -0,0 +1,47 @@
+# Test case
+import threading
+import time
+import unittest
+
+from src.utils.ocr_pool import OcrPool
+
+
+class TestOcrPool(unittest.TestCase):
+
+    def test_parallel_and_serialized(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_ocr(index):
+            with lock:
+                active.append(index)
+                peak.append(len(active))
+            time.sleep(0.05)  # 推理释放GIL
+            with lock:
+                active.remove(index)
+            return index
+
+        for serialize, expected_peak in ((False, 2), (True, 1)):
+            peak.clear()
+            pool = OcrPool(workers=2, max_pending=4, serialize=serialize)
+            futures = [pool.submit(fake_ocr, index) for index in range(4)]
+            self.assertEqual([0, 1, 2, 3], [future.result() for future in futures])
+            self.assertEqual(expected_peak, max(peak))
+            pool.shutdown()
+
+    def test_submit_blocks_when_full(self):
+        release = threading.Event()
+        pool = OcrPool(workers=1, max_pending=2)
+        pool.submit(release.wait)
+        pool.submit(release.wait)
+        submitted = threading.Event()
+        threading.Thread(target=lambda: (pool.submit(lambda: None), submitted.set()), daemon=True).start()
+        self.assertFalse(submitted.wait(0.1))
+        release.set()
+        self.assertTrue(submitted.wait(1))
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+# Test case
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from src.utils.ocr_roi import OcrRoiRegistry
+
+
+class TestOcrRoiRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'ocr_roi.json')
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_key_of(self):
+        self.assertEqual('撤离', OcrRoiRegistry.key_of('撤离'))
+        self.assertEqual('开始挑战', OcrRoiRegistry.key_of(['开始挑战']))
+        self.assertEqual('继续挑战|○继续挑战', OcrRoiRegistry.key_of(['继续挑战', '○继续挑战']))
+        self.assertIsNone(OcrRoiRegistry.key_of(None))
+
+    def test_record_normalized_and_persisted(self):
+        registry = OcrRoiRegistry(self.path, margin=0.0)
+        boxes = [SimpleNamespace(x=1280, y=720, width=256, height=144)]
+        registry.record('确认选择', boxes, 2560, 1440)
+        self.assertEqual((0.5, 0.5, 0.6, 0.6), registry.get('确认选择'))
+
+        reloaded = OcrRoiRegistry(self.path, margin=0.0)
+        self.assertEqual((0.5, 0.5, 0.6, 0.6), reloaded.get('确认选择'))
+
+    def test_margin_clamped(self):
+        registry = OcrRoiRegistry(self.path, margin=0.1)
+        registry.record('撤离', [SimpleNamespace(x=0, y=0, width=192, height=108)], 1920, 1080)
+        x, y, to_x, to_y = registry.get('撤离')
+        self.assertEqual((0.0, 0.0), (x, y))
+        self.assertAlmostEqual(0.2, to_x)
+        self.assertAlmostEqual(0.2, to_y)
+        self.assertIsNone(registry.get('开始挑战'))
+
+    def test_scattered_hits_not_learned(self):
+        registry = OcrRoiRegistry(self.path, margin=0.0, max_span=0.3)
+        registry.record('确认选择', [SimpleNamespace(x=1280, y=720, width=256, height=144)], 2560, 1440)
+        # 同一帧两处命中相距太远，不把区域扩大到两者的外接框
+        registry.record('确认选择', [SimpleNamespace(x=100, y=100, width=256, height=144),
+                                     SimpleNamespace(x=2200, y=1200, width=256, height=144)], 2560, 1440)
+        self.assertEqual((0.5, 0.5, 0.6, 0.6), registry.get('确认选择'))
+        registry.forget('确认选择')
+        self.assertIsNone(OcrRoiRegistry(self.path).get('确认选择'))
+
+
+if __name__ == '__main__':
+    unittest.main()
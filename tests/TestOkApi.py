@@ -0,0 +1,92 @@
+# Test case
+import ast
+import importlib.machinery
+import inspect
+import os
+import sys
+import unittest
+
+from src.replay import headless
+
+sys.modules['ok'] = headless
+
+from src.tasks.MyBaseTask import MyBaseTask  # noqa: E402
+
+
+def ok_stub_path():
+    """已安装的ok-script附带的接口声明文件，按sys.path查找，不受sys.modules中替换的ok影响"""
+    spec = importlib.machinery.PathFinder.find_spec('ok')
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    path = os.path.join(list(spec.submodule_search_locations)[0], '__init__.pyi')
+    return path if os.path.exists(path) else None
+
+
+def stub_parameters(args):
+    names = [arg.arg for arg in args.posonlyargs + args.args]
+    if args.vararg is not None:
+        names.append(args.vararg.arg)
+    names += [arg.arg for arg in args.kwonlyargs]
+    if args.kwarg is not None:
+        names.append(args.kwarg.arg)
+    return [name for name in names if name != 'self']
+
+
+def stub_classes(path):
+    """解析接口声明，返回 类名 -> 方法名 -> 参数名列表（含继承的方法，不含self）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    declared = {}
+    bases = {}
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            bases[node.name] = [base.id for base in node.bases if isinstance(base, ast.Name)]
+            declared[node.name] = {item.name: stub_parameters(item.args)
+                                   for item in node.body if isinstance(item, ast.FunctionDef)}
+
+    def methods(name):
+        merged = {}
+        for base in bases.get(name, ()):
+            merged.update(methods(base))
+        merged.update(declared.get(name, {}))
+        return merged
+
+    return {name: methods(name) for name in declared}
+
+
+def parameter_names(function):
+    return [name for name in inspect.signature(function).parameters if name != 'self']
+
+
+@unittest.skipUnless(ok_stub_path(), 'ok-script is not installed')
+class TestOkApi(unittest.TestCase):
+    """回放用的ok接口子集和按位置转发参数的列表须与固定版本的ok-script一致"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = stub_classes(ok_stub_path())
+
+    def assert_matches_stub(self, shim_class, stub_name):
+        stub = self.stub[stub_name]
+        for name, member in vars(shim_class).items():
+            if name.startswith('_') and name != '__init__':
+                continue
+            self.assertIn(name, stub, f'{shim_class.__name__}.{name} is not part of ok')
+            if inspect.isfunction(member):
+                self.assertEqual(stub[name], parameter_names(member), f'{shim_class.__name__}.{name}')
+
+    def test_shim_signatures(self):
+        self.assert_matches_stub(headless.Box, 'Box')
+        self.assert_matches_stub(headless.BaseTask, 'BaseTask')
+        self.assert_matches_stub(headless.TriggerTask, 'TriggerTask')
+
+    def test_positional_argument_names(self):
+        task = self.stub['BaseTask']
+        self.assertEqual(task['ocr'], list(MyBaseTask.OCR_ARG_NAMES))
+        self.assertEqual(task['find_feature'], list(MyBaseTask.FIND_FEATURE_ARG_NAMES))
+        self.assertEqual(task['wait_ocr'], list(MyBaseTask.WAIT_OCR_ARG_NAMES))
+        self.assertEqual(task['wait_click_ocr'], list(MyBaseTask.WAIT_CLICK_OCR_ARG_NAMES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+# Test case
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from src.replay import headless
+
+sys.modules['ok'] = headless
+
+from src.config import config  # noqa: E402
+from src.replay.recorder import SessionRecorder  # noqa: E402
+from src.replay.session import write_frame  # noqa: E402
+from src.tasks.OpenWalnutTask import OpenWalnutTask  # noqa: E402
+
+# 纯色画面的亮度对应界面上的按钮文字
+SCREEN_TEXTS = {
+    150: ['撤离', '继续挑战'],
+    100: ['开始挑战'],
+}
+
+
+def fake_ocr(image):
+    """按画面亮度返回按钮文字，文字竖直排列"""
+    texts = SCREEN_TEXTS.get(int(image.mean()), [])
+    height, width = image.shape[:2]
+    return [(text, (width // 4, height // 4 + index * 40, 80, 20), 0.99) for index, text in enumerate(texts)]
+
+
+def textured_frame(value, seed):
+    """平均亮度为value的色块画面，不同seed的画面可由界面分类器区分"""
+    offsets = np.repeat([-40, 40], 72)
+    np.random.default_rng(seed).shuffle(offsets)
+    blocks = (value + offsets.reshape(9, 16)).astype(np.uint8)
+    return cv2.resize(np.dstack([blocks] * 3), (640, 360), interpolation=cv2.INTER_NEAREST)
+
+
+class TestOpenWalnutReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.template_cache = config['template_matching']['template_cache']
+        config['template_matching']['template_cache'] = os.path.join(self.folder, 'templates.bundle')
+        output = self.folder
+        # 统计、检测间隔和OCR区域写到临时目录
+        self.task_class = type('ReplayOpenWalnutTask', (OpenWalnutTask,), {
+            'METRICS_CSV': os.path.join(output, 'rounds.csv'),
+            'METRICS_PROM': os.path.join(output, 'walnut.prom'),
+            'POLL_SCHEDULE_FILE': os.path.join(output, 'poll_schedule.json'),
+            'OCR_ROI_FILE': os.path.join(output, 'ocr_roi.json'),
+            'SCREEN_FOLDER': os.path.join(output, 'screens'),
+        })
+
+    def tearDown(self):
+        config['template_matching']['template_cache'] = self.template_cache
+        shutil.rmtree(self.folder)
+
+    def write_screen(self, state, frame):
+        folder = os.path.join(self.folder, 'screens', state)
+        os.makedirs(folder, exist_ok=True)
+        write_frame(os.path.join(folder, '0.png'), frame)
+
+    def write_session(self, frames):
+        session = os.path.join(self.folder, 'session')
+        recorder = SessionRecorder(session, 'OpenWalnutTask')
+        recorder.record_frame(np.zeros((360, 640, 3), dtype=np.uint8))
+        recorder.close()
+        with open(os.path.join(session, 'events.jsonl'), 'w', encoding='utf-8') as f:
+            for index, (t, value) in enumerate(frames):
+                file_name = f'frames/{index:06d}.png'
+                frame = value if isinstance(value, np.ndarray) else np.full((360, 640, 3), value, dtype=np.uint8)
+                write_frame(os.path.join(session, file_name), frame)
+                f.write(json.dumps({'t': t, 'type': 'frame', 'index': index, 'file': file_name}) + '\n')
+        return session
+
+    def test_rounds_counted_on_virtual_clock(self):
+        # 战斗到5秒和20秒结束，出现撤离/继续挑战，1秒后出现开始挑战
+        session = self.write_session([(0.0, 0), (5.0, 150), (6.0, 100), (8.0, 0),
+                                      (20.0, 150), (21.0, 100), (23.0, 0)])
+        report = headless.ReplayExecutor(session, config, ocr_engine=fake_ocr, tail=2.0).run(
+            self.task_class, {'操作延迟(秒)': 0.5})
+
+        self.assertEqual('replay_finished', report['finished'], report['error'])
+        clicks = [step for step in report['steps'] if step['action'] == 'click']
+        self.assertEqual(4, len(clicks))
+        # 画面变化稳定后立即检测，不等兜底间隔
+        self.assertLess(clicks[0]['t'], 6.0)
+        self.assertLess(clicks[2]['t'], 21.0)
+        with open(os.path.join(self.folder, 'rounds.csv'), encoding='utf-8') as f:
+            rows = f.read().splitlines()[1:]
+        self.assertEqual(2, len(rows))
+        self.assertGreater(report['info']['每小时轮数'], 0)
+        # 检测间隔表记录的是虚拟时钟下的战斗时长
+        with open(os.path.join(self.folder, 'poll_schedule.json'), encoding='utf-8') as f:
+            in_combat = json.load(f)['phases']['in_combat']
+        self.assertEqual(2, len(in_combat))
+        self.assertAlmostEqual(5.0, in_combat[0], delta=1.0)
+        self.assertAlmostEqual(13.0, in_combat[1], delta=1.0)
+
+    def test_open_walnut_starts_from_challenge_choice_screen(self):
+        # 中途启动时已在挑战选择界面，不再等待密函报酬选择
+        challenge = textured_frame(150, 1)
+        self.write_screen('challenge_choice', challenge)
+        session = self.write_session([(0.0, challenge)])
+        report = headless.ReplayExecutor(session, config, ocr_engine=fake_ocr, tail=60.0).run(
+            self.task_class, {'操作延迟(秒)': 0.5, '是否开核桃': True, '轮次': 1})
+
+        self.assertEqual('task_returned', report['finished'], report['error'])
+        self.assertEqual(1, report['rounds'])
+        clicks = [step for step in report['steps'] if step['action'] == 'click']
+        # 最后一轮选择撤离
+        self.assertEqual(1, len(clicks))
+        self.assertLess(clicks[0]['t'], 5.0)
+
+    def manual_frame(self, names):
+        """在标注位置放置手册图标的1920x1080画面"""
+        frame = np.random.default_rng(0).integers(0, 60, (1080, 1920, 3), dtype=np.uint8)
+        templates = headless.HeadlessExecutor(config).templates
+        for name in names:
+            x, y, width, height = templates.box(name, (1920, 1080))
+            frame[y:y + height, x:x + width] = templates.get(name, (1920, 1080))
+        return frame
+
+    def test_find_manual_among_similar_icons(self):
+        frame = self.manual_frame(OpenWalnutTask.MANUAL_FEATURE_MAP.values())
+        task = headless.HeadlessExecutor(config, ocr_engine=fake_ocr, image=frame).create_task(self.task_class)
+        box = task._find_manual('sc2')
+        self.assertEqual(('sc2', 890, 408), (box.name, box.x, box.y))
+
+        # 只有一级手册时不把它当作二级手册
+        task.executor.image = self.manual_frame(['sc1'])
+        self.assertTrue(task.find_feature('sc2', horizontal_variance=9999, vertical_variance=9999))
+        self.assertIsNone(task._find_manual('sc2'))
+        self.assertEqual('sc1', task._find_manual('sc1').name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# Test case
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+from src.utils import openvino_cache
+
+
+class TestOpenvinoCache(unittest.TestCase):
+
+    def test_cache_dir_keyed_by_model_content(self):
+        with tempfile.TemporaryDirectory() as folder:
+            model = os.path.join(folder, 'det.onnx')
+            with open(model, 'wb') as f:
+                f.write(b'model-v1')
+            first = openvino_cache.cache_dir('cache', model)
+            self.assertEqual(first, openvino_cache.cache_dir('cache', model))
+            self.assertTrue(first.endswith(openvino_cache.cpu_key()))
+            with open(model, 'wb') as f:
+                f.write(b'model-v2')
+            self.assertNotEqual(first, openvino_cache.cache_dir('cache', model))
+
+    def test_warm_up_runs_ocr_on_synthetic_text(self):
+        images = []
+
+        class FakeLib:
+            def ocr(self, image):
+                images.append(image)
+                return [[]]
+
+        openvino_cache.warm_up(FakeLib())
+        self.assertEqual(len(images), 1)
+        image = images[0]
+        self.assertEqual(image.shape[2], 3)
+        self.assertLess(image.min(), 128)  # 含有文字笔画
+
+    def test_install_sets_cache_dir_on_onnxocr_core(self):
+        cores = []
+
+        class Core:
+            def __init__(self):
+                self.properties = {}
+                cores.append(self)
+
+            def set_property(self, properties):
+                self.properties.update(properties)
+
+            def read_model(self, model):
+                return model
+
+            def compile_model(self, model, device_name):
+                return (model, device_name)
+
+        class PredictBase:
+            """与onnxocr-ppocrv4 0.0.5的PredictBase.__init__相同的加载方式"""
+
+            def __init__(self, model_dir, use_gpu=False, use_dml=False, use_openvino=False):
+                self.model_dir = model_dir
+                self.is_openvino = use_openvino
+                if self.is_openvino:
+                    import openvino as ov
+                    core = ov.Core()
+                    self.session = core.compile_model(model=core.read_model(model=model_dir), device_name='CPU')
+                else:
+                    self.session = 'onnxruntime'
+
+        openvino = types.SimpleNamespace(Core=Core, __version__='test')
+        onnxocr = types.ModuleType('onnxocr')
+        predict_base = types.SimpleNamespace(PredictBase=PredictBase)
+        modules = {'openvino': openvino, 'onnxocr': onnxocr, 'onnxocr.predict_base': predict_base}
+        for name, module in modules.items():
+            if name in sys.modules:
+                self.addCleanup(sys.modules.__setitem__, name, sys.modules[name])
+            else:
+                self.addCleanup(sys.modules.pop, name)
+            sys.modules[name] = module
+        self.addCleanup(setattr, openvino_cache, '_installed_root', None)
+        self.addCleanup(openvino_cache._cached_dirs.clear)
+
+        with tempfile.TemporaryDirectory() as folder:
+            model = os.path.join(folder, 'det.onnx')
+            with open(model, 'wb') as f:
+                f.write(b'model')
+            self.assertTrue(openvino_cache.install(os.path.join(folder, 'cache')))
+            self.assertEqual('onnxruntime', PredictBase(model).session)
+            self.assertIn('before install', openvino_cache.check())
+            predictor = PredictBase(model, use_openvino=True)
+            # 由onnxocr原来的初始化加载模型
+            self.assertEqual(model, predictor.model_dir)
+            self.assertEqual((model, 'CPU'), predictor.session)
+            self.assertEqual(openvino_cache.cache_dir(os.path.join(folder, 'cache'), model),
+                             cores[0].properties['CACHE_DIR'])
+            self.assertTrue(os.path.isdir(cores[0].properties['CACHE_DIR']))
+            self.assertIs(Core, openvino.Core)
+            # 假的Core不写编译结果，预热后检查报告缓存目录为空
+            self.assertIn('no compiled blobs', openvino_cache.check())
+            with open(os.path.join(cores[0].properties['CACHE_DIR'], 'model.blob'), 'wb') as f:
+                f.write(b'blob')
+            self.assertIsNone(openvino_cache.check())
+
+
+if __name__ == '__main__':
+    unittest.main()
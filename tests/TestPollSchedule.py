@@ -0,0 +1,47 @@
+# Test case
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.utils.poll_schedule import PollSchedule
+
+
+class TestPollSchedule(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'poll', 'OpenWalnutTask.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_default_without_history(self):
+        schedule = PollSchedule(self.path, min_samples=3)
+        schedule.record('reward_wait', 60)
+        self.assertEqual(5, schedule.interval('reward_wait', 10, 5))
+
+    def test_sparse_then_dense_then_default(self):
+        schedule = PollSchedule(self.path, dense_interval=0.2, sparse_interval=5, lead=0.8, overdue=1.2)
+        for duration in (60, 62, 65, 70, 61):
+            schedule.record('reward_wait', duration)
+        dense_from, overdue_at = schedule.bounds('reward_wait')
+        self.assertLess(dense_from, 60)
+        self.assertGreater(overdue_at, 70)
+        poll = schedule.poller('reward_wait', 1)
+        self.assertEqual(5, poll(0))
+        self.assertLess(poll(dense_from - 1), 1)
+        self.assertEqual(0.2, poll(dense_from))
+        self.assertEqual(0.2, poll(65))
+        self.assertEqual(1, poll(overdue_at + 1))
+
+    def test_persisted_per_task(self):
+        schedule = PollSchedule(self.path, window=3)
+        for duration in (10, 20, 30, 40):
+            schedule.record('in_combat', duration)
+        schedule.save()
+        self.assertEqual([20, 30, 40], PollSchedule(self.path).durations['in_combat'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+# Test case
+import threading
+import time
+import unittest
+
+from src.utils.precise_timer import OvershootHistogram, PreciseTimer
+
+
+class TestPreciseTimer(unittest.TestCase):
+
+    def test_sleep_precision(self):
+        timer = PreciseTimer(spin=0.003)
+        for _ in range(20):
+            start = time.perf_counter()
+            overshoot = timer.sleep(0.005, 'hold')
+            elapsed = time.perf_counter() - start
+            self.assertGreaterEqual(elapsed, 0.005)
+            self.assertGreaterEqual(overshoot, 0)
+        stats = timer.stats()['overshoot']['hold']
+        self.assertEqual(stats['n'], 20)
+        self.assertLess(stats['mean_us'], 1000)
+
+    def test_adaptive_spin_and_cancel(self):
+        timer = PreciseTimer()
+        timer.sleep(0.01)
+        self.assertTrue(timer.min_spin <= timer.spin_time <= timer.max_spin)
+        cancelled = threading.Event()
+        threading.Timer(0.02, cancelled.set).start()
+        start = time.perf_counter()
+        self.assertLess(timer.sleep(5, cancelled=cancelled), 0)
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_histogram_buckets(self):
+        histogram = OvershootHistogram()
+        for value in (5, 40, 40, 20000):
+            histogram.add(value)
+        summary = histogram.summary()
+        self.assertEqual(summary['buckets'], {'<=10us': 1, '<=50us': 2, '>16000us': 1})
+        self.assertEqual(summary['max_us'], 20000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# Test case
+import unittest
+
+import cv2
+import numpy as np
+
+from src.utils.pyramid_match import BatchTemplateMatcher, coarse_factor, pyramid_match
+
+
+def make_frame(seed, size=(1440, 2560)):
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (size[0] // 16, size[1] // 16, 3), dtype=np.uint8)
+    frame = cv2.resize(small, (size[1], size[0]), interpolation=cv2.INTER_LINEAR)
+    return cv2.GaussianBlur(frame, (5, 5), 0)
+
+
+class TestPyramidMatch(unittest.TestCase):
+
+    def test_same_location_as_full_match(self):
+        frame = make_frame(0)
+        template = frame[600:700, 1000:1090].copy()
+        matches = pyramid_match(frame, template, 0.8)
+        self.assertEqual((1000, 600, 90, 100), matches[0][:4])
+        self.assertGreater(matches[0][4], 0.99)
+
+    def test_not_found_below_threshold(self):
+        frame = make_frame(0)
+        template = make_frame(1)[600:700, 1000:1090].copy()
+        self.assertEqual([], pyramid_match(frame, template, 0.8))
+
+    def test_small_template_uses_full_resolution(self):
+        self.assertEqual(1.0, coarse_factor((10, 10, 3)))
+        self.assertEqual(0.125, coarse_factor((100, 100, 3)))
+        frame = make_frame(2, size=(360, 640))
+        template = frame[100:110, 200:210].copy()
+        self.assertEqual((200, 100), pyramid_match(frame, template, 0.8)[0][:2])
+
+
+class TestBatchTemplateMatcher(unittest.TestCase):
+
+    def test_correlate_same_as_match_template(self):
+        frame = make_frame(3, size=(360, 640))
+        template = frame[100:150, 200:260].copy()
+        result, _ = BatchTemplateMatcher(frame).correlate(template, 1.0)
+        expected = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+        self.assertEqual(expected.shape, result.shape)
+        self.assertLess(np.abs(expected - result).max(), 1e-3)
+
+    def test_match_ranked_across_templates(self):
+        frame = make_frame(4)
+        other = make_frame(5)
+        templates = {
+            'sc1': frame[300:400, 500:590].copy(),
+            'sc2': frame[900:1000, 1800:1890].copy(),
+            'missing': other[300:400, 500:590].copy(),
+        }
+        matches = BatchTemplateMatcher(frame).match(templates, 0.8)
+        self.assertEqual({('sc1', 500, 300), ('sc2', 1800, 900)}, {match[:3] for match in matches})
+        self.assertGreaterEqual(matches[0][5], matches[-1][5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+# Test case
+import unittest
+
+import numpy as np
+
+from src.utils.rec_ocr import normalize_text, recognize, supports_recognition, text_matches
+
+
+class FakeRecognitionLib:
+    text_recognizer = object()
+
+    def __init__(self):
+        self.calls = []
+
+    def ocr(self, img, det=True, rec=True, cls=True):
+        self.calls.append((len(img), det, rec, cls))
+        return [[('○继续挑战', 0.97) for _ in img]]
+
+
+class TestRecOcr(unittest.TestCase):
+
+    def test_normalized_compare(self):
+        self.assertEqual('继续挑战', normalize_text(' ○继续挑战'))
+        self.assertTrue(text_matches('〇确认选择。', '确认选择'))
+        self.assertTrue(text_matches('Ｓｔａｒｔ', ['开始挑战', 'start']))
+        self.assertFalse(text_matches('确认', '确认选择'))
+
+    def test_recognize_skips_detection(self):
+        lib = FakeRecognitionLib()
+        self.assertTrue(supports_recognition(lib))
+        self.assertFalse(supports_recognition(lambda image: []))
+        crops = [np.zeros((40, 160, 3), dtype=np.uint8)] * 2
+        self.assertEqual([('○继续挑战', 0.97)] * 2, recognize(lib, crops))
+        self.assertEqual([(2, False, True, False)], lib.calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
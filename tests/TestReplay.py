@@ -0,0 +1,86 @@
+# Test case
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.replay.headless import BaseTask, ReplayExecutor
+from src.replay.recorder import SessionRecorder
+from src.replay.session import ReplaySession, write_frame
+
+# 回放只用到模板匹配配置，避免导入依赖ok的src.config
+config = {
+    'template_matching': {'coco_feature_json': 'assets/result.json', 'template_cache': 'cache/templates.bundle'},
+    'supported_resolution': {'resize_to': []},
+}
+
+
+def fake_ocr(image):
+    """画面中间为亮色时识别出按钮文字"""
+    if image[image.shape[0] // 2, image.shape[1] // 2].mean() > 100:
+        return [('确认选择', (image.shape[1] // 2 - 40, image.shape[0] // 2 - 10, 80, 20), 0.99)]
+    return []
+
+
+class ConfirmTask(BaseTask):
+
+    def run(self):
+        self.loop_count = 0
+        while True:
+            if self.wait_click_ocr(match='确认选择', time_out=30):
+                self.loop_count += 1
+            self.wait_until(lambda: not self.ocr(match='确认选择'), time_out=30)
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.dark = np.zeros((360, 640, 3), dtype=np.uint8)
+        self.bright = np.full((360, 640, 3), 200, dtype=np.uint8)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_recorder_skips_unchanged_frames(self):
+        recorder = SessionRecorder(self.folder, 'ConfirmTask')
+        recorder.record_frame(self.dark)
+        recorder.record_frame(self.dark.copy())
+        recorder.record_frame(self.bright)
+        recorder.record_action('click_box', name='确认选择', box=[280, 170, 80, 20])
+        recorder.close()
+
+        session = ReplaySession(self.folder)
+        self.assertEqual(2, len(session.frame_events))
+        self.assertEqual(['click_box'], [event['type'] for event in session.actions])
+        self.assertEqual([640, 360], session.info['resolution'])
+        self.assertEqual(200, session.frame(1)[0, 0, 0])
+
+    def test_replay_reports_steps(self):
+        recorder = SessionRecorder(self.folder, 'ConfirmTask')
+        recorder.record_frame(self.dark)
+        recorder.close()
+        # 画面在2秒和6秒时出现按钮，各持续1秒
+        frames = [(0.0, self.dark), (2.0, self.bright), (3.0, self.dark), (6.0, self.bright), (7.0, self.dark)]
+        with open(os.path.join(self.folder, 'events.jsonl'), 'w', encoding='utf-8') as f:
+            for index, (t, frame) in enumerate(frames):
+                file_name = f'frames/{index:06d}.png'
+                write_frame(os.path.join(self.folder, file_name), frame)
+                f.write(json.dumps({'t': t, 'type': 'frame', 'index': index, 'file': file_name}) + '\n')
+
+        report = ReplayExecutor(self.folder, config, ocr_engine=fake_ocr, tail=1.0).run(ConfirmTask)
+
+        self.assertEqual('replay_finished', report['finished'])
+        self.assertEqual(2, report['rounds'])
+        self.assertEqual(['click', 'click'], [step['action'] for step in report['steps']])
+        self.assertEqual((320, 180), (report['steps'][0]['x'], report['steps'][0]['y']))
+        for step in report['steps']:
+            self.assertLess(step['latency'], 0.5)
+        self.assertGreater(report['total_time'], 7.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# Test case
+import threading
+import unittest
+
+import numpy as np
+
+from src.utils.resource_registry import ResourceRegistry, estimate_size
+
+MB = 1024 * 1024
+
+
+class TestResourceRegistry(unittest.TestCase):
+
+    def test_lazy_shared_loading(self):
+        registry = ResourceRegistry()
+        loads = []
+
+        def factory():
+            loads.append(1)
+            return np.zeros(MB, dtype=np.uint8)
+
+        registry.register('model', factory)
+        self.assertEqual(loads, [])
+        values = []
+        threads = [threading.Thread(target=lambda: values.append(registry.acquire('model'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(loads), 1)
+        self.assertTrue(all(value is values[0] for value in values))
+        stats = registry.stats()['resources']['model']
+        self.assertEqual((stats['refs'], stats['hits'], stats['mb']), (8, 7, 1.0))
+
+    def test_lru_eviction_skips_referenced(self):
+        registry = ResourceRegistry(max_bytes=2 * MB)
+        disposed = []
+        for name in ('a', 'b', 'c'):
+            registry.register(name, lambda: np.zeros(MB, dtype=np.uint8), dispose=lambda value: disposed.append(1))
+        held = registry.acquire('a')
+        with registry.use('b'):
+            pass
+        with registry.use('c'):
+            pass
+        # a被持有不能释放，b最久未使用被释放
+        stats = registry.stats()['resources']
+        self.assertTrue(stats['a']['loaded'])
+        self.assertFalse(stats['b']['loaded'])
+        self.assertTrue(stats['c']['loaded'])
+        self.assertEqual(registry.total_bytes, 2 * MB)
+        self.assertEqual(len(disposed), 1)
+        registry.release('a')
+        registry.set_max_bytes(MB)
+        self.assertFalse(registry.stats()['resources']['a']['loaded'])
+        self.assertIs(type(held), np.ndarray)
+        with registry.use('b'):
+            self.assertEqual(registry.stats()['resources']['b']['loads'], 2)
+
+    def test_tracked_resources_count_towards_cap(self):
+        registry = ResourceRegistry(max_bytes=2 * MB)
+        cache = {'frames': [np.zeros(MB, dtype=np.uint8)]}
+        self.assertIs(registry.track('cache', cache), cache)
+        registry.track('cache', {})  # 已登记时保留原来的对象
+        self.assertEqual(registry.stats()['resources']['cache']['mb'], 1.0)
+        cache['frames'].append(np.zeros(MB, dtype=np.uint8))
+        registry.register('model', lambda: np.zeros(MB, dtype=np.uint8))
+        with registry.use('model'):
+            # 加载时重新估算常驻资源，总大小超过上限
+            self.assertGreaterEqual(registry.total_bytes, 3 * MB)
+        stats = registry.stats()
+        self.assertFalse(stats['resources']['model']['loaded'])
+        self.assertTrue(stats['resources']['cache']['loaded'])
+        self.assertTrue(stats['resources']['cache']['tracked'])
+        self.assertLess(stats['total_mb'], 2.01)
+        self.assertFalse(registry.evict('cache'))
+
+    def test_estimate_size_counts_views_once(self):
+        array = np.zeros((100, 100), dtype=np.float32)
+        small = estimate_size({'array': array, 'view': array[:10], 'list': [array]})
+        self.assertGreaterEqual(small, array.nbytes)
+        self.assertLess(small, array.nbytes * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
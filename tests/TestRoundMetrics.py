@@ -0,0 +1,76 @@
+# Test case
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.utils.round_metrics import RoundMetrics
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRoundMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.metrics = RoundMetrics(['reward_wait', 'confirm_click'], window=3, clock=self.clock)
+        self.metrics.start()
+
+    def play_round(self, wait, confirm):
+        with self.metrics.phase('reward_wait'):
+            self.clock.now += wait
+        with self.metrics.phase('confirm_click'):
+            self.clock.now += confirm
+        return self.metrics.end_round()
+
+    def test_rolling_percentiles_and_rate(self):
+        for wait in (100, 120, 110, 300):
+            row = self.play_round(wait, 2)
+        self.assertEqual(302, row['round'])
+        summary = self.metrics.summary()
+        # 只保留最近3轮
+        self.assertEqual(3, summary['reward_wait']['count'])
+        self.assertEqual(120, summary['reward_wait']['p50'])
+        self.assertEqual(300, summary['reward_wait']['last'])
+        self.assertAlmostEqual(3 * 3600 / (122 + 112 + 302), self.metrics.rounds_per_hour())
+
+    def test_abort_discards_failed_attempt(self):
+        self.play_round(100, 2)
+        with self.metrics.phase('reward_wait'):
+            self.clock.now += 130
+        self.metrics.abort_round()
+        row = self.play_round(50, 1)
+        self.assertEqual(50, row['reward_wait'])
+        self.assertEqual(51, row['round'])
+        self.assertEqual(2, self.metrics.rounds)
+
+    def test_outputs(self):
+        folder = tempfile.mkdtemp()
+        try:
+            csv_path = os.path.join(folder, 'rounds.csv')
+            prom_path = os.path.join(folder, 'walnut.prom')
+            for _ in range(2):
+                self.metrics.append_csv(csv_path, self.play_round(60, 1.5))
+            self.metrics.write_prometheus(prom_path, 'OpenWalnutTask')
+            with open(csv_path, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+            self.assertEqual('time,round_index,round,reward_wait,confirm_click', lines[0])
+            self.assertTrue(lines[2].endswith(',2,61.500,60.000,1.500'))
+            with open(prom_path, encoding='utf-8') as f:
+                prom = f.read()
+            self.assertIn('ok_dna_rounds_total{task="OpenWalnutTask"} 2', prom)
+            self.assertIn('ok_dna_phase_seconds{task="OpenWalnutTask",phase="confirm_click",quantile="0.95"} 1.500',
+                          prom)
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
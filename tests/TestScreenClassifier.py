@@ -0,0 +1,40 @@
+# Test case
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from src.utils.screen_classifier import ScreenClassifier
+
+
+def make_screen(seed, size=(1080, 1920)):
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (9, 16, 3), dtype=np.uint8)
+    return cv2.resize(small, (size[1], size[0]), interpolation=cv2.INTER_NEAREST)
+
+
+class TestScreenClassifier(unittest.TestCase):
+
+    def test_classify_from_folder(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for state, seed in (('reward_selection', 1), ('in_combat', 2)):
+                os.makedirs(os.path.join(folder, state))
+                cv2.imwrite(os.path.join(folder, state, '0.png'), make_screen(seed))
+            classifier = ScreenClassifier(folder)
+
+        self.assertEqual(['in_combat', 'reward_selection'], classifier.states)
+        state, score = classifier.classify(make_screen(1, size=(1440, 2560)))
+        self.assertEqual('reward_selection', state)
+        self.assertGreater(score, 0.9)
+        state, _ = classifier.classify(make_screen(3))
+        self.assertIsNone(state)
+
+    def test_empty_classifier(self):
+        classifier = ScreenClassifier()
+        self.assertEqual((None, 0.0), classifier.classify(make_screen(1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
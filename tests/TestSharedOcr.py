@@ -0,0 +1,92 @@
+# Test case
+import os
+import tempfile
+import threading
+import unittest
+
+import cv2
+import numpy as np
+
+from src.replay.multi_session import FileFrameSource
+from src.utils.shared_ocr import BatchQueue, SharedOcrEngine
+
+
+class FakeLib:
+    """只支持ocr方法的OCR库，记录每次调用的图片数"""
+
+    def __init__(self):
+        self.calls = []
+
+    def ocr(self, img, det=True, rec=True, cls=True):
+        if det:
+            self.calls.append(1)
+            return [[[[[0, 0], [10, 0], [10, 5], [0, 5]], (f'w{img.shape[1]}', 0.9)]]]
+        self.calls.append(len(img))
+        return [[(f'w{image.shape[1]}', 0.9) for image in img]]
+
+
+class TestSharedOcr(unittest.TestCase):
+
+    def test_concurrent_requests_batched(self):
+        gate = threading.Event()
+        sizes = []
+
+        def batch_fn(items):
+            gate.wait(1)
+            sizes.append(len(items))
+            return [item * 2 for item in items]
+
+        batches = BatchQueue(batch_fn, max_batch=8, max_wait=0.5)
+        batches.clients = 4
+        futures = [batches.submit(index) for index in range(5)]
+        gate.set()
+        self.assertEqual([0, 2, 4, 6, 8], [future.result(2) for future in futures])
+        # 第一批凑够4个客户端的请求就执行，不等max_wait
+        self.assertEqual([4, 1], sizes)
+        self.assertEqual(2.5, batches.stats()['mean_batch'])
+        batches.close()
+
+    def test_errors_reach_every_request(self):
+        def batch_fn(items):
+            raise RuntimeError('inference failed')
+
+        batches = BatchQueue(batch_fn, max_wait=0)
+        with self.assertRaises(RuntimeError):
+            batches.call(1)
+        batches.close()
+
+    def test_recognition_split_per_session(self):
+        lib = FakeLib()
+        engine = SharedOcrEngine(lib, max_wait=0.2)
+        for _ in range(3):
+            engine.attach()
+        results = {}
+
+        def session(width):
+            images = [np.zeros((20, width, 3), dtype=np.uint8)] * 2
+            results[width] = engine.ocr(images, det=False, rec=True, cls=False)[0]
+
+        threads = [threading.Thread(target=session, args=(width,)) for width in (30, 40, 50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for width in (30, 40, 50):
+            self.assertEqual([(f'w{width}', 0.9)] * 2, results[width])
+        self.assertEqual(6, sum(lib.calls))
+        self.assertLess(len(lib.calls), 3)
+        self.assertEqual([('w64', (0, 0, 10, 5), 0.9)], engine(np.zeros((20, 64, 3), dtype=np.uint8)))
+        engine.close()
+
+    def test_file_frame_source(self):
+        folder = tempfile.mkdtemp()
+        for index in range(2):
+            cv2.imwrite(os.path.join(folder, f'{index}.png'), np.full((4, 4, 3), index * 100, dtype=np.uint8))
+        source = FileFrameSource(folder, fps=2)
+        self.assertEqual(0, source.frame(0.1)[0, 0, 0])
+        self.assertEqual(100, source.frame(0.6)[0, 0, 0])
+        self.assertEqual(0, source.frame(1.1)[0, 0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+# Test case
+import unittest
+
+from src.utils.startup_profile import import_times, mark, marks, parse_importtime, project_modules
+
+
+class TestStartupProfile(unittest.TestCase):
+
+    def test_parse_importtime(self):
+        text = '\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |   _io',
+            'import time:      2500 |      31000 | cv2',
+            'Traceback (most recent call last):',
+        ])
+        times = parse_importtime(text)
+        self.assertEqual(times, {'_io': (0.12, 0.12), 'cv2': (2.5, 31.0)})
+
+    def test_task_import_defers_tools(self):
+        prelude = 'import sys; from src.replay import headless; sys.modules["ok"] = headless'
+        times = import_times('src.tasks.MyBaseTask', prelude)
+        # 前置代码导入的模块不计入
+        self.assertNotIn('src.replay.headless', times)
+        modules = [name for name, _ in project_modules(times)]
+        self.assertIn('src.tasks.MyBaseTask', modules)
+        for deferred in ('src.replay.recorder', 'src.utils.screen_classifier', 'src.utils.rec_ocr',
+                         'src.utils.async_log', 'src.utils.frame_change'):
+            self.assertNotIn(deferred, modules)
+
+    def test_marks_relative_to_start(self):
+        mark('test_mark')
+        mark('test_mark')
+        timings = marks()
+        self.assertEqual(next(iter(timings)), 'process_start')
+        self.assertGreaterEqual(timings['test_mark'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# Test case
+import json
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from src.utils.asset_bundle import AssetBundle, write_bundle
+from src.utils.template_cache import TemplateCache
+
+
+class TestTemplateCache(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.coco_json = os.path.join(self.folder.name, 'result.json')
+        self.bundle = os.path.join(self.folder.name, 'cache', 'templates.bundle')
+        self.image_path = os.path.join(self.folder.name, 'images', 'main.png')
+        os.makedirs(os.path.dirname(self.image_path))
+        self.write_image(100)
+        coco = {
+            'images': [{'id': 1, 'file_name': 'images/main.png', 'width': 640, 'height': 360}],
+            'categories': [{'id': 1, 'name': 'button'}],
+            'annotations': [{'id': 1, 'image_id': 1, 'category_id': 1, 'bbox': [10, 20, 40, 30]}],
+        }
+        with open(self.coco_json, 'w', encoding='utf-8') as f:
+            json.dump(coco, f)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def write_image(self, value):
+        cv2.imwrite(self.image_path, np.full((360, 640, 3), value, dtype=np.uint8))
+
+    def cache(self):
+        return TemplateCache(self.coco_json, self.bundle, [(1280, 720)])
+
+    def test_rebuild_only_on_content_change(self):
+        cache = self.cache()
+        self.assertFalse(cache.load_or_build())
+        template = cache.get('button', (1280, 720))
+        self.assertEqual((80, 60), template.shape[1::-1])
+
+        # 只有修改时间变化时沿用资源包，旧的模板视图仍然可用
+        stat = os.stat(self.image_path)
+        os.utime(self.image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        cache = self.cache()
+        self.assertTrue(cache.load_or_build())
+        self.assertEqual(100, template[0, 0, 0])
+        self.assertTrue(cache.load_or_build())
+
+        self.write_image(200)
+        os.utime(self.image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+        cache = self.cache()
+        self.assertFalse(cache.load_or_build())
+        self.assertEqual(200, cache.get('button', (1280, 720))[0, 0, 0])
+
+    def test_restamp_after_validation(self):
+        self.cache().load_or_build()
+        bundle = AssetBundle(self.bundle)
+        meta = dict(bundle.meta, source_stamp=[['result.json', 0, 0]])
+        arrays = {name: np.array(bundle.get(name)) for name in bundle.names()}
+        bundle.close()
+        write_bundle(self.bundle, arrays, meta)
+
+        cache = self.cache()
+        self.assertTrue(cache.load_or_build())
+        bundle = AssetBundle(self.bundle)
+        self.assertEqual(cache.source_stamp, bundle.meta['source_stamp'])
+        bundle.close()
+
+    def test_source_size_from_coco_images(self):
+        # 图片文件被裁剪后，缩放比例仍按images中记录的原图尺寸计算
+        cv2.imwrite(self.image_path, np.full((100, 200, 3), 100, dtype=np.uint8))
+        cache = self.cache()
+        cache.load_or_build()
+        self.assertEqual((10, 20, 640, 360), cache.boxes['button'])
+        self.assertEqual((20, 40, 80, 60), cache.box('button', (1280, 720)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+# Test case
+import unittest
+
+from src.utils.tracing import Tracer
+
+
+class TestTracing(unittest.TestCase):
+
+    def test_chrome_trace(self):
+        tracer = Tracer(capacity=10)
+        with tracer.span('wait_click_ocr', 'wait', match=['继续挑战']) as outer:
+            with tracer.span('ocr', 'detect', box=None) as inner:
+                inner.tag('hit', True)
+            outer.tag('hit', True)
+        events = tracer.chrome_trace()['traceEvents']
+        self.assertEqual(['ocr', 'wait_click_ocr'], [event['name'] for event in events])
+        ocr, wait = events
+        self.assertEqual('X', ocr['ph'])
+        self.assertEqual({'box': None, 'hit': True}, ocr['args'])
+        self.assertEqual(['继续挑战'], wait['args']['match'])
+        self.assertLessEqual(wait['ts'], ocr['ts'])
+        self.assertGreaterEqual(wait['ts'] + wait['dur'], ocr['ts'] + ocr['dur'])
+
+    def test_ring_buffer_and_errors(self):
+        tracer = Tracer(capacity=3)
+        for index in range(5):
+            with tracer.span('sleep', timeout=index):
+                pass
+        with self.assertRaises(ValueError):
+            with tracer.span('ocr'):
+                raise ValueError()
+        self.assertEqual([3, 4], [span[5]['timeout'] for span in list(tracer.spans)[:2]])
+        self.assertEqual('ValueError', tracer.spans[-1][5]['error'])
+        self.assertEqual({'sleep': 2, 'ocr': 1}, {name: value['count'] for name, value in tracer.summary().items()})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# Test case
+import unittest
+
+import numpy as np
+
+from src.utils.derived_frame import DerivedFrameCache
+from src.utils.trigger_scheduler import TriggerScheduler
+
+
+class TestTriggerScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.static = np.zeros((360, 640, 3), dtype=np.uint8)
+        self.top_left = self.static.copy()
+        self.top_left[0:120, 0:200] = 200
+        self.scheduler = TriggerScheduler(frame_budget=0, derived_frames=DerivedFrameCache())
+        self.calls = []
+
+    def add(self, name, **kwargs):
+        return self.scheduler.add(name, lambda frame: self.calls.append(name), **kwargs)
+
+    def test_runs_only_when_region_changed(self):
+        self.add('top_left', regions=[(0, 0, 0.5, 0.5)], budget=0)
+        self.add('bottom_right', regions=[(0.5, 0.5, 1, 1)], budget=0)
+        self.assertEqual(['top_left', 'bottom_right'], self.scheduler.tick(self.static.copy(), 0))
+        self.assertEqual([], self.scheduler.tick(self.static.copy(), 1))
+        self.assertEqual(['top_left'], self.scheduler.tick(self.top_left.copy(), 2))
+        report = self.scheduler.report()['triggers']
+        self.assertEqual(1, report['bottom_right']['runs'])
+        self.assertEqual(2, report['bottom_right']['skipped_unchanged'])
+
+    def test_priority_and_min_interval(self):
+        self.add('low', priority=0, budget=0)
+        self.add('high', priority=10, min_interval=5, budget=0)
+        self.scheduler.tick(self.static.copy(), 0)
+        self.assertEqual(['high', 'low'], self.calls)
+        # 变化时low执行，high在最小间隔内保留变化标记
+        self.assertEqual(['low'], self.scheduler.tick(self.top_left.copy(), 1))
+        self.assertEqual(['high'], self.scheduler.tick(self.top_left.copy(), 5))
+
+    def test_budget_delays_expensive_trigger(self):
+        clock = [0.0]
+
+        def expensive(frame):
+            clock[0] += 0.1
+
+        scheduler = TriggerScheduler(frame_budget=0, clock=lambda: clock[0], derived_frames=DerivedFrameCache())
+        scheduler.add('expensive', expensive, budget=0.05, max_interval=0.5)
+        self.assertEqual(['expensive'], scheduler.tick(self.static.copy(), 0))
+        # 耗时0.1秒、预算5%，2秒内不再执行
+        self.assertEqual([], scheduler.tick(self.top_left.copy(), 1))
+        self.assertEqual(['expensive'], scheduler.tick(self.top_left.copy(), 2))
+        report = scheduler.report()['triggers']['expensive']
+        self.assertEqual(1, report['skipped_budget'])
+        self.assertAlmostEqual(200, report['total_ms'])
+
+    def test_frame_budget_defers_lower_priority(self):
+        clock = [0.0]
+        scheduler = TriggerScheduler(frame_budget=0.01, clock=lambda: clock[0], derived_frames=DerivedFrameCache())
+        scheduler.add('first', lambda frame: clock.__setitem__(0, clock[0] + 0.02), priority=1, budget=0)
+        scheduler.add('second', lambda frame: None, budget=0)
+        self.assertEqual(['first'], scheduler.tick(self.static.copy(), 0))
+        self.assertEqual(['second'], scheduler.tick(self.static.copy(), 1))
+
+
+if __name__ == '__main__':
+    unittest.main()